@@ -0,0 +1,116 @@
+"""One filtered list call vs one call per id, now that array params are sent as ``name[]``.
+
+Generates ``list_submissions_for_multiple_assignments_courses``
+(``GET /v1/courses/{course_id}/students/submissions`` with its ``student_ids[]``
+and ``assignment_ids[]`` filters) and fetches one assignment's submissions for
+``--students`` students both ways against a mock Canvas that answers each
+request after ``--latency`` ms. Prints requests sent and wall time.
+
+    python benchmarks/array_params.py --students 200 --latency 20
+"""
+
+import argparse
+import time
+
+import httpx
+
+from canopy import CanvasSession
+from canopy.scripts.canvas_api_builder import get_jinja_env
+
+SPEC = {
+    "apiVersion": "1.0",
+    "apis": [
+        {
+            "path": "/v1/courses/{course_id}/students/submissions",
+            "operations": [
+                {
+                    "nickname": "list_submissions_for_multiple_assignments_courses",
+                    "summary": "List submissions for multiple assignments",
+                    "notes": "",
+                    "method": "GET",
+                    "type": "array",
+                    "parameters": [
+                        {"name": "course_id", "paramType": "path", "required": True},
+                        {
+                            "name": "student_ids",
+                            "paramType": "query",
+                            "type": "array",
+                            "items": {"type": "string"},
+                        },
+                        {
+                            "name": "assignment_ids",
+                            "paramType": "query",
+                            "type": "array",
+                            "items": {"type": "string"},
+                        },
+                    ],
+                }
+            ],
+        }
+    ],
+}
+
+
+def load():
+    source = (
+        get_jinja_env()
+        .get_template("canopy_api.py.jinja2")
+        .render(spec=SPEC, api_name="Submissions", api_file_name="submissions")
+    )
+    namespace: dict = {}
+    exec(compile(source, "<generated>", "exec"), namespace)
+    return namespace["Submissions"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=20.0, help="ms per request")
+    args = parser.parse_args()
+
+    sent = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal sent
+        sent += 1
+        time.sleep(args.latency / 1000)
+        (assignment_id,) = request.url.params.get_list("assignment_ids[]")
+        return httpx.Response(
+            200,
+            json=[
+                {"assignment_id": int(assignment_id), "user_id": int(s)}
+                for s in request.url.params.get_list("student_ids[]")
+            ],
+        )
+
+    session = CanvasSession(
+        "https://canvas.example.com",
+        "token",
+        rate_limit=False,
+        transport=httpx.MockTransport(handler),
+    )
+    api = load()(session)
+    student_ids = [str(s) for s in range(args.students)]
+    fetch_submissions = api.list_submissions_for_multiple_assignments_courses
+
+    def per_id() -> list:
+        return [
+            sub
+            for s in student_ids
+            for sub in fetch_submissions(1, student_ids=[s], assignment_ids=["7"])
+        ]
+
+    def filtered() -> list:
+        return fetch_submissions(1, student_ids=student_ids, assignment_ids=["7"])
+
+    for label, fetch in (("per id", per_id), ("filtered", filtered)):
+        sent = 0
+        start = time.perf_counter()
+        submissions = fetch()
+        elapsed = time.perf_counter() - start
+        assert len(submissions) == args.students
+        print(f"{label:9} {sent:5} requests  {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Cold-start cost of the generated CanvasClient: eager imports vs lazy loading.
+
+Generates ``--specs`` synthetic API specs (sync and async modules, ``--ops``
+operations each) with the real templates into a temporary directory, then
+times, in fresh interpreters, importing the client, constructing it and
+touching ``--touch`` APIs. The eager variant reproduces the previous client,
+which imported and instantiated every module up front.
+
+    python benchmarks/client_import.py --specs 150 --ops 25 --touch 3
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from canopy.scripts.canvas_api_builder import _snake_to_pascal, get_jinja_env
+
+EAGER_CLIENT = """\
+{% for api in generated_api_files %}
+from {{api_module_path}}{{api.base_name}} import {{api.class_name}}
+{% endfor %}
+from canopy import CanvasSession
+
+
+class CanvasClient:
+    def __init__(self, instance_address, access_token, max_per_page=100, **session_options):
+        self.client = CanvasSession(instance_address, access_token, max_per_page, **session_options)
+        {% for api in generated_api_files %}
+        self.{{api.base_name}} = {{api.class_name}}(self.client)
+        {% endfor %}
+"""
+
+PROBE = """\
+import resource, sys, time
+start = time.perf_counter()
+import {module}
+client = {module}.CanvasClient("https://canvas.example.com", "token")
+for name in {touch!r}:
+    getattr(client, name)
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def synthetic_spec(n: int, ops: int) -> dict:
+    operations = []
+    for i in range(ops):
+        operations.append(
+            {
+                "path": f"/v1/things{n}/{{id}}/op{i}",
+                "operations": [
+                    {
+                        "nickname": f"operation_{i}",
+                        "summary": f"Operation {i}",
+                        "notes": "Synthetic operation.",
+                        "method": "GET" if i % 2 else "PUT",
+                        "type": "array" if i % 3 == 0 else "Thing",
+                        "parameters": [
+                            {"name": "id", "paramType": "path", "required": True},
+                            {"name": "search_term", "paramType": "query", "type": "string"},
+                            {
+                                "name": "order",
+                                "paramType": "query",
+                                "type": "string",
+                                "enum": ["asc", "desc"],
+                            },
+                            {"name": "thing[name]", "paramType": "form", "type": "string"},
+                            {"name": "thing[due_at]", "paramType": "form", "type": "DateTime"},
+                        ],
+                    }
+                ],
+            }
+        )
+    return {"apiVersion": "1.0", "apis": operations}
+
+
+def generate(root: Path, specs: int, ops: int) -> list[dict]:
+    env = get_jinja_env()
+    package = root / "bench_apis"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    files = []
+    for n in range(specs):
+        spec = synthetic_spec(n, ops)
+        stem = f"things{n}"
+        for template, file_stem in (
+            ("canopy_api.py.jinja2", stem),
+            ("canopy_api_async.py.jinja2", f"{stem}_async"),
+        ):
+            name = _snake_to_pascal(stem)
+            source = env.get_template(template).render(
+                spec=spec, api_name=name, api_file_name=file_stem
+            )
+            (package / f"{file_stem}.py").write_text(source)
+            files.append({"base_name": file_stem, "class_name": _snake_to_pascal(file_stem)})
+    context = {"api_module_path": "bench_apis.", "generated_api_files": files}
+    (root / "lazy_client.py").write_text(
+        env.get_template("canvas_client.py.jinja2").render(**context)
+    )
+    (root / "eager_client.py").write_text(env.from_string(EAGER_CLIENT).render(**context))
+    return files
+
+
+def probe(root: Path, module: str, touch: list[str]) -> tuple[float, int]:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, touch=touch)],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed, rss = result.stdout.split()
+    return float(elapsed), int(rss)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--specs", type=int, default=150)
+    parser.add_argument("--ops", type=int, default=25)
+    parser.add_argument("--touch", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        files = generate(root, args.specs, args.ops)
+        touch = [f["base_name"] for f in files[: args.touch]]
+        # Compile every module once so both variants load from warm .pyc files
+        subprocess.run([sys.executable, "-m", "compileall", "-q", str(root)], check=True)
+        print(f"{len(files)} modules, {args.ops} operations each, touching {len(touch)}")
+        for module in ("eager_client", "lazy_client"):
+            runs = [probe(root, module, touch) for _ in range(args.runs)]
+            elapsed = statistics.median(r[0] for r in runs)
+            rss = statistics.median(r[1] for r in runs)
+            print(f"  {module:13} {elapsed * 1000:8.1f} ms  {rss / 1024:6.1f} MiB max RSS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Size and import cost of generated modules: full vs ``--compact``.
+
+Generates ``--specs`` synthetic specs (sync and async modules, ``--ops``
+operations each) in both modes, then reports source bytes, bytecode bytes,
+and the time and peak RSS of importing every module in a fresh interpreter.
+
+    python benchmarks/compact_modules.py --specs 150 --ops 25
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from client_import import synthetic_spec
+
+from canopy.scripts.canvas_api_builder import _snake_to_pascal, get_jinja_env
+
+PROBE = """\
+import importlib, resource, time
+start = time.perf_counter()
+for name in {modules!r}:
+    importlib.import_module("bench_apis." + name)
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def generate(root: Path, specs: int, ops: int, compact: bool) -> list[str]:
+    env = get_jinja_env()
+    package = root / "bench_apis"
+    package.mkdir(parents=True)
+    (package / "__init__.py").write_text("")
+    modules = []
+    for n in range(specs):
+        spec = synthetic_spec(n, ops)
+        stem = f"things{n}"
+        for template, file_stem in (
+            ("canopy_api.py.jinja2", stem),
+            ("canopy_api_async.py.jinja2", f"{stem}_async"),
+        ):
+            source = env.get_template(template).render(
+                spec=spec, api_name=_snake_to_pascal(stem), api_file_name=file_stem, compact=compact
+            )
+            (package / f"{file_stem}.py").write_text(source)
+            modules.append(file_stem)
+    subprocess.run([sys.executable, "-m", "compileall", "-q", str(package)], check=True)
+    return modules
+
+
+def size(package: Path, pattern: str) -> int:
+    return sum(p.stat().st_size for p in package.rglob(pattern))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--specs", type=int, default=150)
+    parser.add_argument("--ops", type=int, default=25)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{args.specs * 2} modules, {args.ops} operations each")
+        for label, compact in (("full", False), ("compact", True)):
+            root = Path(tmp) / label
+            modules = generate(root, args.specs, args.ops, compact)
+            runs = []
+            for _ in range(args.runs):
+                result = subprocess.run(
+                    [sys.executable, "-c", PROBE.format(modules=modules)],
+                    cwd=root,
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                )
+                elapsed, rss = result.stdout.split()
+                runs.append((float(elapsed), int(rss)))
+            package = root / "bench_apis"
+            print(
+                f"  {label:8} source {size(package, '*.py') / 1024:7.0f} KiB"
+                f"  bytecode {size(package, '*.pyc') / 1024:7.0f} KiB"
+                f"  import {statistics.median(r[0] for r in runs) * 1000:7.1f} ms"
+                f"  max RSS {statistics.median(r[1] for r in runs) / 1024:6.1f} MiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""First-call cost of DynamicCanvasClient vs the generated CanvasClient.
+
+Generates ``--specs`` synthetic specs (``--ops`` operations each) as
+``--plans`` modules with the lazy client and as a ``canopy_build bundle``
+file, then times, in fresh interpreters, importing the client, constructing
+it and making the first call to one operation on each of ``--touch`` APIs
+against a mock transport. Also reports the peak RSS and the on-disk size.
+
+    python benchmarks/dynamic_client.py --specs 150 --ops 25 --touch 3
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from client_import import synthetic_spec
+
+from canopy.dynamic import dump_bundle
+from canopy.scripts.canvas_api_builder import _snake_to_pascal, bundle_operations, get_jinja_env
+
+PROBE = """\
+import resource, time
+start = time.perf_counter()
+import httpx
+transport = httpx.MockTransport(lambda request: httpx.Response(200, json={{"id": 1}}))
+{setup}
+for name in {touch!r}:
+    getattr(client, name).operation_1(1)
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+SETUP = {
+    "generated": (
+        "from canvas_client import CanvasClient\n"
+        'client = CanvasClient("https://canvas.example.com", "token", transport=transport)'
+    ),
+    "dynamic": (
+        "from canopy import DynamicCanvasClient\n"
+        "client = DynamicCanvasClient(\n"
+        '    "https://canvas.example.com", "token", "canvas.bundle", transport=transport\n'
+        ")"
+    ),
+}
+
+
+def generate(root: Path, specs: int, ops: int) -> list[str]:
+    env = get_jinja_env()
+    package = root / "bench_apis"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    files, apis = [], {}
+    for n in range(specs):
+        spec = synthetic_spec(n, ops)
+        stem = f"things{n}"
+        source = env.get_template("canopy_api.py.jinja2").render(
+            spec=spec, api_name=_snake_to_pascal(stem), api_file_name=stem, plans=True
+        )
+        (package / f"{stem}.py").write_text(source)
+        files.append({"base_name": stem, "class_name": _snake_to_pascal(stem)})
+        apis[stem] = bundle_operations(spec)
+    (root / "canvas_client.py").write_text(
+        env.get_template("canvas_client.py.jinja2").render(
+            api_module_path="bench_apis.", generated_api_files=files
+        )
+    )
+    (root / "canvas.bundle").write_bytes(dump_bundle(apis))
+    # Compile every module once so the generated client loads from warm .pyc files
+    subprocess.run([sys.executable, "-m", "compileall", "-q", str(root)], check=True)
+    return [f["base_name"] for f in files]
+
+
+def probe(root: Path, variant: str, touch: list[str]) -> tuple[float, int]:
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(setup=SETUP[variant], touch=touch)],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed, rss = result.stdout.split()
+    return float(elapsed), int(rss)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--specs", type=int, default=150)
+    parser.add_argument("--ops", type=int, default=25)
+    parser.add_argument("--touch", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        names = generate(root, args.specs, args.ops)
+        touch = names[: args.touch]
+        on_disk = {
+            "generated": sum(p.stat().st_size for p in (root / "bench_apis").glob("*.py")),
+            "dynamic": (root / "canvas.bundle").stat().st_size,
+        }
+        print(f"{len(names)} APIs, {args.ops} operations each, first call on {len(touch)}")
+        # Interleave the variants so machine noise hits both equally
+        runs: dict[str, list[tuple[float, int]]] = {variant: [] for variant in SETUP}
+        for _ in range(args.runs):
+            for variant in SETUP:
+                runs[variant].append(probe(root, variant, touch))
+        for variant, results in runs.items():
+            elapsed = min(r[0] for r in results)
+            rss = statistics.median(r[1] for r in results)
+            print(
+                f"  {variant:9} {elapsed * 1000:8.1f} ms  {rss / 1024:6.1f} MiB max RSS"
+                f"  {on_disk[variant] / 1024:7.0f} KiB on disk"
+            )
+
+
+if __name__ == "__main__":
+    main()
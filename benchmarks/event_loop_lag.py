@@ -0,0 +1,108 @@
+"""Event-loop lag while decoding large pages: inline vs ``DecodeOffload``.
+
+Runs ``--streams`` concurrent depaginations of ``--pages`` pages of
+submissions with rubric assessments each, against a mock transport with
+``--latency`` ms per request. A ticker task sleeps 1 ms at a time and records
+how late it wakes up, which is how long every other in-flight request's I/O is
+stalled. Reported per decoding policy: median, p99 and worst lag, and wall time.
+
+    python benchmarks/event_loop_lag.py --streams 8 --pages 10 --items 400
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+from canopy import CanvasSession, DecodeOffload
+
+
+def page_body(items: int) -> bytes:
+    rubric = {
+        f"_{n}": {"rating_id": f"r{n}", "points": 2.5, "comments": "Meets expectations " * 4}
+        for n in range(12)
+    }
+    return json.dumps(
+        [
+            {
+                "id": i,
+                "user_id": i,
+                "workflow_state": "graded",
+                "score": 27.5,
+                "rubric_assessment": rubric,
+                "submission_comments": [{"id": c, "comment": "See rubric " * 10} for c in range(4)],
+            }
+            for i in range(items)
+        ]
+    ).encode()
+
+
+async def run(policy: DecodeOffload | None, args: argparse.Namespace, body: bytes) -> None:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(args.latency / 1000)
+        n = int(request.url.params.get("page", "1"))
+        headers = {}
+        if n < args.pages:
+            headers["Link"] = f'<{request.url.copy_set_param("page", n + 1)}>; rel="next"'
+        return httpx.Response(200, content=body, headers=headers)
+
+    session = CanvasSession(
+        "https://canvas.example.com",
+        "token",
+        rate_limit=False,
+        decode_offload=policy or False,
+        async_transport=httpx.MockTransport(handler),
+    )
+    lags: list[float] = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            lags.append(time.perf_counter() - start - 0.001)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            session.async_get(f"/api/v1/courses/{s}/students/submissions", all_pages=True)
+            for s in range(args.streams)
+        )
+    )
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick
+    await session.aclose()
+    label = "inline" if policy is None else policy.executor
+    p50, p99 = (q * 1000 for q in statistics.quantiles(lags, n=100, method="inclusive")[49::49])
+    print(
+        f"  {label:8} lag p50 {p50:6.2f} ms  p99 {p99:6.2f} ms"
+        f"  max {max(lags) * 1000:6.2f} ms  wall {elapsed * 1000:6.0f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=8)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--items", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=30.0, help="ms per request")
+    parser.add_argument("--threshold", type=int, default=256 * 1024)
+    args = parser.parse_args()
+
+    body = page_body(args.items)
+    print(f"{args.streams} streams x {args.pages} pages of {len(body) / 1024:.0f} KiB")
+    for policy in (
+        None,
+        DecodeOffload(args.threshold, "thread"),
+        DecodeOffload(args.threshold, "process"),
+    ):
+        asyncio.run(run(policy, args, body))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Per-call overhead of generated methods: classic templates vs ``--plans``.
+
+Renders the same operation both ways, then calls each generated method
+``--calls`` times against a session whose network layer returns a canned
+response, so only the Python work between the method call and the wire is
+measured.
+
+    python benchmarks/request_plans.py --calls 50000
+"""
+
+import argparse
+import timeit
+from functools import partial
+
+import httpx
+
+from canopy import CanvasSession
+from canopy.scripts.canvas_api_builder import get_jinja_env
+
+SPEC = {
+    "apiVersion": "1.0",
+    "apis": [
+        {
+            "path": "/v1/courses/{course_id}/assignments/{assignment_id}/submissions/{user_id}",
+            "operations": [
+                {
+                    "nickname": "grade_submission",
+                    "summary": "Grade or comment on a submission",
+                    "notes": "",
+                    "method": "PUT",
+                    "type": "Submission",
+                    "parameters": [
+                        {"name": "course_id", "paramType": "path", "required": True},
+                        {"name": "assignment_id", "paramType": "path", "required": True},
+                        {"name": "user_id", "paramType": "path", "required": True},
+                        {"name": "comment[text_comment]", "paramType": "form", "type": "string"},
+                        {"name": "submission[posted_grade]", "paramType": "form"},
+                        {
+                            "name": "include",
+                            "paramType": "query",
+                            "type": "string",
+                            "enum": ["visibility"],
+                        },
+                        {
+                            "name": "submission[submitted_at]",
+                            "paramType": "form",
+                            "type": "DateTime",
+                        },
+                    ],
+                }
+            ],
+        }
+    ],
+}
+
+
+def load(plans: bool):
+    source = (
+        get_jinja_env()
+        .get_template("canopy_api.py.jinja2")
+        .render(spec=SPEC, api_name="Submissions", api_file_name="submissions", plans=plans)
+    )
+    namespace: dict = {}
+    exec(compile(source, "<generated>", "exec"), namespace)
+    return namespace["Submissions"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    request = httpx.Request("PUT", "https://canvas.example.com/")
+    canned = httpx.Response(200, json={"id": 1, "grade": "A"}, request=request)
+    session = CanvasSession("https://canvas.example.com", "token")
+    session._send = lambda method, url, **kwargs: canned
+
+    calls = {}
+    for label, plans in (("classic", False), ("plans", True)):
+        api = load(plans)(session)
+        calls[label] = partial(
+            api.grade_submission,
+            1,
+            2,
+            3,
+            comment_text_comment="ok",
+            submission_posted_grade="A",
+            as_user_id=3,
+            no_data=True,
+        )
+
+    # Interleave the runs and keep the best of each so machine noise affects both alike
+    number = max(1, args.calls // args.repeat)
+    best = dict.fromkeys(calls, float("inf"))
+    for _ in range(args.repeat):
+        for label, call in calls.items():
+            best[label] = min(best[label], timeit.timeit(call, number=number))
+    for label, elapsed in best.items():
+        print(f"{label:8} {elapsed / number * 1e6:7.2f} µs/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Cost of archiving a paginated collection: decode and re-serialise vs ``raw=True``.
+
+Serves ``--pages`` pages of ``--items`` submission-like objects from a mock
+transport and writes every page to a temporary file three ways: decoded with
+``response.json()`` and re-encoded, decoded with a ``json_loads`` hook (orjson
+when installed, else ``json.loads``) and re-encoded, and as raw page bodies.
+
+    python benchmarks/response_decoding.py --pages 50 --items 100
+"""
+
+import argparse
+import json
+import tempfile
+import time
+
+import httpx
+
+from canopy import CanvasSession
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def page_body(page: int, items: int) -> bytes:
+    return json.dumps(
+        [
+            {
+                "id": page * items + i,
+                "user_id": i,
+                "score": 9.5,
+                "workflow_state": "graded",
+                "submission_comments": [{"id": i, "comment": "Nice work " * 8}] * 3,
+                "rubric_assessment": {f"_{n}": {"points": n, "comments": ""} for n in range(8)},
+            }
+            for i in range(items)
+        ]
+    ).encode()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    bodies = [page_body(n, args.items) for n in range(args.pages)]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        n = int(request.url.params.get("page", "0"))
+        headers = {}
+        if n + 1 < args.pages:
+            headers["Link"] = f'<https://canvas.example.com/api/v1/subs?page={n + 1}>; rel="next"'
+        return httpx.Response(200, content=bodies[n], headers=headers)
+
+    loads = orjson.loads if orjson is not None else json.loads
+    dumps = orjson.dumps if orjson is not None else (lambda obj: json.dumps(obj).encode())
+    modes = {
+        "response.json()": ({}, False),
+        f"{loads.__module__}.loads": ({"json_loads": loads}, False),
+        "raw=True": ({}, True),
+    }
+    print(f"{args.pages} pages, {sum(map(len, bodies)) / 1e6:.1f} MB")
+    for label, (options, raw) in modes.items():
+        session = CanvasSession(
+            "https://canvas.example.com",
+            "token",
+            rate_limit=False,
+            transport=httpx.MockTransport(handler),
+            **options,
+        )
+        best = float("inf")
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            with tempfile.TemporaryFile() as f:
+                for page in session.iter_pages("/api/v1/subs", raw=raw):
+                    f.write(page if raw else dumps(page))
+            best = min(best, time.perf_counter() - start)
+        print(f"  {label:18} {best * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Async fan-out throughput for different CanvasSession transport settings.
+
+Starts a local HTTP/1.1 server in a child process that answers every request
+after ``--latency`` seconds and holds each new connection for ``--handshake``
+seconds first (the TCP/TLS setup a real Canvas connection costs). Each session
+fetches ``--requests`` distinct paths with ``session.amap`` at
+``--concurrency``: once untimed to warm its pool, then ``--rounds`` timed
+rounds. Reported per pool setting: median requests per second over the timed
+rounds and how many new connections each timed round had to open.
+
+    python benchmarks/transport_throughput.py --requests 300 --concurrency 30
+
+HTTP/2 cannot be exercised against the local server. To compare it against a
+real instance, pass ``--url`` and ``--token`` (requires ``canopy[http2]``); the
+same GET is then issued ``--requests`` times with and without HTTP/2.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import statistics
+import time
+
+from canopy import CanvasSession
+
+BODY = b'{"id": 1, "name": "Course"}'
+
+
+def serve(latency: float, handshake: float, port, connections) -> None:
+    """Child process: count connections and answer each request after *latency* seconds."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        with connections.get_lock():
+            connections.value += 1
+        try:
+            await asyncio.sleep(handshake)
+            while await reader.readuntil(b"\r\n\r\n"):
+                await asyncio.sleep(latency)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    b"Content-Length: %d\r\n\r\n%s" % (len(BODY), BODY)
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    async def main() -> None:
+        server = await asyncio.start_server(handle, "127.0.0.1", 0, backlog=4096)
+        port.value = server.sockets[0].getsockname()[1]
+        await server.serve_forever()
+
+    asyncio.run(main())
+
+
+async def run(
+    session: CanvasSession, paths: list[str], args: argparse.Namespace, connections=None
+) -> float:
+    """Warm *session*'s pool with one pass over *paths*, then return the median of ``--rounds``."""
+
+    def get(path: str):
+        return session.async_get(path, single_item=True)
+
+    async with session:
+        await session.amap(get, paths, args.concurrency, return_exceptions=False)
+        if connections is not None:
+            connections.value = 0
+        times = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            await session.amap(get, paths, args.concurrency, return_exceptions=False)
+            times.append(time.perf_counter() - start)
+        return statistics.median(times)
+
+
+async def local(port: int, connections, args: argparse.Namespace) -> None:
+    configs = {
+        "max_connections=10": {"max_connections": 10},
+        "defaults (100, 20 kept alive)": {},
+        f"max_keepalive_connections={args.concurrency}": {
+            "max_keepalive_connections": args.concurrency
+        },
+        "no keep-alive": {"max_keepalive_connections": 0},
+    }
+    print(
+        f"{args.requests} GETs, {args.concurrency} in flight, {args.rounds} rounds, "
+        f"{args.latency * 1000:.0f} ms latency, {args.handshake * 1000:.0f} ms per new connection"
+    )
+    # Distinct paths so nothing is coalesced
+    paths = [f"/api/v1/courses/{i}" for i in range(args.requests)]
+    for label, options in configs.items():
+        session = CanvasSession(
+            f"http://127.0.0.1:{port}",
+            "token",
+            rate_limit=False,
+            timeout=60.0,
+            **options,
+        )
+        elapsed = await run(session, paths, args, connections)
+        print(
+            f"  {label:32} {args.requests / elapsed:6.0f} req/s"
+            f"  {connections.value / args.rounds:5.0f} new connections/round"
+        )
+
+
+async def remote(args: argparse.Namespace) -> None:
+    print(f"{args.requests} GETs of {args.path}, {args.concurrency} in flight")
+    for http2 in (False, True):
+        session = CanvasSession(
+            args.url,
+            args.token,
+            coalesce_requests=False,
+            http2=http2,
+            max_keepalive_connections=args.concurrency,
+            timeout=60.0,
+        )
+        elapsed = await run(session, [args.path] * args.requests, args)
+        print(f"  http2={http2!s:5} {args.requests / elapsed:8.1f} req/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=30)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.25, help="seconds per request")
+    parser.add_argument(
+        "--handshake", type=float, default=0.15, help="seconds to set up each connection"
+    )
+    parser.add_argument("--url", help="Canvas instance to compare HTTP/1.1 and HTTP/2 against")
+    parser.add_argument("--token")
+    parser.add_argument("--path", default="/api/v1/users/self")
+    args = parser.parse_args()
+    if args.url:
+        asyncio.run(remote(args))
+        return
+    port = multiprocessing.Value("i", 0)
+    connections = multiprocessing.Value("i", 0)
+    server = multiprocessing.Process(
+        target=serve, args=(args.latency, args.handshake, port, connections), daemon=True
+    )
+    server.start()
+    try:
+        while not port.value:
+            time.sleep(0.01)
+        asyncio.run(local(port.value, connections, args))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
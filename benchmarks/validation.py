@@ -0,0 +1,98 @@
+"""Per-call cost of client-side validation under each session ``validation`` policy.
+
+Renders an operation with enum and DateTime parameters as a classic and a
+``--plans`` module, then calls it ``--calls`` times with valid values against
+a session whose network layer returns a canned response, once per policy.
+
+    python benchmarks/validation.py --calls 50000
+"""
+
+import argparse
+import timeit
+from functools import partial
+
+import httpx
+
+from canopy import CanvasSession
+from canopy.scripts.canvas_api_builder import get_jinja_env
+
+SORTS = ["name", "sis_course_id", "teacher", "account_name", "created_at", "updated_at"]
+STATES = ["created", "claimed", "available", "completed", "deleted", "all"]
+
+SPEC = {
+    "apiVersion": "1.0",
+    "apis": [
+        {
+            "path": "/v1/accounts/{account_id}/courses",
+            "operations": [
+                {
+                    "nickname": "list_active_courses_in_account",
+                    "summary": "List active courses in an account",
+                    "notes": "",
+                    "method": "GET",
+                    "type": "array",
+                    "parameters": [
+                        {"name": "account_id", "paramType": "path", "required": True},
+                        {"name": "sort", "paramType": "query", "type": "string", "enum": SORTS},
+                        {"name": "order", "paramType": "query", "enum": ["asc", "desc"]},
+                        {"name": "state", "paramType": "query", "type": "array", "enum": STATES},
+                        {"name": "starts_before", "paramType": "query", "type": "DateTime"},
+                        {"name": "ends_after", "paramType": "query", "type": "DateTime"},
+                    ],
+                }
+            ],
+        }
+    ],
+}
+
+
+def load(plans: bool):
+    source = (
+        get_jinja_env()
+        .get_template("canopy_api.py.jinja2")
+        .render(spec=SPEC, api_name="Courses", api_file_name="courses", plans=plans)
+    )
+    namespace: dict = {}
+    exec(compile(source, "<generated>", "exec"), namespace)
+    return namespace["Courses"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    request = httpx.Request("GET", "https://canvas.example.com/")
+    canned = httpx.Response(200, json=[], request=request)
+
+    calls = {}
+    for policy in ("strict", "warn", "off"):
+        session = CanvasSession("https://canvas.example.com", "token", validation=policy)
+        session._send = lambda method, url, **kwargs: canned
+        for label, plans in (("classic", False), ("plans", True)):
+            api = load(plans)(session)
+            calls[f"{label} {policy}"] = partial(
+                api.list_active_courses_in_account,
+                1,
+                sort="teacher",
+                order="desc",
+                state=["available", "completed"],
+                starts_before="2024-06-01T00:00:00Z",
+                ends_after="2024-01-01T00:00:00Z",
+                no_data=True,
+                per_page=50,
+            )
+
+    # Interleave the runs and keep the best of each so machine noise affects both alike
+    number = max(1, args.calls // args.repeat)
+    best = dict.fromkeys(calls, float("inf"))
+    for _ in range(args.repeat):
+        for label, call in calls.items():
+            best[label] = min(best[label], timeit.timeit(call, number=number))
+    for label, elapsed in best.items():
+        print(f"{label:15} {elapsed / number * 1e6:7.2f} µs/call")
+
+
+if __name__ == "__main__":
+    main()
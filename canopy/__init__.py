@@ -1,2 +1,17 @@
+from .canopy import AdaptiveConcurrency as AdaptiveConcurrency
+from .canopy import CacheBackend as CacheBackend
+from .canopy import CacheEntry as CacheEntry
 from .canopy import CanvasAPIError as CanvasAPIError
 from .canopy import CanvasSession as CanvasSession
+from .canopy import DecodeOffload as DecodeOffload
+from .canopy import EntityCache as EntityCache
+from .canopy import FileCacheBackend as FileCacheBackend
+from .canopy import HTTPCache as HTTPCache
+from .canopy import MemoryCacheBackend as MemoryCacheBackend
+from .canopy import RateLimitPacer as RateLimitPacer
+from .canopy import RequestPlan as RequestPlan
+from .canopy import RetryPolicy as RetryPolicy
+from .canopy import SingleFlight as SingleFlight
+from .canopy import SQLiteCacheBackend as SQLiteCacheBackend
+from .dynamic import DynamicCanvasClient as DynamicCanvasClient
+from .routes import RouteIndex as RouteIndex
@@ -1,9 +1,33 @@
+import asyncio
+import copy
+import email.utils
+import fnmatch
+import hashlib
+import importlib.util
 import json
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import threading
+import time
 import urllib.parse
-from typing import Any
+import zlib
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable, Iterator, Mapping
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Protocol
 
+import anyio
+import anyio.to_process
+import anyio.to_thread
 import httpx
 
+from .helpers import VALIDATION_POLICIES, _validate_enum, coerce_to_iso8601
+
 
 class CanvasAPIError(Exception):
     def __init__(self, response: httpx.Response) -> None:
@@ -22,28 +46,1046 @@ class CanvasAPIError(Exception):
         return json.dumps({"status_code": self.status_code, "content": self.content})
 
 
+class RateLimitPacer:
+    """Client-side model of the Canvas leaky-bucket throttle.
+
+    Canvas reports the quota left for a token in ``X-Rate-Limit-Remaining`` and
+    what each request cost in ``X-Request-Cost``; the bucket refills at roughly
+    ``leak_rate`` units per second. The pacer tracks both headers and, once the
+    projected quota (minus the estimated cost of requests still in flight) drops
+    below ``threshold``, delays new requests until enough has leaked back.
+
+    One pacer is shared by the sync and async clients of a session and is safe
+    to use from several threads.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 100.0,
+        leak_rate: float = 10.0,
+        max_delay: float = 30.0,
+    ) -> None:
+        self.threshold = threshold
+        self.leak_rate = leak_rate
+        self.max_delay = max_delay
+        self.remaining: float | None = None
+        self.cost = 1.0
+        self._in_flight = 0
+        self._updated = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Register a request about to be sent; return how long to wait before sending it."""
+        with self._lock:
+            self._in_flight += 1
+            if self.remaining is None:
+                return 0.0
+            leaked = (time.monotonic() - self._updated) * self.leak_rate
+            projected = self.remaining + leaked - self._in_flight * self.cost
+            if projected >= self.threshold:
+                return 0.0
+            return min(self.max_delay, (self.threshold - projected) / self.leak_rate)
+
+    def release(self, response: httpx.Response | None) -> None:
+        """Record the outcome of a request registered with :meth:`acquire`."""
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            if response is None:
+                return
+            remaining = _header_float(response, "X-Rate-Limit-Remaining")
+            cost = _header_float(response, "X-Request-Cost")
+            if remaining is not None:
+                self.remaining = remaining
+                self._updated = time.monotonic()
+            if cost is not None:
+                self.cost = 0.8 * self.cost + 0.2 * cost
+
+
+class RetryPolicy:
+    """Decides whether a failed request is retried and how long to wait first.
+
+    Throttled responses (429, or 403 "Rate Limit Exceeded"), the statuses in
+    ``retry_statuses`` and transport errors such as connection resets are
+    retried up to ``max_retries`` times with exponential backoff and jitter. A
+    ``Retry-After`` header, when present, takes precedence over the computed
+    delay. Idempotent methods are retried; POST and PATCH only when
+    ``retry_post`` is set.
+    """
+
+    IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 60.0,
+        retry_statuses: frozenset[int] = frozenset({429, 502, 503, 504}),
+        retry_post: bool = False,
+    ) -> None:
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_statuses = frozenset(retry_statuses)
+        self.retry_post = retry_post
+
+    def should_retry(
+        self, method: str, attempt: int, response: httpx.Response | None = None
+    ) -> bool:
+        """Return whether attempt number *attempt* (0-based) may be retried.
+
+        *response* is None when the attempt failed with a transport error.
+        """
+        if attempt >= self.max_retries:
+            return False
+        if method.upper() not in self.IDEMPOTENT_METHODS and not self.retry_post:
+            return False
+        if response is None:
+            return True
+        return response.status_code in self.retry_statuses or _is_throttled(response)
+
+    def backoff(self, attempt: int, response: httpx.Response | None = None) -> float:
+        """Return the number of seconds to wait before retrying attempt *attempt*."""
+        if response is not None:
+            retry_after = _retry_after(response)
+            if retry_after is not None:
+                return min(self.max_backoff, retry_after)
+        delay = min(self.max_backoff, self.backoff_factor * 2**attempt)
+        return random.uniform(delay / 2, delay)
+
+
+class AdaptiveConcurrency:
+    """AIMD limit on the number of async requests a session has in flight.
+
+    While responses come back quickly and ``X-Rate-Limit-Remaining`` stays above
+    ``remaining_threshold``, the limit grows additively (about one slot per
+    ``limit`` completed requests, up to ``max_limit``). A throttled response, a
+    low remaining quota, or a latency above ``latency_tolerance`` times the
+    smoothed baseline multiplies it by ``backoff`` (down to ``min_limit``). Only
+    requests sent after the last cut can trigger another one, so a burst of
+    slow responses counts as a single congestion signal.
+
+    The current limit is available as :attr:`limit`. It applies to every
+    request made through one event loop, so it is not thread-safe.
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff: float = 0.5,
+        latency_tolerance: float = 2.0,
+        remaining_threshold: float = 150.0,
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.remaining_threshold = remaining_threshold
+        self.baseline: float | None = None
+        self.in_flight = 0
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._last_cut = 0.0
+        self._waiters: deque[anyio.Event] = deque()
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    async def acquire(self) -> float:
+        """Wait for a free slot; return the monotonic time the slot was granted."""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return time.monotonic()
+        event = anyio.Event()
+        self._waiters.append(event)
+        try:
+            await event.wait()
+        except BaseException:
+            if event.is_set():
+                # The slot was handed over just as we were cancelled: pass it on.
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self._waiters.remove(event)
+            raise
+        return time.monotonic()
+
+    def release(self, response: httpx.Response | None, started: float) -> None:
+        """Free the slot taken at *started* and adjust the limit from *response*.
+
+        *response* is None when the request failed with a transport error, which
+        leaves the limit unchanged.
+        """
+        self.in_flight = max(0, self.in_flight - 1)
+        if response is not None:
+            self._adjust(response, started)
+        self._wake()
+
+    def _adjust(self, response: httpx.Response, started: float) -> None:
+        now = time.monotonic()
+        latency = now - started
+        remaining = _header_float(response, "X-Rate-Limit-Remaining")
+        congested = (
+            response.status_code == 429
+            or _is_throttled(response)
+            or (remaining is not None and remaining < self.remaining_threshold)
+            or (self.baseline is not None and latency > self.latency_tolerance * self.baseline)
+        )
+        self.baseline = latency if self.baseline is None else 0.9 * self.baseline + 0.1 * latency
+        if not congested:
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+        elif started >= self._last_cut:
+            self._limit = max(float(self.min_limit), self._limit * self.backoff)
+            self._last_cut = now
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < self.limit:
+            self.in_flight += 1
+            self._waiters.popleft().set()
+
+
+class DecodeOffload:
+    """Decode large async response bodies away from the event loop thread.
+
+    Bodies of at least ``threshold`` bytes are parsed in a worker thread
+    (``executor="thread"``) or worker process (``"process"``); smaller ones are
+    decoded inline, where the hand-off would cost more than the parse. At most
+    ``max_workers`` bodies are decoded off the loop at once.
+
+    CPython's ``json`` and ``orjson`` hold the GIL while they parse, so a
+    thread mostly keeps the loop's I/O callbacks interleaved with a long
+    decode; ``"process"`` takes the parse off the loop entirely at the cost of
+    pickling the result back, and needs a picklable ``json_loads``.
+    """
+
+    def __init__(
+        self, threshold: int = 256 * 1024, executor: str = "thread", max_workers: int = 4
+    ) -> None:
+        if executor not in ("thread", "process"):
+            raise ValueError(f"executor must be 'thread' or 'process', not {executor!r}")
+        self.threshold = threshold
+        self.executor = executor
+        self.max_workers = max_workers
+        self._limiter: anyio.CapacityLimiter | None = None
+
+    async def decode(self, body: bytes, loads: Callable[[bytes], Any]) -> Any:
+        """Run ``loads(body)`` inline, or in a worker when *body* reaches the threshold."""
+        if len(body) < self.threshold:
+            return loads(body)
+        if self._limiter is None:
+            self._limiter = anyio.CapacityLimiter(self.max_workers)
+        if self.executor == "process":
+            return await anyio.to_process.run_sync(loads, body, limiter=self._limiter)
+        return await anyio.to_thread.run_sync(loads, body, limiter=self._limiter)
+
+
+class CacheEntry:
+    """A stored response: status, headers and body, plus when it was stored."""
+
+    __slots__ = ("status_code", "headers", "content", "stored_at")
+
+    def __init__(
+        self,
+        status_code: int,
+        headers: list[tuple[str, str]],
+        content: bytes,
+        stored_at: float | None = None,
+    ) -> None:
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.stored_at = time.time() if stored_at is None else stored_at
+
+    @classmethod
+    def from_response(cls, response: httpx.Response) -> "CacheEntry":
+        return cls(response.status_code, response.headers.multi_items(), response.content)
+
+    def header(self, name: str) -> str | None:
+        name = name.lower()
+        for key, value in self.headers:
+            if key.lower() == name:
+                return value
+        return None
+
+    def to_response(self, request: httpx.Request | None = None) -> httpx.Response:
+        """Rebuild an ``httpx.Response`` equivalent to the one that was stored."""
+        return httpx.Response(
+            self.status_code,
+            headers=self.headers,
+            content=self.content,
+            request=request,
+            extensions={"canopy_cache": "hit"},
+        )
+
+
+class CacheBackend(Protocol):
+    """Storage used by :class:`HTTPCache`."""
+
+    def get(self, key: str) -> CacheEntry | None: ...
+
+    def set(self, key: str, entry: CacheEntry) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def clear(self) -> None: ...
+
+
+class MemoryCacheBackend:
+    """Bounded in-memory LRU store for :class:`HTTPCache`."""
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class FileCacheBackend:
+    """On-disk store for :class:`HTTPCache`, one file per entry.
+
+    Each file holds a JSON header line (status, headers, stored_at) followed by
+    the raw body. Files are written atomically, so several processes may share
+    one directory.
+    """
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.cache"
+
+    def get(self, key: str) -> CacheEntry | None:
+        try:
+            raw = self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+        header, _, content = raw.partition(b"\n")
+        try:
+            meta = json.loads(header)
+        except ValueError:
+            return None
+        headers = [(k, v) for k, v in meta["headers"]]
+        return CacheEntry(meta["status_code"], headers, content, meta["stored_at"])
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        meta = {
+            "status_code": entry.status_code,
+            "headers": entry.headers,
+            "stored_at": entry.stored_at,
+        }
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(json.dumps(meta).encode() + b"\n" + entry.content)
+        os.replace(tmp, self._path(key))
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.cache"):
+            path.unlink(missing_ok=True)
+
+
+class SQLiteCacheBackend:
+    """Persistent store for :class:`HTTPCache` in a single SQLite file.
+
+    Bodies are zlib-compressed. When the stored bodies exceed ``max_size``
+    bytes, the least recently used entries are evicted. The database runs in
+    WAL mode with a busy timeout, so several worker processes (and threads, each
+    with its own connection) can share one file.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_size: int = 256 * 1024 * 1024,
+        compress_level: int = 6,
+        timeout: float = 30.0,
+    ) -> None:
+        self.path = Path(path)
+        self.max_size = max_size
+        self.compress_level = compress_level
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " status_code INTEGER NOT NULL,"
+                " headers TEXT NOT NULL,"
+                " body BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " stored_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> CacheEntry | None:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT status_code, headers, body, stored_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        with conn:
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        status_code, headers, body, stored_at = row
+        content = zlib.decompress(body)
+        return CacheEntry(status_code, [(k, v) for k, v in json.loads(headers)], content, stored_at)
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        body = zlib.compress(entry.content, self.compress_level)
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    entry.status_code,
+                    json.dumps(entry.headers),
+                    body,
+                    len(body),
+                    entry.stored_at,
+                    time.time(),
+                ),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        (total,) = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if total <= self.max_size:
+            return
+        excess = total - self.max_size
+        freed = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def delete(self, key: str) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def __len__(self) -> int:
+        (count,) = self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()
+        return count
+
+
+class HTTPCache:
+    """Conditional-GET cache for :class:`CanvasSession`.
+
+    Responses carrying an ``ETag`` or ``Last-Modified`` validator are stored in
+    *backend* (an in-memory LRU by default). Later GETs of the same URL send
+    ``If-None-Match`` / ``If-Modified-Since``, and a ``304 Not Modified`` reply is
+    answered from the stored body, so an unchanged resource costs a header
+    exchange instead of a full download.
+
+    ``ttl_rules`` maps ``fnmatch`` patterns on the request path to a number of
+    seconds during which a stored response is served without contacting Canvas
+    at all (e.g. ``{"/api/v1/accounts/*/terms": 86400}``); the first matching
+    pattern wins and ``default_ttl`` applies otherwise. Responses stored under a
+    TTL rule are cached even without validators.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend | None = None,
+        ttl_rules: dict[str, float] | None = None,
+        default_ttl: float = 0.0,
+    ) -> None:
+        self.backend: CacheBackend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl_rules = dict(ttl_rules or {})
+        self.default_ttl = default_ttl
+
+    def key(self, url: str, params: Any, token: str) -> str:
+        """Cache key for a GET of *url* with *params* made with *token*.
+
+        Query parameters from the URL and *params* are merged and sorted by name,
+        so equivalent requests share a key whatever order they were built in.
+        """
+        return _request_key("GET", url, params, token)
+
+    def ttl_for(self, url: str) -> float:
+        path = httpx.URL(url).path
+        for pattern, ttl in self.ttl_rules.items():
+            if fnmatch.fnmatchcase(path, pattern):
+                return ttl
+        return self.default_ttl
+
+    def is_fresh(self, entry: CacheEntry, url: str) -> bool:
+        """True when *entry* may be served for *url* without revalidation."""
+        return time.time() - entry.stored_at < self.ttl_for(url)
+
+    def validators(self, entry: CacheEntry) -> dict[str, str]:
+        """Conditional request headers for revalidating *entry*."""
+        headers = {}
+        etag = entry.header("ETag")
+        if etag:
+            headers["If-None-Match"] = etag
+        last_modified = entry.header("Last-Modified")
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def resolve(
+        self, key: str, entry: CacheEntry | None, response: httpx.Response, url: str
+    ) -> httpx.Response:
+        """Turn a 304 into the cached response, and store new cacheable responses."""
+        if response.status_code == 304 and entry is not None:
+            entry.stored_at = time.time()
+            self.backend.set(key, entry)
+            return entry.to_response(response.request)
+        if response.status_code == 200 and _is_cacheable(response, self.ttl_for(url)):
+            self.backend.set(key, CacheEntry.from_response(response))
+        return response
+
+
+class EntityCache:
+    """TTL + LRU memo of decoded single-object GET results.
+
+    Entries are keyed on the request path, the query parameters (which carry
+    ``as_user_id``) and the ``data_key`` extracted from the body, and are fresh
+    for ``ttl`` seconds. For a further ``stale_ttl`` seconds a stale entry is
+    still served while it is refreshed in the background. Any PUT/POST/DELETE
+    to the same path drops its entries. Values are copied on the way in and
+    out, so callers may mutate what they get.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 1024, stale_ttl: float = 0.0) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self._entries: OrderedDict[tuple[str, str], tuple[float, Any]] = OrderedDict()
+        self._paths: dict[str, set[tuple[str, str]]] = {}
+        self._refreshing: set[tuple[str, str]] = set()
+        self._lock = threading.Lock()
+
+    def key(
+        self, uri: str, params: dict[str, Any] | None, data_key: str | None = None
+    ) -> tuple[str, str]:
+        # The same path read with a different data_key caches a different value
+        return httpx.URL(uri).path, json.dumps(
+            [data_key, params or {}], sort_keys=True, default=str
+        )
+
+    def lookup(self, key: tuple[str, str]) -> tuple[Any, bool] | None:
+        """Return ``(value, is_fresh)`` for *key*, or None when missing or expired."""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            age = time.monotonic() - item[0]
+            if age > self.ttl + self.stale_ttl:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(item[1]), age <= self.ttl
+
+    def store(self, key: tuple[str, str], value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), copy.deepcopy(value))
+            self._entries.move_to_end(key)
+            self._paths.setdefault(key[0], set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, uri: str) -> None:
+        """Drop every entry for the path of *uri*."""
+        with self._lock:
+            for key in self._paths.pop(httpx.URL(uri).path, set()):
+                self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._paths.clear()
+
+    def begin_refresh(self, key: tuple[str, str]) -> bool:
+        """Claim the background refresh of *key*; False if one is already running."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key: tuple[str, str]) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def _remove(self, key: tuple[str, str]) -> None:
+        self._entries.pop(key, None)
+        keys = self._paths.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._paths[key[0]]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _request_key(method: str, url: str, params: Any, token: str) -> str:
+    """Stable hash identifying a request by method, URL, sorted params and token."""
+    parsed = httpx.URL(url)
+    items = [*parsed.params.multi_items(), *httpx.QueryParams(params or {}).multi_items()]
+    query = urllib.parse.urlencode(sorted(items, key=itemgetter(0)))
+    target = f"{method} {parsed.copy_with(query=None)}?{query}"
+    return hashlib.sha256(f"{token}\0{target}".encode()).hexdigest()
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """Coalesces identical in-flight calls so only the first one does the work.
+
+    Callers arriving with the same key while a call is running wait for it and
+    receive its result (or exception) instead of starting their own. Threads use
+    :meth:`do`; asyncio tasks use :meth:`ado`.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[str, _Call] = {}
+        self._futures: dict[str, asyncio.Future[Any]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Any) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    async def ado(self, key: str, fn: Any) -> Any:
+        while True:
+            future = self._futures.get(key)
+            if future is None:
+                break
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The leader was cancelled rather than us: take over the call.
+                if not future.cancelled() or _current_task_cancelling():
+                    raise
+        future = self._futures[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody was waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._futures[key]
+
+
+def _current_task_cancelling() -> bool:
+    task = asyncio.current_task()
+    return task is not None and task.cancelling() > 0
+
+
+def _is_cacheable(response: httpx.Response, ttl: float) -> bool:
+    if "no-store" in response.headers.get("Cache-Control", ""):
+        return False
+    return ttl > 0 or "ETag" in response.headers or "Last-Modified" in response.headers
+
+
+def _is_throttled(response: httpx.Response) -> bool:
+    return response.status_code == 403 and "Rate Limit Exceeded" in response.text
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    value = response.headers.get("Retry-After")
+    if not isinstance(value, str):
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def _header_float(response: httpx.Response, name: str) -> float | None:
+    value = response.headers.get(name)
+    if not isinstance(value, str):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _asyncio_running() -> bool:
+    """True when called from an asyncio event loop (as opposed to e.g. trio)."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+# How many items (as a multiple of the concurrency) may be started ahead of the
+# oldest unfinished one, so a slow item does not stall the others
+_REORDER_WINDOW = 16
+
+
+def _ordered_futures(
+    fn: Callable[[Any], Any], items: Iterable[Any], width: int
+) -> Iterator[Future[Any]]:
+    """Run *fn* over *items* on a thread pool, at most *width* at a time.
+
+    Yields the futures in input order. A call that finishes frees its slot for
+    the next item even while an earlier one is still running, and its result
+    waits its turn in a reorder buffer; at most ``_REORDER_WINDOW * width``
+    items are held at once. Items are consumed lazily and pending work is
+    cancelled if the consumer stops early.
+    """
+    items = iter(items)
+    limit = _REORDER_WINDOW * width
+    with ThreadPoolExecutor(max_workers=width) as pool:
+        # Submitted but not yet yielded, in input order; *running* is the unfinished subset
+        pending: deque[Future[Any]] = deque()
+        running: set[Future[Any]] = set()
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(running) < width and len(pending) < limit:
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    future = pool.submit(fn, item)
+                    pending.append(future)
+                    running.add(future)
+                if not pending:
+                    return
+                if pending[0] in running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    running -= done
+                    continue
+                yield pending.popleft()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+async def _ordered_tasks(
+    fn: Callable[[Any], Awaitable[Any]], items: Iterable[Any], width: int
+) -> AsyncIterator[asyncio.Task[Any]]:
+    """Asyncio counterpart of :func:`_ordered_futures`; yields finished tasks in input order."""
+    items = iter(items)
+    limit = _REORDER_WINDOW * width
+    pending: deque[asyncio.Task[Any]] = deque()
+    running: set[asyncio.Task[Any]] = set()
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(running) < width and len(pending) < limit:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                task = asyncio.ensure_future(fn(item))
+                pending.append(task)
+                running.add(task)
+            if not pending:
+                return
+            if pending[0] in running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                running -= done
+                continue
+            yield pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _apply(func: Callable[..., Any], args: Any) -> Any:
+    """Call *func* with one argument set: a mapping of kwargs, a tuple of args, or one arg."""
+    if isinstance(args, Mapping):
+        return func(**args)
+    if isinstance(args, tuple):
+        return func(*args)
+    return func(args)
+
+
+_PATH_PARAM = re.compile(r"\{([^{}]+)\}")
+
+
+def _page_number(url: str) -> int | None:
+    page = httpx.URL(url).params.get("page")
+    return int(page) if page is not None and page.isdigit() else None
+
+
+class RequestPlan:
+    """Precomputed description of one API operation, emitted by ``canopy_build --plans``.
+
+    *fields* lists the operation's parameters in the order their values are
+    passed to :meth:`CanvasSession.dispatch`, each as ``(wire_name, location,
+    enum, is_datetime, required)``: *location* is ``"path"``, ``"query"`` or
+    ``"form"`` and *enum* a frozenset of accepted values or None. *mode* is the
+    response handling: ``"single"``, ``"all_pages"``, ``"poly"`` or ``"plain"``.
+
+    On first use the table is compiled (the way ``dataclasses`` builds its
+    methods) into a straight-line function that validates the values and builds
+    the URI, query params and form data without looping over the table. One
+    function is compiled per validation policy; under ``"off"`` the enum checks
+    are left out entirely.
+    """
+
+    __slots__ = (
+        "method",
+        "path",
+        "fields",
+        "mode",
+        "single_item",
+        "all_pages",
+        "poly_response",
+        "_binders",
+    )
+
+    def __init__(
+        self,
+        method: str,
+        path: str,
+        fields: tuple[tuple[str, str, frozenset[str] | None, bool, bool], ...] = (),
+        mode: str = "plain",
+    ) -> None:
+        self.method = method
+        self.path = path
+        self.fields = fields
+        self.mode = mode
+        self.single_item = mode == "single"
+        self.all_pages = mode == "all_pages"
+        self.poly_response = mode == "poly"
+        self._binders: dict[str, Callable[..., tuple[str, dict[str, Any], dict[str, Any]]]] = {}
+
+    def bind(
+        self, values: tuple[Any, ...], validation: str = "strict"
+    ) -> tuple[str, dict[str, Any], dict[str, Any]]:
+        """Validate *values* under *validation* and return the request's ``(uri, params, data)``."""
+        binder = self._binders.get(validation)
+        if binder is None:
+            binder = self._binders[validation] = self._compile(validation)
+        return binder(*values)
+
+    def _compile(
+        self, validation: str = "strict"
+    ) -> Callable[..., tuple[str, dict[str, Any], dict[str, Any]]]:
+        names = [f"v{i}" for i in range(len(self.fields))]
+        namespace: dict[str, Any] = {
+            "_validate_enum": _validate_enum,
+            "coerce_to_iso8601": coerce_to_iso8601,
+            "validation": validation,
+        }
+        body = []
+        path_args = {}
+        collections: dict[str, list[str]] = {"query": [], "form": []}
+        for var, (name, location, enum, is_datetime, required) in zip(
+            names, self.fields, strict=True
+        ):
+            guard = "" if required else f"if {var} is not None: "
+            if enum is not None and validation != "off":
+                namespace[f"{var}_enum"] = enum
+                # A valid string costs one set lookup; anything else goes to the full check
+                check = f"{var}.__class__ is not str or {var} not in {var}_enum"
+                if not required:
+                    check = f"{var} is not None and ({check})"
+                body.append(f"if {check}: _validate_enum({var}, {var}_enum, validation)")
+            if is_datetime:
+                body.append(f"{guard}{var} = coerce_to_iso8601({var}, validation)")
+            if location == "path":
+                path_args[name] = var
+            else:
+                collections[location].append(f"{guard}{location}[{name!r}] = {var}")
+        placeholders = [m.group(1) for m in _PATH_PARAM.finditer(self.path)]
+        if any(name in path_args for name in placeholders):
+            namespace["template"] = _PATH_PARAM.sub(
+                lambda m: "{}" if m.group(1) in path_args else m.group(0), self.path
+            )
+            args = ", ".join(path_args[name] for name in placeholders if name in path_args)
+            body.append(f"uri = template.format({args})")
+        else:
+            namespace["uri"] = self.path
+        for location, lines in collections.items():
+            body.append(f"{location} = {{}}")
+            body.extend(lines)
+        body.append("return uri, query, form")
+        source = f"def bind({', '.join(names)}):\n" + "".join(f"    {line}\n" for line in body)
+        exec(source, namespace)
+        return namespace["bind"]
+
+    def __repr__(self) -> str:
+        return f"RequestPlan({self.method!r}, {self.path!r}, mode={self.mode!r})"
+
+
 class CanvasSession:
     def __init__(
         self,
         instance_address: str,
         access_token: str,
         max_per_page: int = 100,
+        page_concurrency: int = 1,
+        rate_limit: RateLimitPacer | bool = True,
+        retry: RetryPolicy | bool = True,
+        http_cache: HTTPCache | None = None,
+        entity_cache: EntityCache | None = None,
+        coalesce_requests: bool = True,
+        adaptive_concurrency: AdaptiveConcurrency | bool = False,
+        http2: bool = False,
+        max_connections: int | None = 100,
+        max_keepalive_connections: int | None = 20,
+        keepalive_expiry: float | None = 5.0,
+        timeout: httpx.Timeout | float | None = 5.0,
+        transport: httpx.BaseTransport | None = None,
+        async_transport: httpx.AsyncBaseTransport | None = None,
+        validation: str = "strict",
+        json_loads: Callable[[bytes], Any] | None = None,
+        decode_offload: DecodeOffload | bool = False,
     ) -> None:
         self.instance_address = instance_address.rstrip("/")
         self.access_token = access_token
         self.max_per_page = max_per_page
+        # Pages fetched at once when a collection exposes numbered ``page=`` links
+        self.page_concurrency = max(1, page_concurrency)
+        if rate_limit is True:
+            rate_limit = RateLimitPacer()
+        self.pacer: RateLimitPacer | None = rate_limit or None
+        if retry is True:
+            retry = RetryPolicy()
+        self.retry: RetryPolicy | None = retry or None
+        self.http_cache = http_cache
+        self.entity_cache = entity_cache
+        # Identical GETs in flight at the same time share one network request
+        self.single_flight: SingleFlight | None = SingleFlight() if coalesce_requests else None
+        if adaptive_concurrency is True:
+            adaptive_concurrency = AdaptiveConcurrency()
+        # Caps concurrent async requests, growing and shrinking with Canvas' response
+        self.limiter: AdaptiveConcurrency | None = adaptive_concurrency or None
+        self._background_tasks: set[asyncio.Task[None]] = set()
+        if http2 and importlib.util.find_spec("h2") is None:
+            raise ImportError("http2=True requires the h2 package: install canopy[http2]")
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        # A float sets every phase; pass httpx.Timeout(connect=..., read=..., ...) for per-phase
+        self.timeout = timeout if isinstance(timeout, httpx.Timeout) else httpx.Timeout(timeout)
+        self.transport = transport
+        self.async_transport = async_transport
+        if validation not in VALIDATION_POLICIES:
+            raise ValueError(f"validation must be one of {VALIDATION_POLICIES}, not {validation!r}")
+        # Client-side enum and ISO 8601 checks: "strict" raises, "warn" warns, "off" skips them
+        self.validation = validation
+        # Decoder for response bodies (e.g. orjson.loads); None uses httpx's response.json()
+        self.json_loads = json_loads
+        if decode_offload is True:
+            decode_offload = DecodeOffload()
+        # Large async bodies are decoded in a worker so the event loop keeps serving I/O
+        self.decode_offload: DecodeOffload | None = decode_offload or None
         self._headers = {"Authorization": f"Bearer {self.access_token}"}
         self._sync_client: httpx.Client | None = None
         self._async_client: httpx.AsyncClient | None = None
 
     # ── Client properties (lazy init) ──────────────────────────────
 
+    def _client_options(self) -> dict[str, Any]:
+        return {
+            "base_url": self.instance_address,
+            "headers": self._headers,
+            "http2": self.http2,
+            "limits": self.limits,
+            "timeout": self.timeout,
+        }
+
     @property
     def session(self) -> httpx.Client:
         if self._sync_client is None:
             self._sync_client = httpx.Client(
-                base_url=self.instance_address,
-                headers=self._headers,
+                transport=self.transport,
+                **self._client_options(),
             )
         return self._sync_client
 
@@ -51,15 +1093,160 @@ class CanvasSession:
     def async_session(self) -> httpx.AsyncClient:
         if self._async_client is None:
             self._async_client = httpx.AsyncClient(
-                base_url=self.instance_address,
-                headers=self._headers,
+                transport=self.async_transport,
+                **self._client_options(),
             )
         return self._async_client
 
+    @property
+    def concurrency_limit(self) -> int | None:
+        """Current adaptive limit on concurrent async requests, or None when disabled."""
+        return None if self.limiter is None else self.limiter.limit
+
+    # ── Transport ───────────────────────────────────────────────────
+
+    def _send(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a request through the session's coalescing, cache, retry and pacing layers."""
+        flight = self.single_flight
+        if flight is None or method != "GET":
+            return self._send_cached(method, url, **kwargs)
+        key = _request_key(method, url, kwargs.get("params"), self.access_token)
+        return flight.do(key, lambda: self._send_cached(method, url, **kwargs))
+
+    async def _async_send(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        flight = self.single_flight
+        if flight is None or method != "GET" or not _asyncio_running():
+            return await self._async_send_cached(method, url, **kwargs)
+        key = _request_key(method, url, kwargs.get("params"), self.access_token)
+        return await flight.ado(key, lambda: self._async_send_cached(method, url, **kwargs))
+
+    def _send_cached(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        cache = self.http_cache
+        if cache is None or method != "GET":
+            return self._send_with_retry(method, url, **kwargs)
+        key = cache.key(url, kwargs.get("params"), self.access_token)
+        entry = cache.backend.get(key)
+        if entry is not None:
+            if cache.is_fresh(entry, url):
+                request = self.session.build_request(method, url, params=kwargs.get("params"))
+                return entry.to_response(request)
+            kwargs["headers"] = {**kwargs.get("headers", {}), **cache.validators(entry)}
+        return cache.resolve(key, entry, self._send_with_retry(method, url, **kwargs), url)
+
+    async def _async_send_cached(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        cache = self.http_cache
+        if cache is None or method != "GET":
+            return await self._async_send_with_retry(method, url, **kwargs)
+        key = cache.key(url, kwargs.get("params"), self.access_token)
+        entry = cache.backend.get(key)
+        if entry is not None:
+            if cache.is_fresh(entry, url):
+                request = self.async_session.build_request(method, url, params=kwargs.get("params"))
+                return entry.to_response(request)
+            kwargs["headers"] = {**kwargs.get("headers", {}), **cache.validators(entry)}
+        response = await self._async_send_with_retry(method, url, **kwargs)
+        return cache.resolve(key, entry, response, url)
+
+    def _send_with_retry(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a request, retrying transient failures according to the retry policy.
+
+        Each attempt is paced by the rate limiter. The final response is returned
+        whatever its status; raising is left to the caller.
+        """
+        attempt = 0
+        while True:
+            try:
+                response = self._transmit(method, url, **kwargs)
+            except httpx.TransportError:
+                if self.retry is None or not self.retry.should_retry(method, attempt):
+                    raise
+                delay = self.retry.backoff(attempt)
+            else:
+                if self.retry is None or not self.retry.should_retry(method, attempt, response):
+                    return response
+                delay = self.retry.backoff(attempt, response)
+            time.sleep(delay)
+            attempt += 1
+
+    async def _async_send_with_retry(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        attempt = 0
+        while True:
+            try:
+                response = await self._async_transmit(method, url, **kwargs)
+            except httpx.TransportError:
+                if self.retry is None or not self.retry.should_retry(method, attempt):
+                    raise
+                delay = self.retry.backoff(attempt)
+            else:
+                if self.retry is None or not self.retry.should_retry(method, attempt, response):
+                    return response
+                delay = self.retry.backoff(attempt, response)
+            await anyio.sleep(delay)
+            attempt += 1
+
+    def _transmit(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a single request, paced by the session's rate limiter."""
+        pacer = self.pacer
+        if pacer is None:
+            return self.session.request(method, url, **kwargs)
+        delay = pacer.acquire()
+        response = None
+        try:
+            if delay:
+                time.sleep(delay)
+            response = self.session.request(method, url, **kwargs)
+        finally:
+            pacer.release(response)
+        return response
+
+    async def _async_transmit(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        pacer = self.pacer
+        if pacer is None:
+            return await self._async_limited(method, url, **kwargs)
+        delay = pacer.acquire()
+        response = None
+        try:
+            if delay:
+                await anyio.sleep(delay)
+            response = await self._async_limited(method, url, **kwargs)
+        finally:
+            pacer.release(response)
+        return response
+
+    async def _async_limited(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Send a single async request within the adaptive concurrency limit."""
+        limiter = self.limiter
+        if limiter is None:
+            return await self.async_session.request(method, url, **kwargs)
+        started = await limiter.acquire()
+        response = None
+        try:
+            response = await self.async_session.request(method, url, **kwargs)
+        finally:
+            limiter.release(response, started)
+        return response
+
     # ── Pagination helpers ──────────────────────────────────────────
 
-    def _extract_data(self, response: httpx.Response, data_key: str | None = None) -> Any:
-        data = response.json()
+    def _decode(self, response: httpx.Response) -> Any:
+        """Parse *response*'s JSON body; every response is decoded at most once."""
+        loads = self.json_loads
+        if loads is None:
+            return response.json()
+        return loads(response.content)
+
+    async def _adecode(self, response: httpx.Response) -> Any:
+        offload = self.decode_offload
+        if offload is None:
+            return self._decode(response)
+        return await offload.decode(response.content, self.json_loads or json.loads)
+
+    def _extract_data(
+        self, response: httpx.Response, data_key: str | None = None, data: Any = None
+    ) -> Any:
+        """The list (or object, or its *data_key*) in a page; *data* is its body if decoded."""
+        if data is None:
+            data = self._decode(response)
         if isinstance(data, list):
             return data
         if isinstance(data, dict):
@@ -69,37 +1256,278 @@ class CanvasSession:
     def _next_url(self, response: httpx.Response) -> str | None:
         return response.links.get("next", {}).get("url")
 
-    def _depaginate(self, response: httpx.Response, data_key: str | None = None) -> list[Any]:
-        all_data: list[Any] = []
-        while True:
-            chunk = self._extract_data(response, data_key)
+    def _numbered_page_urls(self, response: httpx.Response) -> list[str] | None:
+        """Return the URLs of every remaining page, or None if they cannot be predicted.
+
+        Only possible when both the ``next`` and ``last`` links carry a numeric
+        ``page`` parameter; opaque bookmark cursors must be followed one by one.
+        """
+        next_url = response.links.get("next", {}).get("url")
+        last_url = response.links.get("last", {}).get("url")
+        if not next_url or not last_url:
+            return None
+        first = _page_number(next_url)
+        last = _page_number(last_url)
+        if first is None or last is None or last < first:
+            return None
+        url = httpx.URL(next_url)
+        return [str(url.copy_set_param("page", n)) for n in range(first, last + 1)]
+
+    def _fetch_page(self, url: str) -> httpx.Response:
+        try:
+            response = self._send("GET", url)
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise CanvasAPIError(e.response) from e
+        return response
+
+    async def _fetch_page_async(self, url: str) -> httpx.Response:
+        try:
+            response = await self._async_send("GET", url)
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise CanvasAPIError(e.response) from e
+        return response
+
+    def _iter_responses(self, response: httpx.Response) -> Iterator[httpx.Response]:
+        """Yield *response* and every following page, in page order.
+
+        Numbered pages are fetched ``page_concurrency`` at a time on a thread pool
+        (asyncio tasks for the async variant); otherwise ``next`` links are
+        followed one request at a time.
+        """
+        yield response
+        urls = self._numbered_page_urls(response) if self.page_concurrency > 1 else None
+        if urls is None:
+            while next_url := self._next_url(response):
+                response = self._fetch_page(next_url)
+                yield response
+            return
+        for future in _ordered_futures(self._fetch_page, urls, self.page_concurrency):
+            yield future.result()
+
+    async def _aiter_responses(self, response: httpx.Response) -> AsyncIterator[httpx.Response]:
+        yield response
+        urls = None
+        if self.page_concurrency > 1 and _asyncio_running():
+            urls = self._numbered_page_urls(response)
+        if urls is None:
+            while next_url := self._next_url(response):
+                response = await self._fetch_page_async(next_url)
+                yield response
+            return
+        async for task in _ordered_tasks(self._fetch_page_async, urls, self.page_concurrency):
+            yield task.result()
+
+    def _iter_items(
+        self, response: httpx.Response, data_key: str | None = None, first: Any = None
+    ) -> Iterator[Any]:
+        # *first* is the first page's decoded body when the caller already parsed it
+        for page in self._iter_responses(response):
+            chunk = self._extract_data(page, data_key, first)
+            first = None
             if isinstance(chunk, list):
-                all_data.extend(chunk)
+                yield from chunk
             else:
-                all_data.append(chunk)
-            next_url = self._next_url(response)
-            if not next_url:
-                break
-            response = self.session.get(next_url)
-            response.raise_for_status()
-        return all_data
+                yield chunk
+
+    async def _aiter_items(
+        self, response: httpx.Response, data_key: str | None = None, first: Any = None
+    ) -> AsyncIterator[Any]:
+        async for page in self._aiter_responses(response):
+            data = first if first is not None else await self._adecode(page)
+            chunk = self._extract_data(page, data_key, data)
+            first = None
+            if isinstance(chunk, list):
+                for item in chunk:
+                    yield item
+            else:
+                yield chunk
+
+    def _depaginate(
+        self, response: httpx.Response, data_key: str | None = None, first: Any = None
+    ) -> list[Any]:
+        return list(self._iter_items(response, data_key, first))
 
     async def _depaginate_async(
-        self, response: httpx.Response, data_key: str | None = None
+        self, response: httpx.Response, data_key: str | None = None, first: Any = None
     ) -> list[Any]:
-        all_data: list[Any] = []
-        while True:
-            chunk = self._extract_data(response, data_key)
-            if isinstance(chunk, list):
-                all_data.extend(chunk)
+        return [item async for item in self._aiter_items(response, data_key, first)]
+
+    def _iter_bodies(self, response: httpx.Response) -> Iterator[bytes]:
+        for page in self._iter_responses(response):
+            yield page.content
+
+    async def _aiter_bodies(self, response: httpx.Response) -> AsyncIterator[bytes]:
+        async for page in self._aiter_responses(response):
+            yield page.content
+
+    # ── Streaming pagination ────────────────────────────────────────
+
+    def iter_pages(
+        self,
+        uri: str,
+        params: dict[str, Any] | None = None,
+        data_key: str | None = None,
+        raw: bool = False,
+    ) -> Iterator[Any]:
+        """Yield the data of each page of a collection as soon as it arrives.
+
+        With ``raw=True`` each page is yielded as its undecoded body bytes.
+        """
+        response = self.get(uri, params=self._pagination_params(params), do_not_process=True)
+        if raw:
+            yield from self._iter_bodies(response)
+            return
+        for page in self._iter_responses(response):
+            yield self._extract_data(page, data_key)
+
+    def iter_items(
+        self, uri: str, params: dict[str, Any] | None = None, data_key: str | None = None
+    ) -> Iterator[Any]:
+        """Yield the items of a collection one at a time, following ``next`` links lazily."""
+        response = self.get(uri, params=self._pagination_params(params), do_not_process=True)
+        yield from self._iter_items(response, data_key)
+
+    async def aiter_pages(
+        self,
+        uri: str,
+        params: dict[str, Any] | None = None,
+        data_key: str | None = None,
+        raw: bool = False,
+    ) -> AsyncIterator[Any]:
+        """Async variant of :meth:`iter_pages`, for use with ``async for``."""
+        response = await self.async_get(
+            uri, params=self._pagination_params(params), do_not_process=True
+        )
+        if raw:
+            async for body in self._aiter_bodies(response):
+                yield body
+            return
+        async for page in self._aiter_responses(response):
+            yield self._extract_data(page, data_key, await self._adecode(page))
+
+    async def aiter_items(
+        self, uri: str, params: dict[str, Any] | None = None, data_key: str | None = None
+    ) -> AsyncIterator[Any]:
+        """Async variant of :meth:`iter_items`, for use with ``async for``."""
+        response = await self.async_get(
+            uri, params=self._pagination_params(params), do_not_process=True
+        )
+        async for item in self._aiter_items(response, data_key):
+            yield item
+
+    # ── Entity cache refresh ────────────────────────────────────────
+
+    def _refresh_entity(
+        self, key: tuple[str, str], uri: str, params: dict[str, Any] | None, data_key: str | None
+    ) -> None:
+        cache = self.entity_cache
+        assert cache is not None
+        try:
+            response = self._send("GET", uri, params=params)
+            if response.is_success:
+                r = self._decode(response)
+                cache.store(key, r[data_key] if data_key else r)
+        except (httpx.HTTPError, ValueError):
+            pass  # the stale entry simply expires
+        finally:
+            cache.end_refresh(key)
+
+    async def _async_refresh_entity(
+        self, key: tuple[str, str], uri: str, params: dict[str, Any] | None, data_key: str | None
+    ) -> None:
+        cache = self.entity_cache
+        assert cache is not None
+        try:
+            response = await self._async_send("GET", uri, params=params)
+            if response.is_success:
+                r = await self._adecode(response)
+                cache.store(key, r[data_key] if data_key else r)
+        except (httpx.HTTPError, ValueError):
+            pass
+        finally:
+            cache.end_refresh(key)
+
+    # ── Bulk execution ──────────────────────────────────────────────
+
+    def map(
+        self,
+        func: Callable[..., Any],
+        arg_sets: Iterable[Any],
+        concurrency: int = 8,
+        return_exceptions: bool = True,
+    ) -> list[Any]:
+        """Call *func* once per argument set on a thread pool and return results in input order.
+
+        Each argument set is a mapping of keyword arguments, a tuple of positional
+        arguments, or a single positional argument. With ``return_exceptions``
+        an item that fails yields its exception in place of a result instead of
+        aborting the batch.
+
+        ``session.map(client.users.show_user_details, [{"id": i} for i in ids])``
+        """
+        return list(self.imap(func, arg_sets, concurrency, return_exceptions))
+
+    def imap(
+        self,
+        func: Callable[..., Any],
+        arg_sets: Iterable[Any],
+        concurrency: int = 8,
+        return_exceptions: bool = True,
+    ) -> Iterator[Any]:
+        """Like :meth:`map`, but yield results in input order as they become available."""
+        for future in _ordered_futures(lambda args: _apply(func, args), arg_sets, concurrency):
+            error = future.exception()
+            if error is None:
+                yield future.result()
+            elif return_exceptions and isinstance(error, Exception):
+                yield error
             else:
-                all_data.append(chunk)
-            next_url = self._next_url(response)
-            if not next_url:
-                break
-            response = await self.async_session.get(next_url)
-            response.raise_for_status()
-        return all_data
+                raise error
+
+    async def amap(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        arg_sets: Iterable[Any],
+        concurrency: int = 8,
+        return_exceptions: bool = True,
+    ) -> list[Any]:
+        """Async :meth:`map` for async generated methods, at most *concurrency* in flight.
+
+        ``await session.amap(client.users_async.show_user_details, [{"id": i} for i in ids])``
+        """
+        return [r async for r in self.aimap(func, arg_sets, concurrency, return_exceptions)]
+
+    async def aimap(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        arg_sets: Iterable[Any],
+        concurrency: int = 8,
+        return_exceptions: bool = True,
+    ) -> AsyncIterator[Any]:
+        """Like :meth:`amap`, but yield results in input order as they become available.
+
+        Calls run concurrently as asyncio tasks; under other event loops they run
+        one at a time.
+        """
+        if not _asyncio_running():
+            for args in arg_sets:
+                try:
+                    yield await _apply(func, args)
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    yield e
+            return
+        async for task in _ordered_tasks(lambda args: _apply(func, args), arg_sets, concurrency):
+            error = task.exception()
+            if error is None:
+                yield task.result()
+            elif return_exceptions and isinstance(error, Exception):
+                yield error
+            else:
+                raise error
 
     # ── Core request dispatcher ─────────────────────────────────────
 
@@ -125,8 +1553,16 @@ class CanvasSession:
         force_urlencode_data: bool = False,
         per_page: int | None = None,
         page: int | None = None,
+        stream: bool | None = False,
+        raw: bool = False,
     ) -> Any:
-        """Base Canvas sync request method."""
+        """Base Canvas sync request method.
+
+        With ``stream=True`` a paginated response is returned as an iterator that
+        fetches each following page only when the previous one has been consumed.
+        With ``raw=True`` bodies are returned undecoded: ``bytes`` for a single
+        response, and a list (or iterator) of page bodies when paginating.
+        """
         if per_page is not None or page is not None:
             all_pages = False
             poly_response = False
@@ -136,11 +1572,27 @@ class CanvasSession:
             params = {**(params or {}), "page": page}
 
         if force_urlencode_data and data:
-            uri = uri + "?" + urllib.parse.urlencode(data)
+            uri = uri + "?" + urllib.parse.urlencode(data, doseq=True)
             data = None
 
+        entities = self.entity_cache
+        entity_key = None
+        cacheable = method == "GET" and single_item and not (do_not_process or no_data or raw)
+        if entities is not None and cacheable:
+            entity_key = entities.key(uri, params, data_key)
+            hit = entities.lookup(entity_key)
+            if hit is not None:
+                value, fresh = hit
+                if not fresh and entities.begin_refresh(entity_key):
+                    threading.Thread(
+                        target=self._refresh_entity,
+                        args=(entity_key, uri, params, data_key),
+                        daemon=True,
+                    ).start()
+                return value
+
         try:
-            response = self.session.request(
+            response = self._send(
                 method,
                 uri,
                 params=params,
@@ -149,22 +1601,37 @@ class CanvasSession:
             response.raise_for_status()
         except httpx.HTTPStatusError as e:
             raise CanvasAPIError(e.response) from e
+        finally:
+            if entities is not None and method != "GET":
+                entities.invalidate(uri)
 
         if do_not_process:
             return response
         if no_data:
             return response.status_code
+        if raw:
+            if all_pages or (poly_response and self._next_url(response)):
+                bodies = self._iter_bodies(response)
+                return bodies if stream else list(bodies)
+            return response.content
         if single_item:
-            r = response.json()
-            return r[data_key] if data_key else r
+            r = self._decode(response)
+            result = r[data_key] if data_key else r
+            if entities is not None and entity_key is not None:
+                entities.store(entity_key, result)
+            return result
         if all_pages:
+            if stream:
+                return self._iter_items(response, data_key)
             return self._depaginate(response, data_key)
         if poly_response:
-            r = response.json()
+            r = self._decode(response)
             if isinstance(r, list) and self._next_url(response):
-                return self._depaginate(response, data_key)
-            return self._extract_data(response, data_key)
-        return response.json()
+                if stream:
+                    return self._iter_items(response, data_key, r)
+                return self._depaginate(response, data_key, r)
+            return self._extract_data(response, data_key, r)
+        return self._decode(response)
 
     async def async_base_request(
         self,
@@ -181,8 +1648,15 @@ class CanvasSession:
         force_urlencode_data: bool = False,
         per_page: int | None = None,
         page: int | None = None,
+        stream: bool | None = False,
+        raw: bool = False,
     ) -> Any:
-        """Base Canvas async request method."""
+        """Base Canvas async request method.
+
+        With ``stream=True`` a paginated response is returned as an async iterator
+        (use ``async for``) instead of a list. ``raw=True`` works as in
+        :meth:`base_request`.
+        """
         if per_page is not None or page is not None:
             all_pages = False
             poly_response = False
@@ -192,11 +1666,31 @@ class CanvasSession:
             params = {**(params or {}), "page": page}
 
         if force_urlencode_data and data:
-            uri = uri + "?" + urllib.parse.urlencode(data)
+            uri = uri + "?" + urllib.parse.urlencode(data, doseq=True)
             data = None
 
+        entities = self.entity_cache
+        entity_key = None
+        cacheable = method == "GET" and single_item and not (do_not_process or no_data or raw)
+        if entities is not None and cacheable:
+            entity_key = entities.key(uri, params, data_key)
+            hit = entities.lookup(entity_key)
+            if hit is not None:
+                value, fresh = hit
+                if fresh:
+                    return value
+                # Background refresh needs asyncio tasks; elsewhere treat as a miss
+                if _asyncio_running():
+                    if entities.begin_refresh(entity_key):
+                        task = asyncio.ensure_future(
+                            self._async_refresh_entity(entity_key, uri, params, data_key)
+                        )
+                        self._background_tasks.add(task)
+                        task.add_done_callback(self._background_tasks.discard)
+                    return value
+
         try:
-            response = await self.async_session.request(
+            response = await self._async_send(
                 method,
                 uri,
                 params=params,
@@ -205,27 +1699,126 @@ class CanvasSession:
             response.raise_for_status()
         except httpx.HTTPStatusError as e:
             raise CanvasAPIError(e.response) from e
+        finally:
+            if entities is not None and method != "GET":
+                entities.invalidate(uri)
 
         if do_not_process:
             return response
         if no_data:
             return response.status_code
+        if raw:
+            if all_pages or (poly_response and self._next_url(response)):
+                bodies = self._aiter_bodies(response)
+                return bodies if stream else [body async for body in bodies]
+            return response.content
         if single_item:
-            r = response.json()
-            return r[data_key] if data_key else r
+            r = await self._adecode(response)
+            result = r[data_key] if data_key else r
+            if entities is not None and entity_key is not None:
+                entities.store(entity_key, result)
+            return result
         if all_pages:
+            if stream:
+                return self._aiter_items(response, data_key)
             return await self._depaginate_async(response, data_key)
         if poly_response:
-            r = response.json()
+            r = await self._adecode(response)
             if isinstance(r, list) and self._next_url(response):
-                return await self._depaginate_async(response, data_key)
-            return self._extract_data(response, data_key)
-        return response.json()
+                if stream:
+                    return self._aiter_items(response, data_key, r)
+                return await self._depaginate_async(response, data_key, r)
+            return self._extract_data(response, data_key, r)
+        return await self._adecode(response)
+
+    # ── Request plans ───────────────────────────────────────────────
+
+    def _plan_request(
+        self,
+        plan: RequestPlan,
+        values: tuple[Any, ...],
+        as_user_id: Any,
+        per_page: int | None,
+        page: int | None,
+    ) -> tuple[str, dict[str, Any], dict[str, Any], bool]:
+        uri, params, data = plan.bind(values, self.validation)
+        if as_user_id is not None:
+            params["as_user_id"] = as_user_id
+        paginate = (plan.all_pages or plan.poly_response) and per_page is None and page is None
+        if paginate:
+            params.setdefault("per_page", self.max_per_page)
+        else:
+            if per_page is not None:
+                params["per_page"] = per_page
+            if page is not None:
+                params["page"] = page
+        return uri, params, data, paginate
+
+    def dispatch(
+        self,
+        plan: RequestPlan,
+        values: tuple[Any, ...] = (),
+        as_user_id: Any = None,
+        do_not_process: bool | None = None,
+        no_data: bool | None = None,
+        per_page: int | None = None,
+        page: int | None = None,
+        stream: bool | None = None,
+        raw: bool | None = None,
+    ) -> Any:
+        """Run the operation described by *plan* with its parameter *values*.
+
+        The fast path used by generated methods built with ``--plans``: the
+        request is assembled from the precomputed plan in one pass and handed
+        straight to :meth:`base_request`.
+        """
+        uri, params, data, paginate = self._plan_request(plan, values, as_user_id, per_page, page)
+        return self.base_request(
+            plan.method,
+            uri,
+            data=data,
+            params=params,
+            single_item=plan.single_item,
+            all_pages=paginate and plan.all_pages,
+            poly_response=paginate and plan.poly_response,
+            do_not_process=bool(do_not_process),
+            no_data=bool(no_data),
+            stream=stream,
+            raw=bool(raw),
+        )
+
+    async def async_dispatch(
+        self,
+        plan: RequestPlan,
+        values: tuple[Any, ...] = (),
+        as_user_id: Any = None,
+        do_not_process: bool | None = None,
+        no_data: bool | None = None,
+        per_page: int | None = None,
+        page: int | None = None,
+        stream: bool | None = None,
+        raw: bool | None = None,
+    ) -> Any:
+        """Async :meth:`dispatch`."""
+        uri, params, data, paginate = self._plan_request(plan, values, as_user_id, per_page, page)
+        return await self.async_base_request(
+            plan.method,
+            uri,
+            data=data,
+            params=params,
+            single_item=plan.single_item,
+            all_pages=paginate and plan.all_pages,
+            poly_response=paginate and plan.poly_response,
+            do_not_process=bool(do_not_process),
+            no_data=bool(no_data),
+            stream=stream,
+            raw=bool(raw),
+        )
 
     # ── Sync convenience methods ────────────────────────────────────
 
     def get(self, url: str, params: dict[str, Any] | None = None, **kwargs: Any) -> Any:
-        if self._needs_pagination(kwargs) and "per_page" not in kwargs:
+        if self._needs_pagination(kwargs) and kwargs.get("per_page") is None:
             params = self._pagination_params(params)
         return self.base_request("GET", url, params=params, **kwargs)
 
@@ -241,7 +1834,7 @@ class CanvasSession:
     # ── Async convenience methods ───────────────────────────────────
 
     async def async_get(self, url: str, params: dict[str, Any] | None = None, **kwargs: Any) -> Any:
-        if self._needs_pagination(kwargs) and "per_page" not in kwargs:
+        if self._needs_pagination(kwargs) and kwargs.get("per_page") is None:
             params = self._pagination_params(params)
         return await self.async_base_request("GET", url, params=params, **kwargs)
 
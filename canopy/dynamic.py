@@ -0,0 +1,194 @@
+import json
+from collections.abc import Callable, Mapping
+from pathlib import Path
+from typing import Any
+
+from .canopy import CanvasSession, RequestPlan
+
+BUNDLE_FORMAT = 1
+
+# Keyword arguments every generated method accepts after its own parameters
+_CANOPY_ARGS = "as_user_id=None, do_not_process=None, no_data=None, per_page=None, page=None"
+
+
+def dump_bundle(apis: Mapping[str, dict[str, list]]) -> bytes:
+    """Serialise operation tables (from ``bundle_operations``) into a bundle.
+
+    A bundle is a one-line JSON header mapping each API name to the byte span
+    of its operations in the payload that follows, so a client can decode just
+    the APIs it uses.
+    """
+    spans = {}
+    chunks = []
+    offset = 0
+    for name, operations in apis.items():
+        chunk = json.dumps(operations, separators=(",", ":")).encode()
+        spans[name] = [offset, offset + len(chunk)]
+        chunks.append(chunk)
+        offset += len(chunk)
+    header = json.dumps({"format": BUNDLE_FORMAT, "apis": spans}, separators=(",", ":"))
+    return b"".join([header.encode(), b"\n", *chunks])
+
+
+def load_bundle(bundle: str | Path | Mapping[str, Any]) -> dict[str, Any]:
+    """Read a bundle written by ``canopy_build bundle`` and return its API table.
+
+    The table maps each API name to its operations, still JSON-encoded; they
+    are decoded one API at a time as the client touches them. *bundle* may
+    also be an in-memory ``{"format": 1, "apis": {name: operations}}`` mapping.
+    """
+    if isinstance(bundle, Mapping):
+        header, payload = bundle, None
+    else:
+        raw = Path(bundle).read_bytes()
+        end = raw.find(b"\n")
+        header = json.loads(raw[:end]) if end > 0 else {}
+        payload = raw[end + 1 :]
+    if header.get("format") != BUNDLE_FORMAT:
+        raise ValueError(
+            f"Unsupported bundle format {header.get('format')!r}; "
+            "rebuild it with this version of canopy_build."
+        )
+    if payload is None:
+        return dict(header["apis"])
+    return {name: payload[start:stop] for name, (start, stop) in header["apis"].items()}
+
+
+def _build_endpoint(
+    session: CanvasSession, nickname: str, operation: list, is_async: bool
+) -> Callable[..., Any]:
+    """Compile one operation into a function with the generated method's signature.
+
+    The function packs its arguments into spec order and hands them to
+    :meth:`CanvasSession.dispatch` (or ``async_dispatch``) with a RequestPlan,
+    the same path a ``--plans`` module takes.
+    """
+    if not nickname.isidentifier():
+        raise ValueError(f"Operation {nickname!r} is not a valid Python name")
+    method, path, mode, summary, fields = operation
+    plan = RequestPlan(
+        method,
+        path,
+        tuple(
+            (wire, location, frozenset(enum) if enum else None, is_datetime, required)
+            for wire, location, enum, is_datetime, required, _, _ in fields
+        ),
+        mode,
+    )
+    namespace: dict[str, Any] = {
+        "__name__": __name__,
+        "_dispatch_": session.async_dispatch if is_async else session.dispatch,
+        "_plan_": plan,
+    }
+    required, optional = [], []
+    for i, (*_, is_required, arg, default) in enumerate(fields):
+        if not arg.isidentifier():
+            raise ValueError(f"Parameter {arg!r} of {nickname!r} is not a valid Python name")
+        if is_required:
+            required.append(arg)
+        else:
+            namespace[f"_d{i}_"] = default
+            optional.append(f"{arg}=_d{i}_")
+    # Same ordering as service_param_string: required then optional, each sorted
+    params = [*sorted(required), *sorted(optional), _CANOPY_ARGS]
+    passed = ["as_user_id", "do_not_process", "no_data", "per_page", "page"]
+    if mode in ("all_pages", "poly"):
+        params.extend(["stream=None", "raw=None"])
+        passed.extend(["stream", "raw"])
+    values = "".join(f"{arg}, " for *_, arg, _ in fields)
+    source = (
+        f"{'async ' if is_async else ''}def {nickname}({', '.join(params)}):\n"
+        f"    return {'await ' if is_async else ''}_dispatch_(_plan_, ({values}), "
+        f"{', '.join(passed)})\n"
+    )
+    exec(source, namespace)
+    endpoint = namespace[nickname]
+    endpoint.__doc__ = summary
+    return endpoint
+
+
+class DynamicAPI:
+    """One Canvas API whose methods are compiled from the bundle on first use."""
+
+    def __init__(
+        self, session: CanvasSession, name: str, operations: dict[str, list], is_async: bool
+    ) -> None:
+        self.client = session
+        self._name = name
+        self._operations = operations
+        self._is_async = is_async
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        # Only reached the first time an operation is used; the result is cached
+        if name.startswith("__"):
+            raise AttributeError(name)
+        try:
+            operation = self._operations[name]
+        except KeyError:
+            raise AttributeError(f"API {self._name!r} has no operation {name!r}") from None
+        endpoint = _build_endpoint(self.client, name, operation, self._is_async)
+        setattr(self, name, endpoint)
+        return endpoint
+
+    def __dir__(self) -> list[str]:
+        return [*super().__dir__(), *self._operations]
+
+    def __repr__(self) -> str:
+        suffix = "_async" if self._is_async else ""
+        return f"<DynamicAPI {self._name}{suffix}: {len(self._operations)} operations>"
+
+
+class DynamicCanvasClient:
+    """CanvasClient built at runtime from a spec bundle instead of generated modules.
+
+    ``client.assignments.list_assignments(course_id)`` behaves like the
+    generated method of the same name, and ``client.assignments_async`` is the
+    async variant. Only the APIs and operations actually used are decoded and
+    compiled.
+    """
+
+    def __init__(
+        self,
+        instance_address: str,
+        access_token: str,
+        bundle: str | Path | Mapping[str, Any],
+        max_per_page: int = 100,
+        **session_options: Any,
+    ) -> None:
+        self.instance_address = instance_address
+        self.access_token = access_token
+        self.max_per_page = max_per_page
+        # session_options (http2, max_connections, timeout, transport, ...) go to CanvasSession
+        self.client = CanvasSession(
+            self.instance_address, self.access_token, self.max_per_page, **session_options
+        )
+        self._apis = load_bundle(bundle)
+        self._operations: dict[str, dict[str, list]] = {}
+
+    def __getattr__(self, name: str) -> DynamicAPI:
+        # Only reached when normal lookup fails, i.e. the first time an API is used
+        if name.startswith("_"):
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        is_async = name.endswith("_async")
+        base_name = name.removesuffix("_async")
+        try:
+            encoded = self._apis[base_name]
+        except KeyError:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            ) from None
+        operations = self._operations.get(base_name)
+        if operations is None:
+            if isinstance(encoded, str | bytes):
+                encoded = json.loads(encoded)
+            operations = self._operations[base_name] = encoded
+        api = DynamicAPI(self.client, base_name, operations, is_async)
+        setattr(self, name, api)
+        return api
+
+    def __dir__(self) -> list[str]:
+        return [
+            *super().__dir__(),
+            *self._apis,
+            *(f"{name}_async" for name in self._apis),
+        ]
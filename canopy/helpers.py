@@ -1,25 +1,48 @@
 import re
+import warnings
+from collections.abc import Collection
 from datetime import date, datetime
 
+# How client-side checks react to a bad value: raise ValueError, emit a warning, or skip
+VALIDATION_POLICIES = ("strict", "warn", "off")
 
-def _validate_enum(value: str | list[str], acceptable_values: list[str]) -> str | list[str]:
+_ISO8601 = re.compile(r"(\d{4})-(\d{2})-(\d{2})T(\d{2})\:(\d{2})\:(\d{2})([+-](\d{2})\:(\d{2})|Z)")
+
+
+def _reject(message: str, validation: str) -> None:
+    if validation == "warn":
+        warnings.warn(message, stacklevel=3)
+    else:
+        raise ValueError(message)
+
+
+def _validate_enum(
+    value: str | list[str], acceptable_values: Collection[str], validation: str = "strict"
+) -> str | list[str]:
+    if validation == "off":
+        return value
     values = value if isinstance(value, list) else [value]
     for v in values:
         if v not in acceptable_values:
-            raise ValueError(f"{v!r} not in {acceptable_values}")
+            choices = (
+                acceptable_values
+                if isinstance(acceptable_values, list)
+                else sorted(acceptable_values)
+            )
+            _reject(f"{v!r} not in {choices}", validation)
     return value
 
 
-def _validate_iso8601_string(value: str) -> str:
+def _validate_iso8601_string(value: str, validation: str = "strict") -> str:
     """Return the value or raise a ValueError if it is not a string in ISO8601 format."""
-    ISO8601_REGEX = r"(\d{4})-(\d{2})-(\d{2})T(\d{2})\:(\d{2})\:(\d{2})([+-](\d{2})\:(\d{2})|Z)"
-    if re.match(ISO8601_REGEX, value):
+    if validation == "off" or _ISO8601.match(value):
         return value
-    raise ValueError(f"{value!r} must be in ISO8601 format.")
+    _reject(f"{value!r} must be in ISO8601 format.", validation)
+    return value
 
 
-def coerce_to_iso8601(value: str | date | datetime) -> str:
+def coerce_to_iso8601(value: str | date | datetime, validation: str = "strict") -> str:
     """Coerce a string, date, or datetime to an ISO8601 formatted string."""
     if isinstance(value, str):
-        return _validate_iso8601_string(value)
+        return _validate_iso8601_string(value, validation)
     return value.strftime("%Y-%m-%dT%H:%M:%S+00:00")
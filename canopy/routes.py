@@ -0,0 +1,160 @@
+import bisect
+import json
+import re
+import urllib.parse
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+ROUTES_FORMAT = 1
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _segments(path: str) -> list[str]:
+    return [segment for segment in path.split("/") if segment]
+
+
+def _words(text: str) -> list[str]:
+    return _WORD.findall(text.lower())
+
+
+class RouteIndex:
+    """Map concrete Canvas requests back to the generated methods that make them.
+
+    *routes* is a list of dicts with at least ``http_method``, ``path`` (the
+    template, e.g. ``/api/v1/courses/{course_id}``), ``module`` and ``method``,
+    as written by ``canopy_docs generate-routes``. Paths are compiled into a
+    trie keyed on method and path segments, with ``{param}`` segments as
+    wildcards, so :meth:`lookup` costs one step per segment regardless of how
+    many routes there are. :meth:`search` runs over an inverted index of method
+    names, path words and summaries.
+    """
+
+    def __init__(self, routes: Iterable[dict[str, Any]], trie: dict | None = None) -> None:
+        self.routes = list(routes)
+        self.trie = trie if trie is not None else self._compile(self.routes)
+        self._postings: dict[str, dict[int, int]] | None = None
+        self._vocabulary: list[str] = []
+
+    @staticmethod
+    def _compile(routes: list[dict[str, Any]]) -> dict:
+        # Node: {"s": {segment: node}, "p": node for a {param} segment, "m": {METHOD: [ids]}}
+        root: dict = {}
+        for i, route in enumerate(routes):
+            node = root
+            for segment in _segments(route["path"]):
+                if "{" in segment:
+                    node = node.setdefault("p", {})
+                else:
+                    node = node.setdefault("s", {}).setdefault(segment, {})
+            node.setdefault("m", {}).setdefault(route["http_method"].upper(), []).append(i)
+        return root
+
+    # ── Reverse lookup ───────────────────────────────────────────────
+
+    def lookup(self, method: str, path: str) -> tuple[dict[str, Any], dict[str, str]] | None:
+        """Return ``(route, path_params)`` for a request, or None if nothing matches.
+
+        *path* may be a full URL and may carry a query string. Literal segments
+        win over ``{param}`` segments, so ``/courses/search`` is not mistaken
+        for ``/courses/{id}``.
+        """
+        path = urllib.parse.urlsplit(path).path
+        segments = [urllib.parse.unquote(s) for s in _segments(path)]
+        route_id = self._match(self.trie, segments, 0, method.upper())
+        if route_id is None:
+            return None
+        route = self.routes[route_id]
+        params = {
+            template[1:-1]: value
+            for template, value in zip(_segments(route["path"]), segments, strict=True)
+            if template.startswith("{") and template.endswith("}")
+        }
+        return route, params
+
+    def _match(self, node: dict, segments: list[str], depth: int, method: str) -> int | None:
+        if depth == len(segments):
+            ids = node.get("m", {}).get(method)
+            return ids[0] if ids else None
+        child = node.get("s", {}).get(segments[depth])
+        if child is not None:
+            found = self._match(child, segments, depth + 1, method)
+            if found is not None:
+                return found
+        wildcard = node.get("p")
+        if wildcard is not None:
+            return self._match(wildcard, segments, depth + 1, method)
+        return None
+
+    # ── Full-text search ─────────────────────────────────────────────
+
+    def _build_postings(self) -> dict[str, dict[int, int]]:
+        # word -> {route id: weight}; words from the method name count double
+        postings: dict[str, dict[int, int]] = {}
+        for i, route in enumerate(self.routes):
+            weights: dict[str, int] = {}
+            for word in _words(route.get("summary", "")):
+                weights[word] = max(weights.get(word, 0), 1)
+            for word in _words(" ".join(s for s in _segments(route["path"]) if "{" not in s)):
+                weights[word] = max(weights.get(word, 0), 1)
+            for word in _words(f"{route['module']} {route['method']}"):
+                weights[word] = 2
+            for word, weight in weights.items():
+                postings.setdefault(word, {})[i] = weight
+        self._vocabulary = sorted(postings)
+        return postings
+
+    def search(self, query: str, limit: int = 10) -> list[dict[str, Any]]:
+        """Routes matching every word of *query*, best first.
+
+        The last word also matches as a prefix, so ``list assign`` finds
+        ``list_assignments``.
+        """
+        postings = self._postings
+        if postings is None:
+            postings = self._postings = self._build_postings()
+        words = _words(query)
+        if not words:
+            return []
+        scores: dict[int, int] = {}
+        for n, word in enumerate(words):
+            if n == len(words) - 1:
+                start = bisect.bisect_left(self._vocabulary, word)
+                matches: dict[int, int] = {}
+                for term in self._vocabulary[start:]:
+                    if not term.startswith(word):
+                        break
+                    for i, weight in postings[term].items():
+                        matches[i] = max(matches.get(i, 0), weight)
+            else:
+                matches = postings.get(word, {})
+            if n == 0:
+                scores = dict(matches)
+            else:
+                scores = {i: s + matches[i] for i, s in scores.items() if i in matches}
+            if not scores:
+                return []
+        ranked = sorted(scores, key=lambda i: (-scores[i], self.routes[i]["method"]))
+        return [self.routes[i] for i in ranked[:limit]]
+
+    # ── Persistence ──────────────────────────────────────────────────
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {"format": ROUTES_FORMAT, "routes": self.routes, "trie": self.trie},
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> "RouteIndex":
+        data = json.loads(Path(path).read_text(encoding="utf-8"))
+        if data.get("format") != ROUTES_FORMAT:
+            raise ValueError(
+                f"Unsupported route index format {data.get('format')!r}; "
+                "regenerate it with canopy_docs generate-routes."
+            )
+        return cls(data["routes"], data.get("trie"))
+
+    def __len__(self) -> int:
+        return len(self.routes)
@@ -2,16 +2,23 @@
 
 Commands:
     generate-index   Parse generated API files and emit a compact method index.
+    generate-routes  Emit a route index mapping Canvas paths to generated methods.
+    route-lookup     Find the generated method for a concrete request.
+    route-search     Full-text search over method names, paths and summaries.
     generate-llms    Write a static llms.txt describing the Canopy framework.
     generate-all     Run both commands in one step.
 """
 
 import ast
+import json
 import tomllib
 from pathlib import Path
 
 import click
 
+from canopy.routes import RouteIndex
+from canopy.scripts.parallel import process_map
+
 CANOPY_KWARGS = {"as_user_id", "do_not_process", "no_data", "self"}
 
 LLMS_TXT = """\
@@ -32,7 +39,7 @@ Source: https://github.com/tylerclair/canopy
 # Runtime only
 uv add git+https://github.com/tylerclair/canopy.git
 
-# With dotenv + async rate limiting
+# With dotenv support
 uv add "canopy[extras] @ git+https://github.com/tylerclair/canopy.git"
 
 # With API module builder
@@ -58,6 +65,79 @@ session = CanvasSession(
 )
 ```
 
+Requests are paced automatically from the `X-Rate-Limit-Remaining` and
+`X-Request-Cost` headers so the token's quota is not exhausted. Pass
+`rate_limit=RateLimitPacer(threshold=..., leak_rate=...)` to tune the pacer, or
+`rate_limit=False` to disable it.
+
+Throttled (429 / 403 "Rate Limit Exceeded"), 502/503/504 responses and
+transport errors are retried with exponential backoff and jitter, honoring
+`Retry-After`. GET/PUT/DELETE retry by default; POST only with
+`retry=RetryPolicy(retry_post=True)`. Pass `retry=False` to disable retries.
+
+`http_cache=HTTPCache(...)` enables conditional GETs: responses with an `ETag`
+or `Last-Modified` header are stored (in-memory LRU via `MemoryCacheBackend`, or
+on disk via `FileCacheBackend(directory)`) and revalidated with
+`If-None-Match` / `If-Modified-Since`; 304 replies are served from the cache.
+`SQLiteCacheBackend(path, max_size=...)` persists compressed responses in one
+SQLite file shared across processes and runs; `HTTPCache(..., ttl_rules={
+"/api/v1/accounts/*/terms": 86400})` serves matching paths from the cache
+without any request while they are fresh.
+
+`entity_cache=EntityCache(ttl=..., max_entries=..., stale_ttl=...)` memoizes
+single-object GETs (e.g. `get_single_course`) keyed on path and params
+(including `as_user_id`). A PUT/POST/DELETE to the same path invalidates them.
+
+Identical GETs (same URL, params and `as_user_id`) that are in flight at the
+same time — e.g. duplicates inside one `asyncio.gather()` — are coalesced into
+a single request whose response every caller shares. Disable with
+`coalesce_requests=False`.
+
+`session.map(func, arg_sets, concurrency=8)` and `await session.amap(...)` call
+a generated method once per argument set (dict of kwargs, tuple, or single
+value) with bounded concurrency and return results in input order; failed
+items hold their exception unless `return_exceptions=False`. `imap`/`aimap`
+stream the same results.
+
+`adaptive_concurrency=True` (or `AdaptiveConcurrency(initial=, min_limit=,
+max_limit=)`) caps in-flight async requests with an AIMD limit that grows while
+latency and `X-Rate-Limit-Remaining` are healthy and halves on throttling or
+latency spikes; `session.concurrency_limit` reports the current value.
+
+Each response body is decoded once; `json_loads=orjson.loads` (any callable
+taking the body bytes) replaces `response.json()`. `raw=True` on
+`base_request` / `get` / `iter_pages` / generated list methods (and async
+variants) returns undecoded `bytes`, or a list of page bodies when paginating
+(an iterator with `stream=True`), for archiving without a decode/encode round
+trip.
+
+`decode_offload=True` (or `DecodeOffload(threshold=256 * 1024,
+executor="thread" | "process", max_workers=4)`) decodes async response bodies
+of at least `threshold` bytes in a worker instead of on the event loop.
+
+Enum and ISO 8601 arguments are checked client-side against module-level
+`frozenset` tables. `validation="strict"` (default) raises `ValueError`,
+`"warn"` emits a `UserWarning` and sends the value anyway, and `"off"` skips
+the checks for trusted bulk pipelines; dates and datetimes are still formatted.
+
+Transport: `http2=True` (needs `canopy[http2]`), `max_connections=100`,
+`max_keepalive_connections=20`, `keepalive_expiry=5.0`, `timeout=5.0` (float or
+`httpx.Timeout(...)` for per-phase), `transport=` / `async_transport=` for
+custom httpx transports. `CanvasClient(url, token, **session_options)` passes
+them through.
+
+Modules built with `canopy_build ... --plans` hold one `RequestPlan(method,
+path, fields, mode)` per operation and call `session.dispatch(plan, values,
+as_user_id, do_not_process, no_data, per_page, page, stream, raw)` (or
+`async_dispatch`) instead of assembling params per call; signatures and
+return values are unchanged. `--compact` drops docstrings and comments from
+the generated modules and writes them to sidecar `.pyi` stubs instead.
+
+Without generated modules, `canopy_build bundle -s specs/ -o canvas.bundle`
+writes a spec bundle and `DynamicCanvasClient(url, token, "canvas.bundle",
+**session_options)` exposes the same `client.<api>.<method>(...)` and
+`client.<api>_async` attributes, compiling each method on first use.
+
 Supports context managers for connection cleanup:
 
 ```python
@@ -72,6 +152,7 @@ async with CanvasSession(url, token) as session:
 
 Generated file that wraps CanvasSession and attaches all generated API modules
 as attributes. Produced by `canvas_api_builder build-canvas-client-file`.
+Each module is imported lazily on first access to its attribute and cached.
 
 ```python
 from canvas_client import CanvasClient
@@ -173,6 +254,27 @@ Automatic. Methods that return arrays fetch all pages before returning. The
 `max_per_page` set on `CanvasSession` / `CanvasClient` is injected as `per_page`
 on every paginated request. No manual pagination is ever needed.
 
+List endpoints also accept `stream=True`, which returns an iterator (an async
+iterator on async modules) that yields items while pages are fetched lazily, so
+large collections never have to be held in memory at once:
+
+```python
+for user in client.accounts.list_users_in_account(account_id=1, stream=True):
+    ...
+
+async for user in await client.accounts_async.list_users_in_account(
+    account_id=1, stream=True
+):
+    ...
+```
+
+`CanvasSession.iter_pages()` / `iter_items()` (and `aiter_pages()` /
+`aiter_items()`) do the same for an arbitrary URI.
+
+`CanvasSession(..., page_concurrency=N)` fetches numbered pages (collections
+whose first response has a `last` link with `page=N`) up to N at a time while
+keeping results in page order. Bookmark-paginated collections stay sequential.
+
 
 ---
 ## Async
@@ -217,6 +319,10 @@ account = client.accounts.get_account(id=1)
 # With optional Canvas param
 accounts = client.accounts.list_accounts(include="course_count")
 
+# Array params take a list and are sent as repeated `name[]` keys, so one
+# filtered call replaces a call per value
+enrollments = client.enrollments.list_enrollments_courses(1, type=["StudentEnrollment"])
+
 # Masquerade as another user
 profile = client.users.get_user_profile("self", as_user_id=12345)
 
@@ -310,14 +416,8 @@ def load_excluded_specs(exclude_file: Path | None) -> set[str]:
 # ── AST helpers ─────────────────────────────────────────────────────
 
 
-def _infer_return_type(func_node: ast.FunctionDef | ast.AsyncFunctionDef) -> str:
-    """Infer return type from keyword args on the client call in the function body."""
-    keywords: set[str] = set()
-    for node in ast.walk(func_node):
-        if isinstance(node, ast.Call):
-            for kw in node.keywords:
-                if kw.arg:
-                    keywords.add(kw.arg)
+def _return_type(keywords: set[str]) -> str:
+    """Map the keyword args passed to the client call to the method's return type."""
     if "all_pages" in keywords:
         return "list[dict]"
     if "single_item" in keywords:
@@ -349,6 +449,113 @@ def _get_summary(func_node: ast.FunctionDef | ast.AsyncFunctionDef) -> str:
     return docstring.split("\n")[0].strip().rstrip(".")
 
 
+_HTTP_VERBS = {"get", "post", "put", "delete", "patch"}
+
+
+def _path_template(node: ast.expr) -> str | None:
+    """Rebuild a path template from a string or f-string literal (``{name}`` placeholders)."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if not isinstance(node, ast.JoinedStr):
+        return None
+    parts = []
+    for value in node.values:
+        if isinstance(value, ast.Constant):
+            parts.append(str(value.value))
+        elif isinstance(value, ast.FormattedValue) and isinstance(value.value, ast.Name):
+            parts.append(f"{{{value.value.id}}}")
+        else:
+            return None
+    return "".join(parts)
+
+
+def _route_from_args(verb: str, args: list[ast.expr]) -> tuple[str, str] | None:
+    """``(METHOD, path)`` from ``RequestPlan("GET", "/api/...")`` or ``("GET", [path])`` args."""
+    if verb == "RequestPlan":
+        if len(args) < 2 or not isinstance(args[0], ast.Constant):
+            return None
+        verb, args = str(args[0].value), args[1:2]
+    path = _path_template(args[0]) if args else None
+    return (verb.upper(), path) if path else None
+
+
+# RequestPlan modes (``--plans`` modules) and the client keyword each stands for
+_PLAN_MODE_KEYWORDS = {"all_pages": "all_pages", "single": "single_item", "poly": "poly_response"}
+
+
+class _IndexVisitor(ast.NodeVisitor):
+    """Collect everything the index needs from a generated module in one traversal.
+
+    Records the first class's methods with the keyword args of every call in
+    their bodies and the ``(HTTP method, path)`` each one requests, and the
+    module-level RequestPlans so methods that dispatch through a plan get a
+    return type and route too.
+    """
+
+    def __init__(self, func_type: type[ast.FunctionDef] | type[ast.AsyncFunctionDef]) -> None:
+        self.func_type = func_type
+        self.class_name: str | None = None
+        self.methods: list[tuple[ast.FunctionDef | ast.AsyncFunctionDef, set[str]]] = []
+        self.plan_modes: dict[str, str] = {}
+        self.plan_routes: dict[str, tuple[str, str]] = {}
+        self.routes: dict[str, tuple[str, str]] = {}
+        self._keywords: set[str] | None = None
+        self._method_name: str | None = None
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        value = node.value
+        if (
+            isinstance(value, ast.Call)
+            and isinstance(value.func, ast.Name)
+            and value.func.id == "RequestPlan"
+            and value.args
+            and isinstance(value.args[-1], ast.Constant)
+            and isinstance(value.args[-1].value, str)
+        ):
+            route = _route_from_args(value.func.id, value.args)
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    self.plan_modes[target.id] = value.args[-1].value
+                    if route:
+                        self.plan_routes[target.id] = route
+        self.generic_visit(node)
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        if self.class_name is not None:
+            return  # one class per generated file
+        self.class_name = node.name
+        for item in node.body:
+            if isinstance(item, self.func_type) and item.name != "__init__":
+                self._keywords = set()
+                self._method_name = item.name
+                self.methods.append((item, self._keywords))
+                self.generic_visit(item)
+        self._keywords = None
+        self._method_name = None
+
+    def visit_Call(self, node: ast.Call) -> None:
+        if self._keywords is not None and self._method_name is not None:
+            self._keywords.update(kw.arg for kw in node.keywords if kw.arg)
+            attr = node.func.attr if isinstance(node.func, ast.Attribute) else None
+            # self.client.dispatch(_PLAN, ...) / async_dispatch(_PLAN, ...)
+            if attr in ("dispatch", "async_dispatch") and node.args:
+                plan = node.args[0]
+                if isinstance(plan, ast.Name):
+                    # Plans are emitted above the class, so they have been visited already
+                    mode = self.plan_modes.get(plan.id)
+                    if mode in _PLAN_MODE_KEYWORDS:
+                        self._keywords.add(_PLAN_MODE_KEYWORDS[mode])
+                    if plan.id in self.plan_routes:
+                        self.routes.setdefault(self._method_name, self.plan_routes[plan.id])
+            # client.get(f"/api/v1/...", ...) / client.async_get(...)
+            elif attr and attr.removeprefix("async_") in _HTTP_VERBS:
+                verb = attr.removeprefix("async_").upper()
+                route = _route_from_args(verb, node.args[:1])
+                if route:
+                    self.routes.setdefault(self._method_name, route)
+        self.generic_visit(node)
+
+
 def _index_file(path: Path) -> str | None:
     """Parse a single generated API file and return its index block, or None on error."""
     try:
@@ -357,30 +564,107 @@ def _index_file(path: Path) -> str | None:
         return None
 
     is_async = "async" in path.stem
-    func_type = ast.AsyncFunctionDef if is_async else ast.FunctionDef
     prefix = "async def" if is_async else "def"
+    visitor = _IndexVisitor(ast.AsyncFunctionDef if is_async else ast.FunctionDef)
+    visitor.visit(tree)
+    if visitor.class_name is None:
+        return None
+
+    lines = [f"## {visitor.class_name} ({path.name})"]
+    for item, keywords in visitor.methods:
+        params_str = ", ".join(_get_canvas_params(item))
+        canvas_args = params_str + ", " if params_str else ""
+        lines.append(f"  {prefix} {item.name}(self, {canvas_args}...) -> {_return_type(keywords)}")
+        summary = _get_summary(item)
+        if summary:
+            lines.append(f"    # {summary}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+# ── Index cache ──────────────────────────────────────────────────────
+# Index blocks are cached per file, keyed by path, mtime and size, so a
+# refresh only re-parses modules that changed since the last run.
+
+INDEX_CACHE_NAME = ".canopy_index_cache.json"
+# Bump when _index_file's output changes so stale blocks are discarded
+INDEX_CACHE_VERSION = 1
+
+
+def _load_index_cache(cache_file: Path) -> dict[str, dict]:
+    try:
+        cache = json.loads(cache_file.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    if cache.get("version") != INDEX_CACHE_VERSION:
+        return {}
+    return cache.get("files", {})
 
-    lines: list[str] = []
-    for node in ast.walk(tree):
-        if not isinstance(node, ast.ClassDef):
-            continue
-        lines.append(f"## {node.name} ({path.name})")
-        for item in node.body:
-            if not isinstance(item, func_type) or item.name == "__init__":
-                continue
-            canvas_params = _get_canvas_params(item)
-            ret = _infer_return_type(item)
-            summary = _get_summary(item)
-            params_str = ", ".join(canvas_params)
-            canvas_args = params_str + ", " if params_str else ""
-            sig = f"{prefix} {item.name}(self, {canvas_args}...) -> {ret}"
-            lines.append(f"  {sig}")
-            if summary:
-                lines.append(f"    # {summary}")
-        lines.append("")
-        break  # one class per generated file
 
-    return "\n".join(lines) if lines else None
+def _save_index_cache(cache_file: Path, files: dict[str, dict]) -> None:
+    cache_file.write_text(
+        json.dumps({"version": INDEX_CACHE_VERSION, "files": files}), encoding="utf-8"
+    )
+
+
+def index_files(
+    paths: list[Path], cache_file: Path | None = None, workers: int = 1
+) -> tuple[list[str | None], int]:
+    """Index *paths* in order, reusing cached blocks and parsing the rest in parallel.
+
+    *workers* of 0 means one process per CPU. Returns the blocks (None for files
+    that failed to parse) and how many files were actually parsed.
+    """
+    cached = _load_index_cache(cache_file) if cache_file else {}
+    blocks: list[str | None] = [None] * len(paths)
+    stats = []
+    stale = []
+    for i, path in enumerate(paths):
+        st = path.stat()
+        stats.append((st.st_mtime_ns, st.st_size))
+        entry = cached.get(str(path))
+        if entry and (entry["mtime_ns"], entry["size"]) == stats[-1]:
+            blocks[i] = entry["block"]
+        else:
+            stale.append(i)
+
+    with process_map(_index_file, [paths[i] for i in stale], workers) as results:
+        for i, block in zip(stale, results, strict=True):
+            blocks[i] = block
+
+    if cache_file:
+        files = {
+            str(path): {"mtime_ns": mtime_ns, "size": size, "block": block}
+            for path, (mtime_ns, size), block in zip(paths, stats, blocks, strict=True)
+        }
+        _save_index_cache(cache_file, files)
+    return blocks, len(stale)
+
+
+def _route_entries(path: Path) -> list[dict] | None:
+    """Route records (see canopy.routes.RouteIndex) for one generated file, or None on error."""
+    try:
+        tree = ast.parse(path.read_text(encoding="utf-8"))
+    except SyntaxError:
+        return None
+    visitor = _IndexVisitor(ast.AsyncFunctionDef if "async" in path.stem else ast.FunctionDef)
+    visitor.visit(tree)
+    entries = []
+    for item, _ in visitor.methods:
+        route = visitor.routes.get(item.name)
+        if route is None:
+            continue
+        entries.append(
+            {
+                "http_method": route[0],
+                "path": route[1],
+                "module": path.stem,
+                "class": visitor.class_name,
+                "method": item.name,
+                "summary": _get_summary(item),
+            }
+        )
+    return entries
 
 
 def _collect_api_files(
@@ -436,12 +720,28 @@ def cli() -> None:
     type=click.Path(exists=True, dir_okay=False, readable=True, path_type=Path),
     help="TOML file listing spec filenames to exclude from the index.",
 )
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Worker processes to parse with; 0 uses one per CPU.",
+)
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    default=False,
+    help=f"Parse every file instead of reusing {INDEX_CACHE_NAME} in the apis folder.",
+)
 def generate_index(
     apis_folder: Path,
     output_file: Path,
     sync_only: bool,
     async_only: bool,
     exclude_file: Path | None,
+    jobs: int,
+    no_cache: bool,
 ) -> None:
     """Generate a compact LLM-readable index of all generated API methods.
 
@@ -463,9 +763,10 @@ def generate_index(
         "",
     ]
 
+    cache_file = None if no_cache else apis_folder / INDEX_CACHE_NAME
+    results, parsed = index_files(api_files, cache_file, jobs)
     skipped = 0
-    for path in api_files:
-        block = _index_file(path)
+    for path, block in zip(api_files, results, strict=True):
         if block:
             blocks.append(block)
         else:
@@ -474,11 +775,114 @@ def generate_index(
 
     output_file.write_text("\n".join(blocks), encoding="utf-8")
     size_kb = output_file.stat().st_size / 1024
-    click.echo(f"✓ Indexed {len(api_files) - skipped} files → {output_file} ({size_kb:.1f} KB)")
+    click.echo(
+        f"✓ Indexed {len(api_files) - skipped} files ({parsed} parsed) → {output_file}"
+        f" ({size_kb:.1f} KB)"
+    )
     if skipped:
         click.echo(f"  ⚠ {skipped} file(s) skipped due to parse errors")
 
 
+@cli.command("generate-routes")
+@click.option(
+    "-a",
+    "--apis-folder",
+    required=True,
+    type=click.Path(file_okay=False, readable=True, path_type=Path),
+    help="Folder containing generated API files.",
+)
+@click.option(
+    "-o",
+    "--output-file",
+    default="routes.json",
+    show_default=True,
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    help="Output path for the route index.",
+)
+@click.option(
+    "-e",
+    "--exclude-file",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False, readable=True, path_type=Path),
+    help="TOML file listing spec filenames to exclude from the index.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Worker processes to parse with; 0 uses one per CPU.",
+)
+def generate_routes(
+    apis_folder: Path, output_file: Path, exclude_file: Path | None, jobs: int
+) -> None:
+    """Write a machine-readable route index (Canvas path -> generated method).
+
+    The JSON holds every operation's HTTP method, path template, module, class,
+    method name and summary, plus a compiled route trie. Load it with
+    canopy.routes.RouteIndex.load() or query it with route-lookup/route-search.
+    Async modules are only indexed when their sync counterpart is missing.
+    """
+    api_files = _collect_api_files(apis_folder, False, False, load_excluded_specs(exclude_file))
+    sync_stems = {p.stem for p in api_files if "_async" not in p.stem}
+    api_files = [p for p in api_files if "_async" not in p.stem or p.stem[:-6] not in sync_stems]
+    routes: list[dict] = []
+    with process_map(_route_entries, api_files, jobs) as results:
+        for path, entries in zip(api_files, results, strict=True):
+            if entries is None:
+                click.echo(f"  ⚠ Skipped {path.name} (parse error)", err=True)
+                continue
+            routes.extend(entries)
+    output_file.write_text(RouteIndex(routes).to_json(), encoding="utf-8")
+    size_kb = output_file.stat().st_size / 1024
+    click.echo(f"✓ Indexed {len(routes)} routes → {output_file} ({size_kb:.1f} KB)")
+
+
+def _format_route(route: dict) -> str:
+    line = f"{route['module']}.{route['method']}  {route['http_method']} {route['path']}"
+    return f"{line}  # {route['summary']}" if route.get("summary") else line
+
+
+@cli.command("route-lookup")
+@click.argument("method")
+@click.argument("path")
+@click.option(
+    "-r",
+    "--routes-file",
+    default="routes.json",
+    show_default=True,
+    type=click.Path(exists=True, dir_okay=False, readable=True, path_type=Path),
+    help="Route index written by generate-routes.",
+)
+def route_lookup(method: str, path: str, routes_file: Path) -> None:
+    """Find the generated method for a request, e.g. GET /api/v1/courses/1/assignments."""
+    match = RouteIndex.load(routes_file).lookup(method, path)
+    if match is None:
+        raise click.ClickException(f"No route matches {method.upper()} {path}")
+    route, params = match
+    click.echo(_format_route(route))
+    for name, value in params.items():
+        click.echo(f"  {name} = {value}")
+
+
+@cli.command("route-search")
+@click.argument("query")
+@click.option(
+    "-r",
+    "--routes-file",
+    default="routes.json",
+    show_default=True,
+    type=click.Path(exists=True, dir_okay=False, readable=True, path_type=Path),
+    help="Route index written by generate-routes.",
+)
+@click.option("-n", "--limit", default=10, show_default=True, help="Maximum results.")
+def route_search(query: str, routes_file: Path, limit: int) -> None:
+    """Search method names, paths and summaries, e.g. "list submissions"."""
+    for route in RouteIndex.load(routes_file).search(query, limit):
+        click.echo(_format_route(route))
+
+
 @cli.command()
 @click.option(
     "-o",
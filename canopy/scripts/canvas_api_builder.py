@@ -1,16 +1,25 @@
+import functools
+import hashlib
+import importlib.metadata
 import json
 import keyword
 import random
-import time
 import tomllib
+from collections.abc import Awaitable, Callable
 from operator import itemgetter
 from pathlib import Path
 from typing import IO
 
+import anyio
 import click
 import httpx
 from jinja2 import Environment, FileSystemLoader, PackageLoader
 
+from canopy.canopy import _retry_after
+from canopy.dynamic import dump_bundle
+from canopy.scripts.openapi import load_openapi_specs
+from canopy.scripts.parallel import process_map
+
 
 def load_excluded_specs(exclude_file: Path | None) -> set[str]:
     """Load a set of excluded spec filenames from a TOML file.
@@ -59,6 +68,69 @@ def service_param_string(params: list[dict]) -> str:
     return ", ".join(p + k)
 
 
+def plan_mode(op: dict) -> str:
+    """Response handling for an operation: ``all_pages``, ``poly``, ``single`` or ``plain``."""
+    op_type = op.get("type") or ""
+    if op_type == "array":
+        return "all_pages"
+    if op_type == "void":
+        return "poly"
+    if op_type[:1].isupper():
+        return "single"
+    return "plain"
+
+
+def wire_name(param: dict) -> str:
+    """Name a parameter is sent under on the wire.
+
+    Canvas reads repeated ``name[]`` keys as a list, so query and form params
+    the spec marks as arrays (``type: array`` or ``items``) get the suffix;
+    ``include`` always takes a list. httpx repeats the key for each list item.
+    """
+    name = param["name"]
+    if param.get("paramType") not in ("query", "form") or name.endswith("[]"):
+        return name
+    if (
+        param.get("type") == "array"
+        or "items" in param
+        or (param.get("paramType") == "query" and name == "include")
+    ):
+        return f"{name}[]"
+    return name
+
+
+def bundle_operations(spec: dict) -> dict[str, list]:
+    """Reduce a spec to the operation table read by ``canopy.dynamic.DynamicCanvasClient``.
+
+    Maps each nickname to ``[method, path, mode, summary, fields]`` where every
+    field is ``[wire_name, location, enum, is_datetime, required, arg_name, default]``
+    in spec order, the same data a ``--plans`` module bakes into its RequestPlan.
+    """
+    operations = {}
+    for api in spec.get("apis", []):
+        for op in api.get("operations", []):
+            fields = [
+                [
+                    wire_name(param),
+                    param.get("paramType"),
+                    param.get("enum") or None,
+                    (param.get("type") or "").lower() == "datetime",
+                    param.get("required") is True,
+                    fix_param_name(param["name"]),
+                    param.get("default"),
+                ]
+                for param in op.get("parameters", [])
+            ]
+            operations[op["nickname"]] = [
+                op["method"].upper(),
+                f"/api{api['path']}",
+                plan_mode(op),
+                op.get("summary", ""),
+                fields,
+            ]
+    return operations
+
+
 def get_jinja_env() -> Environment:
     try:
         loader: PackageLoader | FileSystemLoader = PackageLoader("canopy", "templates")
@@ -67,6 +139,8 @@ def get_jinja_env() -> Environment:
     env = Environment(loader=loader, trim_blocks=True, lstrip_blocks=True)
     env.filters["fix_param_name"] = fix_param_name
     env.filters["service_param_string"] = service_param_string
+    env.filters["plan_mode"] = plan_mode
+    env.filters["wire_name"] = wire_name
     return env
 
 
@@ -75,6 +149,250 @@ def _snake_to_pascal(name: str) -> str:
     return "".join(part.capitalize() for part in name.split("_"))
 
 
+def _write_if_changed(path: Path, content: str) -> bool:
+    """Write *content* to *path* unless it already holds exactly that; return whether it wrote."""
+    try:
+        if path.read_text(encoding="utf-8") == content:
+            return False
+    except FileNotFoundError:
+        pass
+    path.write_text(content, encoding="utf-8")
+    return True
+
+
+def _output_names(api_file_name: str, generate_async: bool, compact: bool) -> list[str]:
+    file_name = f"{api_file_name}_async" if generate_async else api_file_name
+    return [f"{file_name}.py", f"{file_name}.pyi"] if compact else [f"{file_name}.py"]
+
+
+def render_api(
+    env: Environment,
+    api_spec: dict,
+    api_file_name: str,
+    output_dir: Path,
+    name: str | None = None,
+    generate_async: bool = False,
+    plans: bool = False,
+    compact: bool = False,
+) -> bool:
+    """Render one spec into ``<api_file_name>[_async].py`` (plus a ``.pyi`` stub when compact).
+
+    Files whose content would not change are left untouched, so their
+    ``__pycache__`` entries stay valid. A stub left by an earlier compact build
+    is removed, since type checkers would read it instead of the module.
+    Returns whether anything was written or removed.
+    """
+    if name is None:
+        name = _snake_to_pascal(api_file_name)
+    if not generate_async:
+        file_name = api_file_name
+        api_template = env.get_template("canopy_api.py.jinja2")
+    else:
+        file_name = f"{api_file_name}_async"
+        api_template = env.get_template("canopy_api_async.py.jinja2")
+    changed = _write_if_changed(
+        output_dir / f"{file_name}.py",
+        api_template.render(
+            spec=api_spec, api_name=name, api_file_name=file_name, plans=plans, compact=compact
+        ),
+    )
+    if compact:
+        stub_template = env.get_template("canopy_api.pyi.jinja2")
+        changed |= _write_if_changed(
+            output_dir / f"{file_name}.pyi",
+            stub_template.render(spec=api_spec, api_name=name, is_async=generate_async),
+        )
+    else:
+        stub = output_dir / f"{file_name}.pyi"
+        if stub.exists():
+            stub.unlink()
+            changed = True
+    return changed
+
+
+# ── Build manifest ──────────────────────────────────────────────────
+# Each output directory keeps a manifest of what its files were rendered
+# from: the canopy version, a digest of the templates, and per output the
+# spec hash and build options. Outputs whose inputs all match are skipped.
+
+MANIFEST_NAME = ".canopy_build.json"
+
+
+@functools.cache
+def canopy_version() -> str:
+    try:
+        return importlib.metadata.version("canopy")
+    except importlib.metadata.PackageNotFoundError:
+        return "unknown"
+
+
+@functools.cache
+def templates_digest() -> str:
+    """SHA-256 over every template, since the API templates import shared macros."""
+    digest = hashlib.sha256()
+    for path in sorted((Path(__file__).parent.parent / "templates").glob("*.jinja2")):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def spec_files(specs_dir: Path) -> list[Path]:
+    """The ``*.json`` specs in *specs_dir*, sorted, skipping dotfiles such as tool manifests."""
+    return sorted(p for p in specs_dir.glob("*.json") if not p.name.startswith("."))
+
+
+def load_manifest(output_dir: Path) -> dict[str, dict]:
+    """Return the recorded outputs of *output_dir*, or {} if they were built by other inputs."""
+    try:
+        manifest = json.loads((output_dir / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    if manifest.get("canopy") != canopy_version() or manifest.get("templates") != (
+        templates_digest()
+    ):
+        return {}
+    return manifest.get("outputs", {})
+
+
+def save_manifest(output_dir: Path, outputs: dict[str, dict]) -> None:
+    manifest = {
+        "canopy": canopy_version(),
+        "templates": templates_digest(),
+        "outputs": dict(sorted(outputs.items())),
+    }
+    _write_if_changed(output_dir / MANIFEST_NAME, json.dumps(manifest, indent=2) + "\n")
+
+
+def build_api(
+    env: Environment,
+    spec_bytes: bytes,
+    api_file_name: str,
+    output_dir: Path,
+    name: str | None,
+    generate_async: bool,
+    plans: bool,
+    compact: bool,
+    recorded: dict | None,
+    force: bool = False,
+) -> tuple[str, dict]:
+    """Render one spec unless *recorded* shows its outputs are already current.
+
+    Returns ``(status, entry)`` where *status* is ``"skipped"`` (inputs
+    unchanged), ``"identical"`` (rendered, same content) or ``"written"``, and
+    *entry* is the manifest record for the output.
+    """
+    entry = {
+        "spec": hashlib.sha256(spec_bytes).hexdigest(),
+        "options": [generate_async, plans, compact, name],
+    }
+    outputs = _output_names(api_file_name, generate_async, compact)
+    if not force and recorded == entry and all((output_dir / o).exists() for o in outputs):
+        return "skipped", entry
+    changed = render_api(
+        env,
+        json.loads(spec_bytes),
+        api_file_name,
+        output_dir,
+        name=name,
+        generate_async=generate_async,
+        plans=plans,
+        compact=compact,
+    )
+    return ("written" if changed else "identical"), entry
+
+
+# One Jinja environment per process; it also caches the compiled templates
+_worker_env: Environment | None = None
+
+
+def _render_job(
+    job: tuple[Path, Path, bool, bool, bool, dict | None, bool],
+) -> tuple[str, dict | str]:
+    """Run :func:`build_api` for one job tuple from :func:`run_build_jobs`.
+
+    Runs in the main process or a pool worker and returns ``(status, entry)``,
+    or ``("failed", message)`` instead of raising, so one bad spec does not
+    stop the others.
+    """
+    global _worker_env
+    if _worker_env is None:
+        _worker_env = get_jinja_env()
+    spec_path, output_dir, generate_async, plans, compact, recorded, force = job
+    try:
+        status, entry = build_api(
+            _worker_env,
+            spec_path.read_bytes(),
+            spec_path.stem,
+            output_dir,
+            None,
+            generate_async,
+            plans,
+            compact,
+            recorded,
+            force,
+        )
+    except Exception as e:
+        return "failed", f"{type(e).__name__}: {e}"
+    return status, entry
+
+
+def _report(spec_name: str, generate_async: bool, status: str) -> None:
+    kind = "async code" if generate_async else "code"
+    if status == "skipped":
+        click.echo(f"Skipping unchanged {kind} for spec: {spec_name}")
+    else:
+        click.echo(f"Generating {kind} for spec: {spec_name}")
+
+
+def run_build_jobs(
+    specs: list[tuple[Path, bool]],
+    output_dir: Path,
+    plans: bool,
+    compact: bool,
+    force: bool,
+    workers: int,
+) -> None:
+    """Build ``(spec_path, generate_async)`` pairs into *output_dir* across *workers* processes.
+
+    *workers* of 0 means one per CPU. Results are reported in job order and
+    the manifest is updated once at the end; failures are collected and
+    reported together once every job has run.
+    """
+    recorded = load_manifest(output_dir)
+    jobs = []
+    for spec_path, generate_async in specs:
+        (output,) = _output_names(spec_path.stem, generate_async, False)
+        jobs.append(
+            (spec_path, output_dir, generate_async, plans, compact, recorded.get(output), force)
+        )
+    errors = []
+    counts = dict.fromkeys(("written", "identical", "skipped"), 0)
+    try:
+        with process_map(_render_job, jobs, workers) as results:
+            for (spec_path, generate_async), (status, entry) in zip(specs, results, strict=True):
+                _report(spec_path.name, generate_async, status)
+                (output,) = _output_names(spec_path.stem, generate_async, False)
+                if isinstance(entry, str):
+                    click.echo(f"  ✗ {entry}")
+                    errors.append(
+                        f"{spec_path.name}{' (async)' if generate_async else ''}: {entry}"
+                    )
+                    recorded.pop(output, None)
+                else:
+                    counts[status] += 1
+                    recorded[output] = entry
+    finally:
+        save_manifest(output_dir, recorded)
+    click.echo(
+        f"{counts['written']} written, {counts['identical']} identical, "
+        f"{counts['skipped']} up to date"
+    )
+    if errors:
+        raise click.ClickException(
+            f"{len(errors)} of {len(jobs)} spec(s) failed:\n" + "\n".join(errors)
+        )
+
+
 # Build Single API file
 @click.command()
 @click.option(
@@ -100,38 +418,52 @@ def _snake_to_pascal(name: str) -> str:
 @click.option(
     "--async", "generate_async", is_flag=True, default=False, help="Generate async version."
 )
+@click.option(
+    "--plans",
+    is_flag=True,
+    default=False,
+    help="Emit a precomputed RequestPlan per operation and dispatch through it.",
+)
+@click.option(
+    "--compact",
+    is_flag=True,
+    default=False,
+    help="Emit modules without docstrings or comments, with the docs in a .pyi stub.",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    default=False,
+    help="Render every output even if its spec, templates and options are unchanged.",
+)
 def build(
     spec: IO[str],
     name: str | None,
     output_dir: Path,
     generate_async: bool,
+    plans: bool,
+    compact: bool,
+    force: bool,
 ) -> None:
     """Build a single API file from a spec file."""
     spec_path = Path(spec.name)
-    base_name = spec_path.name
-    api_file_name = spec_path.stem
-
-    if name is None:
-        name = _snake_to_pascal(api_file_name)
-
-    api_spec = json.load(spec)
-    env = get_jinja_env()
-
-    if not generate_async:
-        click.echo(f"Generating code for spec: {base_name}")
-        output_path = output_dir / f"{api_file_name}.py"
-        api_template = env.get_template("canopy_api.py.jinja2")
-        output_path.write_text(
-            api_template.render(spec=api_spec, api_name=name, api_file_name=api_file_name)
-        )
-    else:
-        click.echo(f"Generating async code for spec: {base_name}")
-        async_file_name = f"{api_file_name}_async"
-        output_path = output_dir / f"{async_file_name}.py"
-        api_template = env.get_template("canopy_api_async.py.jinja2")
-        output_path.write_text(
-            api_template.render(spec=api_spec, api_name=name, api_file_name=async_file_name)
-        )
+    recorded = load_manifest(output_dir)
+    (output,) = _output_names(spec_path.stem, generate_async, False)
+    status, entry = build_api(
+        get_jinja_env(),
+        spec.read().encode("utf-8"),
+        spec_path.stem,
+        output_dir,
+        name,
+        generate_async,
+        plans,
+        compact,
+        recorded.get(output),
+        force,
+    )
+    _report(spec_path.name, generate_async, status)
+    recorded[output] = entry
+    save_manifest(output_dir, recorded)
 
 
 # Build Canvas Client file
@@ -152,7 +484,11 @@ def client(apis_dir: Path) -> None:
 
     generated_api_files = []
     for api_path in apis_dir.iterdir():
-        if api_path.name not in excluded_files and api_path.suffix == ".py":
+        if (
+            api_path.name not in excluded_files
+            and api_path.suffix == ".py"
+            and not api_path.name.startswith(".")
+        ):
             generated_api_files.append(
                 {
                     "base_name": api_path.stem,
@@ -196,31 +532,54 @@ def client(apis_dir: Path) -> None:
     type=click.Path(exists=True, dir_okay=False, readable=True, path_type=Path),
     help="TOML file listing spec filenames to exclude from processing.",
 )
-@click.pass_context
+@click.option(
+    "--plans",
+    is_flag=True,
+    default=False,
+    help="Emit a precomputed RequestPlan per operation and dispatch through it.",
+)
+@click.option(
+    "--compact",
+    is_flag=True,
+    default=False,
+    help="Emit modules without docstrings or comments, with the docs in a .pyi stub.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Worker processes to render with; 0 uses one per CPU.",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    default=False,
+    help="Render every output even if its spec, templates and options are unchanged.",
+)
 def build_all(
-    ctx: click.Context,
     specs_dir: Path,
     output_dir: Path,
     generate_async: bool,
     exclude_file: Path | None,
+    plans: bool,
+    compact: bool,
+    jobs: int,
+    force: bool,
 ) -> None:
     """Build all API files from a directory of spec files."""
     excluded = load_excluded_specs(exclude_file)
     if excluded:
         click.echo(f"Excluding {len(excluded)} spec(s): {', '.join(sorted(excluded))}")
 
-    for spec_path in specs_dir.iterdir():
+    specs = []
+    for spec_path in spec_files(specs_dir):
         if spec_path.name in excluded:
             click.echo(f"Skipping excluded spec: {spec_path.name}")
             continue
-        with spec_path.open() as f:
-            ctx.invoke(
-                build,
-                spec=f,
-                name=None,
-                output_dir=output_dir,
-                generate_async=generate_async,
-            )
+        specs.append((spec_path, generate_async))
+    run_build_jobs(specs, output_dir, plans, compact, force, jobs)
 
 
 # Rebuild APIs
@@ -246,12 +605,40 @@ def build_all(
     type=click.Path(exists=True, dir_okay=False, readable=True, path_type=Path),
     help="TOML file listing spec filenames to exclude from processing.",
 )
-@click.pass_context
+@click.option(
+    "--plans",
+    is_flag=True,
+    default=False,
+    help="Emit a precomputed RequestPlan per operation and dispatch through it.",
+)
+@click.option(
+    "--compact",
+    is_flag=True,
+    default=False,
+    help="Emit modules without docstrings or comments, with the docs in a .pyi stub.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Worker processes to render with; 0 uses one per CPU.",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    default=False,
+    help="Render every output even if its spec, templates and options are unchanged.",
+)
 def rebuild(
-    ctx: click.Context,
     specs_dir: Path,
     apis_dir: Path,
     exclude_file: Path | None,
+    plans: bool,
+    compact: bool,
+    jobs: int,
+    force: bool,
 ) -> None:
     """Rebuild all API files from existing spec files."""
     excluded_files = {"canvas_client.py", "__init__.py"}
@@ -259,8 +646,14 @@ def rebuild(
     if excluded_specs:
         click.echo(f"Excluding {len(excluded_specs)} spec(s): {', '.join(sorted(excluded_specs))}")
 
-    for api_path in apis_dir.iterdir():
-        if not api_path.is_file() or api_path.name in excluded_files:
+    specs = []
+    for api_path in sorted(apis_dir.iterdir()):
+        if (
+            not api_path.is_file()
+            or api_path.suffix != ".py"
+            or api_path.name.startswith(".")
+            or api_path.name in excluded_files
+        ):
             continue
         is_async = "async" in api_path.stem
         base_stem = api_path.stem.replace("_async", "") if is_async else api_path.stem
@@ -268,18 +661,281 @@ def rebuild(
         if spec_filename in excluded_specs:
             click.echo(f"Skipping excluded spec: {spec_filename}")
             continue
-        spec_path = specs_dir / spec_filename
-        with spec_path.open() as f:
-            ctx.invoke(
-                build,
-                spec=f,
-                name=None,
-                output_dir=apis_dir,
-                generate_async=is_async,
-            )
+        specs.append((specs_dir / spec_filename, is_async))
+    run_build_jobs(specs, apis_dir, plans, compact, force, jobs)
+
+
+# Build APIs from the OpenAPI document
+@click.command("build-openapi")
+@click.option(
+    "-i",
+    "--openapi",
+    "source",
+    required=True,
+    type=click.Path(exists=True, dir_okay=False, readable=True, path_type=Path),
+    help="OpenAPI 3 document (YAML or JSON), e.g. canvas.openapi.yaml.",
+)
+@click.option(
+    "-o",
+    "--output-dir",
+    required=True,
+    type=click.Path(file_okay=False, writable=True, path_type=Path),
+    help="Directory to output the generated API files to.",
+)
+@click.option(
+    "--ir-dir",
+    default=None,
+    type=click.Path(file_okay=False, writable=True, path_type=Path),
+    help="Where to cache the per-resource specs. Defaults to <openapi stem>.specs/ beside it.",
+)
+@click.option(
+    "--async", "generate_async", is_flag=True, default=False, help="Generate async versions."
+)
+@click.option(
+    "-e",
+    "--exclude-file",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False, readable=True, path_type=Path),
+    help="TOML file listing resource spec filenames (e.g. quizzes.json) to exclude.",
+)
+@click.option(
+    "--plans",
+    is_flag=True,
+    default=False,
+    help="Emit a precomputed RequestPlan per operation and dispatch through it.",
+)
+@click.option(
+    "--compact",
+    is_flag=True,
+    default=False,
+    help="Emit modules without docstrings or comments, with the docs in a .pyi stub.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=0),
+    help="Worker processes to render with; 0 uses one per CPU.",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    default=False,
+    help="Render every output even if its spec, templates and options are unchanged.",
+)
+def build_openapi(
+    source: Path,
+    output_dir: Path,
+    ir_dir: Path | None,
+    generate_async: bool,
+    exclude_file: Path | None,
+    plans: bool,
+    compact: bool,
+    jobs: int,
+    force: bool,
+) -> None:
+    """Build API files from the OpenAPI document made by tools/canvas-spec-gen.
+
+    The document is split by tag into one spec per resource, cached in
+    --ir-dir, and rendered with the same templates as build-all.
+    """
+    if ir_dir is None:
+        ir_dir = source.with_name(f"{source.name.split('.')[0]}.specs")
+    try:
+        spec_paths, reused = load_openapi_specs(source, ir_dir)
+    except ImportError as e:
+        raise click.ClickException(str(e)) from None
+    if reused:
+        click.echo(f"{source.name} unchanged, using {len(spec_paths)} cached spec(s) in {ir_dir}")
+    else:
+        click.echo(f"Split {source.name} into {len(spec_paths)} spec(s) in {ir_dir}")
+
+    excluded = load_excluded_specs(exclude_file)
+    specs = []
+    for spec_path in spec_paths:
+        if spec_path.name in excluded:
+            click.echo(f"Skipping excluded spec: {spec_path.name}")
+            continue
+        specs.append((spec_path, generate_async))
+    run_build_jobs(specs, output_dir, plans, compact, force, jobs)
+
+
+# Build a spec bundle for DynamicCanvasClient
+@click.command()
+@click.option(
+    "-s",
+    "--specs-dir",
+    required=True,
+    type=click.Path(file_okay=False, readable=True, path_type=Path),
+    help="Directory containing spec files.",
+)
+@click.option(
+    "-o",
+    "--output",
+    required=True,
+    type=click.Path(dir_okay=False, writable=True, path_type=Path),
+    help="Bundle file to write (e.g. canvas.bundle).",
+)
+@click.option(
+    "-e",
+    "--exclude-file",
+    default=None,
+    type=click.Path(exists=True, dir_okay=False, readable=True, path_type=Path),
+    help="TOML file listing spec filenames to exclude from processing.",
+)
+def bundle(specs_dir: Path, output: Path, exclude_file: Path | None) -> None:
+    """Preprocess spec files into one bundle for DynamicCanvasClient."""
+    excluded = load_excluded_specs(exclude_file)
+    if excluded:
+        click.echo(f"Excluding {len(excluded)} spec(s): {', '.join(sorted(excluded))}")
+
+    apis = {}
+    for spec_path in spec_files(specs_dir):
+        if spec_path.name in excluded:
+            click.echo(f"Skipping excluded spec: {spec_path.name}")
+            continue
+        with spec_path.open(encoding="utf-8") as f:
+            apis[spec_path.stem] = bundle_operations(json.load(f))
+    output.write_bytes(dump_bundle(apis))
+    click.echo(f"Wrote {len(apis)} API(s) to {output}")
 
 
 # Fetch spec files
+SPECS_BASE_URL = "https://canvas.instructure.com/doc/api/"
+FETCH_MANIFEST_NAME = ".canopy_fetch.json"
+
+
+async def _fetch_spec(
+    client: httpx.AsyncClient,
+    name: str,
+    specs_dir: Path,
+    validators: dict[str, str] | None,
+    pace: Callable[[], Awaitable[None]],
+    max_wait: float,
+    poll_interval: float,
+) -> tuple[str, dict[str, str] | None]:
+    """Download one spec, conditionally when *validators* from a previous fetch exist.
+
+    Returns ``(status, validators)``. The status is ``"updated"``,
+    ``"unchanged"`` or a failure description.
+    """
+    headers = {}
+    if validators:
+        if "etag" in validators:
+            headers["If-None-Match"] = validators["etag"]
+        if "last_modified" in validators:
+            headers["If-Modified-Since"] = validators["last_modified"]
+    waited = 0.0
+    interval = poll_interval
+    while True:
+        await pace()
+        try:
+            r = await client.get(name, headers=headers)
+        except httpx.HTTPError as e:
+            return f"failed ({type(e).__name__})", validators
+        if r.status_code == 304:
+            return "unchanged", validators
+        if r.status_code == 200:
+            fresh = {
+                key: r.headers[header]
+                for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified"))
+                if header in r.headers
+            }
+            spec_path = specs_dir / name
+            if spec_path.exists() and spec_path.read_bytes() == r.content:
+                return "unchanged", fresh
+            spec_path.write_bytes(r.content)
+            return "updated", fresh
+        if r.status_code not in (202, 429, 503):
+            return f"failed (status {r.status_code})", validators
+        # The docs server answers 202 while it generates a spec: poll, honouring
+        # Retry-After when given, otherwise backing off exponentially with jitter
+        delay = _retry_after(r)
+        if delay is None:
+            delay = interval * random.uniform(0.5, 1.5)
+            interval = min(interval * 2, 30.0)
+        if waited + delay > max_wait:
+            return f"gave up after {waited:.0f}s (status {r.status_code})", validators
+        waited += delay
+        await anyio.sleep(delay)
+
+
+async def fetch_specs_async(
+    specs_dir: Path,
+    spec_names: list[str] | None,
+    excluded: set[str],
+    concurrency: int = 4,
+    delay: float = 0.5,
+    max_wait: float = 300.0,
+    force: bool = False,
+    poll_interval: float = 2.0,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> dict[str, str]:
+    """Fetch *spec_names* (or every spec in the docs index) into *specs_dir*.
+
+    At most *concurrency* downloads run at once and request starts are spaced
+    at least *delay* seconds apart. ETag/Last-Modified validators are kept in a
+    manifest in *specs_dir* so unchanged specs cost a 304. Returns each spec's
+    status.
+    """
+    manifest_path = specs_dir / FETCH_MANIFEST_NAME
+    try:
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        manifest = {}
+    limiter = anyio.CapacityLimiter(concurrency)
+    pace_lock = anyio.Lock()
+    next_start = 0.0
+    results: dict[str, str] = {}
+
+    async def pace() -> None:
+        nonlocal next_start
+        async with pace_lock:
+            now = anyio.current_time()
+            wait = next_start - now
+            next_start = max(now, next_start) + delay
+            if wait > 0:
+                await anyio.sleep(wait)
+
+    async with httpx.AsyncClient(
+        base_url=SPECS_BASE_URL, transport=transport, timeout=30.0, follow_redirects=True
+    ) as client:
+        if spec_names is None:
+            index = await client.get("api-docs.json")
+            index.raise_for_status()
+            spec_names = [s["path"][1:] for s in index.json()["apis"]]
+        if excluded:
+            before = len(spec_names)
+            spec_names = [n for n in spec_names if n not in excluded]
+            click.echo(f"Excluding {before - len(spec_names)} spec(s) from download.")
+        click.echo(f"Fetching {len(spec_names)} spec(s), {concurrency} at a time...")
+
+        async def fetch(name: str) -> None:
+            async with limiter:
+                # Validators only describe a file we still have; a deleted spec needs a full GET
+                validators = None
+                if not force and (specs_dir / name).exists():
+                    validators = manifest.get(name)
+                status, validators = await _fetch_spec(
+                    client, name, specs_dir, validators, pace, max_wait, poll_interval
+                )
+            results[name] = status
+            if validators:
+                manifest[name] = validators
+            else:
+                manifest.pop(name, None)
+            mark = {"updated": "✓", "unchanged": "="}.get(status, "✗")
+            click.echo(f"  {mark} {name}: {status}")
+
+        async with anyio.create_task_group() as tg:
+            for name in spec_names:
+                tg.start_soon(fetch, name)
+
+    manifest_path.write_text(json.dumps(dict(sorted(manifest.items())), indent=2) + "\n")
+    return results
+
+
 @click.command("fetch-specs")
 @click.option(
     "-s",
@@ -300,50 +956,62 @@ def rebuild(
     type=click.Path(exists=True, dir_okay=False, readable=True, path_type=Path),
     help="TOML file listing spec filenames to exclude from downloading.",
 )
-def fetch_specs(specs_dir: Path, spec: str | None, exclude_file: Path | None) -> None:
+@click.option(
+    "-c",
+    "--concurrency",
+    default=4,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Maximum downloads in flight at once.",
+)
+@click.option(
+    "--delay",
+    default=0.5,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help="Minimum seconds between the start of two requests.",
+)
+@click.option(
+    "--max-wait",
+    default=300.0,
+    show_default=True,
+    type=click.FloatRange(min=0),
+    help="Longest time in seconds to keep polling a spec the server answers with 202.",
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    default=False,
+    help="Download every spec even if the manifest says it is unchanged.",
+)
+def fetch_specs(
+    specs_dir: Path,
+    spec: str | None,
+    exclude_file: Path | None,
+    concurrency: int,
+    delay: float,
+    max_wait: float,
+    force: bool,
+) -> None:
     """Fetch spec files from the Instructure Canvas API docs."""
-    base_url = "https://canvas.instructure.com/doc/api/"
     excluded = load_excluded_specs(exclude_file)
-
-    if spec:
-        spec_names = [spec]
-    else:
-        spec_names = [s["path"][1:] for s in httpx.get(f"{base_url}api-docs.json").json()["apis"]]
-
-    if excluded:
-        before = len(spec_names)
-        spec_names = [n for n in spec_names if n not in excluded]
-        click.echo(f"Excluding {before - len(spec_names)} spec(s) from download.")
-
-    total = len(spec_names)
-    for i, name in enumerate(spec_names, 1):
-        click.echo(f"Fetching {name} ({i}/{total})...")
-
-        retries = 3
-        for attempt in range(1, retries + 1):
-            r = httpx.get(f"{base_url}{name}")
-
-            if r.status_code == 200:
-                spec_path = specs_dir / name
-                spec_path.write_bytes(r.content)
-                click.echo(f"  ✓ Updated {spec_path}")
-                break
-            elif r.status_code == 202:
-                wait = 30 * attempt  # 30s, 60s, 90s backoff
-                click.echo(
-                    f"  ⚠ Rate limited (202) on attempt {attempt}/{retries}. Waiting {wait}s..."
-                )
-                time.sleep(wait)
-            else:
-                click.echo(f"  ✗ Failed to retrieve {name}. Status Code: {r.status_code}")
-                break
-        else:
-            click.echo(f"  ✗ Gave up on {name} after {retries} attempts.")
-
-        if i < total:
-            delay = random.uniform(2.0, 5.0)
-            click.echo(f"  Sleeping {delay:.1f}s before next request...")
-            time.sleep(delay)
+    results = anyio.run(
+        functools.partial(
+            fetch_specs_async,
+            specs_dir,
+            [spec] if spec else None,
+            excluded,
+            concurrency=concurrency,
+            delay=delay,
+            max_wait=max_wait,
+            force=force,
+        )
+    )
+    statuses = list(results.values())
+    updated, unchanged = statuses.count("updated"), statuses.count("unchanged")
+    click.echo(
+        f"{updated} updated, {unchanged} unchanged, {len(statuses) - updated - unchanged} failed"
+    )
 
 
 @click.group()
@@ -353,8 +1021,10 @@ def cli() -> None:
 
 cli.add_command(build)
 cli.add_command(build_all)
+cli.add_command(build_openapi)
 cli.add_command(rebuild)
 cli.add_command(client)
+cli.add_command(bundle)
 cli.add_command(fetch_specs)
 
 if __name__ == "__main__":
@@ -0,0 +1,215 @@
+"""Convert the OpenAPI 3 document from ``tools/canvas-spec-gen`` into per-resource specs.
+
+The API templates read the Swagger 1.2 layout that ``fetch-specs`` downloads
+(``spec["apis"][i]["operations"][j]``). :func:`openapi_to_specs` rewrites an
+OpenAPI document into that layout, one spec per tag, keeping only the fields
+the templates use. :func:`load_openapi_specs` caches the result as JSON files
+so later builds skip parsing the YAML.
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Any
+
+# Bump when the conversion changes so cached specs are regenerated
+IR_VERSION = 1
+INDEX_NAME = ".canopy_openapi.json"
+
+_METHODS = ("get", "put", "post", "patch", "delete", "head", "options")
+_NON_WORD = re.compile(r"\W+")
+
+
+def _resolve(document: dict, obj: Any) -> Any:
+    """Follow local ``$ref`` pointers (``#/components/...``) until a concrete object."""
+    seen = set()
+    while isinstance(obj, dict) and "$ref" in obj:
+        ref = obj["$ref"]
+        if ref in seen or not ref.startswith("#/"):
+            return {}
+        seen.add(ref)
+        obj = document
+        for part in ref[2:].split("/"):
+            obj = obj.get(part.replace("~1", "/").replace("~0", "~"), {})
+    return obj
+
+
+def _snake(text: str) -> str:
+    return _NON_WORD.sub("_", text).strip("_").lower()
+
+
+def _param_type(document: dict, schema: dict) -> dict[str, Any]:
+    """Swagger 1.2 ``type``/``enum``/``items`` keys for an OpenAPI schema."""
+    schema = _resolve(document, schema or {})
+    kind = schema.get("type")
+    fields: dict[str, Any] = {}
+    if kind == "array":
+        items = _resolve(document, schema.get("items") or {})
+        fields["type"] = "array"
+        fields["items"] = {"type": items.get("type", "string")}
+        if items.get("enum"):
+            fields["enum"] = list(items["enum"])
+    elif kind == "string" and schema.get("format") == "date-time":
+        fields["type"] = "DateTime"
+    else:
+        fields["type"] = kind or "string"
+    if schema.get("enum"):
+        fields["enum"] = list(schema["enum"])
+    return fields
+
+
+def _parameter(document: dict, name: str, location: str, required: bool, schema: dict) -> dict:
+    param: dict[str, Any] = {"name": name, "paramType": location, "required": required}
+    param.update(_param_type(document, schema))
+    # Array params are spelled ``ids[]`` in OpenAPI; the Swagger 1.2 specs use the bare
+    # name with ``type: array``, which is what the templates expect
+    if name.endswith("[]"):
+        param["name"] = name[:-2]
+        if param["type"] != "array":
+            param["items"] = {"type": param["type"]}
+            param["type"] = "array"
+    return param
+
+
+def _response_type(document: dict, responses: dict) -> str:
+    """Swagger 1.2 ``type`` of an operation: ``array``, a model name, a primitive or ``void``."""
+    for status in ("200", "201", "202", "2XX", "default"):
+        if status in responses:
+            response = _resolve(document, responses[status])
+            break
+    else:
+        return "void"
+    for media in (response.get("content") or {}).values():
+        schema = media.get("schema") or {}
+        if "$ref" in schema:
+            model = schema["$ref"].rsplit("/", 1)[-1]
+            return model[:1].upper() + model[1:]
+        kind = _resolve(document, schema).get("type")
+        if kind == "array":
+            return "array"
+        if kind in ("string", "integer", "number", "boolean"):
+            return kind
+        return "void"
+    return "void"
+
+
+def _operation(document: dict, method: str, path: str, op: dict, shared: list) -> dict:
+    nickname = op.get("operationId") or f"{method}_{path}"
+    nickname = _snake(nickname) if not nickname.isidentifier() else nickname
+    # An operation-level parameter replaces the path-level one with the same name and location
+    merged: dict[tuple[str, str], dict] = {}
+    for raw in [*shared, *op.get("parameters", [])]:
+        param = _resolve(document, raw)
+        merged[(param.get("name"), param.get("in"))] = param
+    parameters = []
+    for param in merged.values():
+        location = param.get("in")
+        if location not in ("path", "query"):
+            continue
+        parameters.append(
+            _parameter(
+                document,
+                param["name"],
+                location,
+                location == "path" or param.get("required") is True,
+                param.get("schema") or {},
+            )
+        )
+    # Canvas takes request bodies as form fields; every media type lists the same ones
+    body = _resolve(document, op.get("requestBody") or {})
+    for media in (body.get("content") or {}).values():
+        schema = _resolve(document, media.get("schema") or {})
+        required = set(schema.get("required", []))
+        for name, prop in (schema.get("properties") or {}).items():
+            parameters.append(_parameter(document, name, "form", name in required, prop))
+        break
+    return {
+        "nickname": nickname,
+        "summary": op.get("summary") or "",
+        "notes": op.get("description") or "",
+        "method": method.upper(),
+        "type": _response_type(document, op.get("responses") or {}),
+        "parameters": parameters,
+    }
+
+
+def openapi_to_specs(document: dict) -> dict[str, dict]:
+    """Split an OpenAPI 3 *document* into Swagger 1.2 style specs keyed by resource name.
+
+    Operations are grouped by their first tag (``"Assignment Groups"`` becomes
+    ``assignment_groups``), falling back to the first path segment after the
+    version. Paths lose any leading ``/api`` because the templates add it.
+    """
+    version = str((document.get("info") or {}).get("version", "1.0"))
+    specs: dict[str, dict] = {}
+    for path, item in (document.get("paths") or {}).items():
+        item = _resolve(document, item)
+        spec_path = path[4:] if path.startswith("/api/") else path
+        shared = item.get("parameters", [])
+        for method in _METHODS:
+            op = item.get(method)
+            if op is None:
+                continue
+            tags = op.get("tags") or []
+            if tags:
+                resource = _snake(tags[0])
+            else:
+                segments = [s for s in spec_path.split("/") if s and not s.startswith("{")]
+                resource = _snake(segments[1] if len(segments) > 1 else segments[0])
+            spec = specs.setdefault(resource, {"apiVersion": version, "apis": []})
+            apis = spec["apis"]
+            if not apis or apis[-1]["path"] != spec_path:
+                apis.append({"path": spec_path, "operations": []})
+            apis[-1]["operations"].append(_operation(document, method, spec_path, op, shared))
+    return dict(sorted(specs.items()))
+
+
+def _parse(source: Path) -> dict:
+    if source.suffix == ".json":
+        return json.loads(source.read_bytes())
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError("Reading OpenAPI YAML requires PyYAML: install canopy[builder]") from None
+    # The C loader is an order of magnitude faster on the multi-megabyte Canvas document
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with source.open("rb") as f:
+        return yaml.load(f, Loader=loader)
+
+
+def load_openapi_specs(source: Path, ir_dir: Path) -> tuple[list[Path], bool]:
+    """Return the per-resource spec files for *source*, converting it only if it changed.
+
+    The specs are cached in *ir_dir* together with an index recording the hash
+    of *source*; when the hash and :data:`IR_VERSION` match, the cached files
+    are returned without parsing. Returns ``(spec_paths, reused)``.
+    """
+    digest = hashlib.sha256(source.read_bytes()).hexdigest()
+    index_path = ir_dir / INDEX_NAME
+    try:
+        index = json.loads(index_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        index = {}
+    if index.get("source") == digest and index.get("version") == IR_VERSION:
+        paths = [ir_dir / f"{name}.json" for name in index.get("resources", [])]
+        if all(p.exists() for p in paths):
+            return paths, True
+
+    specs = openapi_to_specs(_parse(source))
+    ir_dir.mkdir(parents=True, exist_ok=True)
+    for stale in set(index.get("resources", [])) - specs.keys():
+        (ir_dir / f"{stale}.json").unlink(missing_ok=True)
+    paths = []
+    for name, spec in specs.items():
+        path = ir_dir / f"{name}.json"
+        content = json.dumps(spec, separators=(",", ":"))
+        # Unchanged resources keep their bytes, so the build manifest still skips them
+        if not path.exists() or path.read_text(encoding="utf-8") != content:
+            path.write_text(content, encoding="utf-8")
+        paths.append(path)
+    index_path.write_text(
+        json.dumps({"source": digest, "version": IR_VERSION, "resources": list(specs)}),
+        encoding="utf-8",
+    )
+    return paths, False
@@ -0,0 +1,33 @@
+"""Process pool shared by the per-file work in canopy_build and canopy_docs."""
+
+import multiprocessing
+import os
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+
+@contextmanager
+def process_map[T, R](
+    func: Callable[[T], R], items: list[T], workers: int
+) -> Iterator[Iterator[R]]:
+    """Yield ``map(func, items)`` run across *workers* processes (0 = one per CPU).
+
+    Results come back in item order. With a single worker everything runs in
+    this process; otherwise work not yet started is cancelled on exit.
+    """
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(items))
+    if workers <= 1:
+        yield map(func, items)
+        return
+    # spawn: forking a process that may already run threads can deadlock the child
+    executor = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+    try:
+        # Workers take several items per round trip; map still yields in item order
+        yield executor.map(func, items, chunksize=max(1, len(items) // (workers * 4)))
+    finally:
+        executor.shutdown(cancel_futures=True)
@@ -1,12 +1,30 @@
 """Tests for canopy/canopy.py — CanvasAPIError and CanvasSession."""
 
 import json
+import threading
+import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import anyio
 import httpx
 import pytest
 
-from canopy import CanvasAPIError, CanvasSession
+from canopy import (
+    AdaptiveConcurrency,
+    CacheEntry,
+    CanvasAPIError,
+    CanvasSession,
+    DecodeOffload,
+    EntityCache,
+    FileCacheBackend,
+    HTTPCache,
+    MemoryCacheBackend,
+    RateLimitPacer,
+    RequestPlan,
+    RetryPolicy,
+    SingleFlight,
+    SQLiteCacheBackend,
+)
 
 # ── Helpers ─────────────────────────────────────────────────────────
 
@@ -16,11 +34,13 @@ def _mock_response(
     json_data=None,
     text: str = "",
     links: dict | None = None,
+    headers: dict | None = None,
 ) -> MagicMock:
     """Build a mock httpx.Response."""
     mock = MagicMock(spec=httpx.Response)
     mock.status_code = status_code
     mock.links = links or {}
+    mock.headers = httpx.Headers(headers or {})
     if json_data is not None:
         mock.json.return_value = json_data
     else:
@@ -34,6 +54,8 @@ def _mock_response_raise(status_code: int = 404, json_data=None) -> MagicMock:
     inner = _mock_response(status_code, json_data or {"errors": [{"message": "not found"}]})
     error = httpx.HTTPStatusError("error", request=MagicMock(), response=inner)
     outer = MagicMock(spec=httpx.Response)
+    outer.status_code = status_code
+    outer.headers = httpx.Headers()
     outer.raise_for_status.side_effect = error
     return outer
 
@@ -135,6 +157,53 @@ class TestCanvasSessionInit:
         assert isinstance(client, httpx.AsyncClient)
         assert s.async_session is client
 
+    def test_timeout_float_applies_to_every_phase(self):
+        s = CanvasSession("https://canvas.example.com", "token", timeout=12.0)
+        assert s.session.timeout == httpx.Timeout(12.0)
+
+    def test_per_phase_timeout(self):
+        timeout = httpx.Timeout(30.0, connect=2.0)
+        s = CanvasSession("https://canvas.example.com", "token", timeout=timeout)
+        assert s.async_session.timeout.connect == 2.0
+        assert s.async_session.timeout.read == 30.0
+
+    def test_pool_limits(self):
+        s = CanvasSession(
+            "https://canvas.example.com", "token", max_connections=200, keepalive_expiry=30
+        )
+        assert s.limits.max_connections == 200
+        assert s.limits.keepalive_expiry == 30
+
+    def test_custom_transport(self):
+        def handler(request):
+            return httpx.Response(200, json={"path": request.url.path})
+
+        s = CanvasSession(
+            "https://canvas.example.com", "token", transport=httpx.MockTransport(handler)
+        )
+        assert s.get("/api/v1/courses/1", single_item=True) == {"path": "/api/v1/courses/1"}
+
+    @pytest.mark.anyio
+    async def test_custom_async_transport(self):
+        def handler(request):
+            return httpx.Response(200, json={"auth": request.headers["Authorization"]})
+
+        s = CanvasSession(
+            "https://canvas.example.com", "tok", async_transport=httpx.MockTransport(handler)
+        )
+        result = await s.async_get("/api/v1/courses/1", single_item=True)
+        assert result == {"auth": "Bearer tok"}
+
+    def test_http2_requires_h2(self):
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            with pytest.raises(ImportError, match="canopy\\[http2\\]"):
+                CanvasSession("https://canvas.example.com", "token", http2=True)
+        else:
+            s = CanvasSession("https://canvas.example.com", "token", http2=True)
+            assert isinstance(s.session, httpx.Client)
+
 
 # ── CanvasSession — helpers ──────────────────────────────────────────
 
@@ -237,10 +306,7 @@ class TestBaseRequest:
         page2 = _mock_response(200, [{"id": 2}])
         page2.raise_for_status = MagicMock()
 
-        with (
-            patch.object(self.session.session, "request", return_value=page1),
-            patch.object(self.session.session, "get", return_value=page2),
-        ):
+        with patch.object(self.session.session, "request", side_effect=[page1, page2]):
             result = self.session.base_request("GET", "/api/v1/accounts", all_pages=True)
         assert result == [{"id": 1}, {"id": 2}]
 
@@ -253,6 +319,13 @@ class TestBaseRequest:
         # data should be passed as None when force_urlencode_data is True
         assert call_args.kwargs.get("data") is None or call_args[1].get("data") is None
 
+    def test_force_urlencode_data_repeats_list_keys(self):
+        with self._patch_request({"id": 1}) as mock_req:
+            self.session.base_request(
+                "GET", "/api/v1/accounts", data={"ids[]": [1, 2]}, force_urlencode_data=True
+            )
+        assert mock_req.call_args.args[1] == "/api/v1/accounts?ids%5B%5D=1&ids%5B%5D=2"
+
     def test_poly_response_list_no_next_returns_list(self):
         with self._patch_request([{"id": 1}]):
             result = self.session.base_request("GET", "/api/v1/accounts", poly_response=True)
@@ -264,6 +337,1456 @@ class TestBaseRequest:
         assert result == {"id": 1}
 
 
+# ── CanvasSession — streaming pagination ────────────────────────────
+
+
+class TestStreaming:
+    def setup_method(self):
+        self.session = CanvasSession("https://canvas.example.com", "token")
+        next_url = "https://canvas.example.com/page=2"
+        self.page1 = _mock_response(200, [{"id": 1}, {"id": 2}], links={"next": {"url": next_url}})
+        self.page1.raise_for_status = MagicMock()
+        self.page2 = _mock_response(200, [{"id": 3}])
+        self.page2.raise_for_status = MagicMock()
+
+    def test_stream_returns_lazy_iterator(self):
+        with patch.object(
+            self.session.session, "request", side_effect=[self.page1, self.page2]
+        ) as mock_req:
+            result = self.session.base_request(
+                "GET", "/api/v1/accounts", all_pages=True, stream=True
+            )
+            assert not isinstance(result, list)
+            assert next(result) == {"id": 1}
+            assert next(result) == {"id": 2}
+            assert mock_req.call_count == 1
+            assert list(result) == [{"id": 3}]
+            assert mock_req.call_count == 2
+
+    def test_iter_pages_yields_each_page(self):
+        with patch.object(
+            self.session.session, "request", side_effect=[self.page1, self.page2]
+        ) as mock_req:
+            pages = list(self.session.iter_pages("/api/v1/accounts"))
+        assert pages == [[{"id": 1}, {"id": 2}], [{"id": 3}]]
+        assert mock_req.call_args_list[0].kwargs["params"]["per_page"] == 100
+
+    def test_iter_items_flattens(self):
+        with patch.object(self.session.session, "request", side_effect=[self.page1, self.page2]):
+            items = list(self.session.iter_items("/api/v1/accounts"))
+        assert items == [{"id": 1}, {"id": 2}, {"id": 3}]
+
+    def test_next_page_error_raises_canvas_api_error(self):
+        failing = _mock_response_raise(500, {"errors": []})
+        with (
+            patch.object(self.session.session, "request", side_effect=[self.page1, failing]),
+            pytest.raises(CanvasAPIError),
+        ):
+            list(self.session.iter_items("/api/v1/accounts"))
+
+    @pytest.mark.anyio
+    async def test_async_stream_returns_async_iterator(self):
+        with patch.object(
+            self.session.async_session,
+            "request",
+            new_callable=AsyncMock,
+            side_effect=[self.page1, self.page2],
+        ):
+            result = await self.session.async_base_request(
+                "GET", "/api/v1/accounts", all_pages=True, stream=True
+            )
+            items = [item async for item in result]
+        assert items == [{"id": 1}, {"id": 2}, {"id": 3}]
+
+    @pytest.mark.anyio
+    async def test_aiter_pages(self):
+        with patch.object(
+            self.session.async_session,
+            "request",
+            new_callable=AsyncMock,
+            side_effect=[self.page1, self.page2],
+        ):
+            pages = [page async for page in self.session.aiter_pages("/api/v1/accounts")]
+        assert pages == [[{"id": 1}, {"id": 2}], [{"id": 3}]]
+
+
+# ── CanvasSession — response decoding ───────────────────────────────
+
+
+class TestResponseDecoding:
+    PAGES = {
+        "1": (
+            b'[{"id": 1}, {"id": 2}]',
+            '<https://canvas.example.com/api/v1/things?page=2>; rel="next"',
+        ),
+        "2": (b'[{"id": 3}]', None),
+    }
+
+    def _session(self, **options):
+        def handler(request):
+            if request.url.path.endswith("/things"):
+                body, link = self.PAGES[request.url.params.get("page", "1")]
+                headers = {"Link": link} if link else {}
+                return httpx.Response(200, content=body, headers=headers)
+            return httpx.Response(200, content=b'{"id": 9, "course": {"id": 4}}')
+
+        self.decoded = []
+
+        def loads(body):
+            self.decoded.append(bytes(body))
+            return json.loads(body)
+
+        return CanvasSession(
+            "https://canvas.example.com",
+            "token",
+            json_loads=loads,
+            transport=httpx.MockTransport(handler),
+            async_transport=httpx.MockTransport(handler),
+            **options,
+        )
+
+    def test_poly_response_decodes_each_page_once(self):
+        session = self._session()
+        result = session.base_request("GET", "/api/v1/things", poly_response=True)
+        assert result == [{"id": 1}, {"id": 2}, {"id": 3}]
+        assert self.decoded == [self.PAGES["1"][0], self.PAGES["2"][0]]
+
+    def test_poly_response_stream_decodes_each_page_once(self):
+        session = self._session()
+        items = session.base_request("GET", "/api/v1/things", poly_response=True, stream=True)
+        assert list(items) == [{"id": 1}, {"id": 2}, {"id": 3}]
+        assert len(self.decoded) == 2
+
+    def test_json_loads_hook_used_for_single_items(self):
+        session = self._session()
+        result = session.base_request("GET", "/api/v1/courses/9", single_item=True)
+        assert result == {"id": 9, "course": {"id": 4}}
+        assert len(self.decoded) == 1
+
+    def test_default_decoder_is_response_json(self):
+        session = CanvasSession(
+            "https://canvas.example.com",
+            "token",
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"id": 1})),
+        )
+        assert session.json_loads is None
+        assert session.base_request("GET", "/api/v1/courses/1") == {"id": 1}
+
+    def test_raw_pages_are_not_decoded(self):
+        session = self._session()
+        bodies = session.base_request("GET", "/api/v1/things", all_pages=True, raw=True)
+        assert bodies == [self.PAGES["1"][0], self.PAGES["2"][0]]
+        assert self.decoded == []
+
+    def test_raw_poly_response_and_single_body(self):
+        session = self._session()
+        bodies = session.base_request("GET", "/api/v1/things", poly_response=True, raw=True)
+        assert bodies == [self.PAGES["1"][0], self.PAGES["2"][0]]
+        body = session.base_request("GET", "/api/v1/courses/9", single_item=True, raw=True)
+        assert body == b'{"id": 9, "course": {"id": 4}}'
+        assert self.decoded == []
+
+    def test_raw_single_item_bypasses_entity_cache(self):
+        session = self._session(entity_cache=EntityCache())
+        session.base_request("GET", "/api/v1/courses/9", single_item=True, raw=True)
+        assert len(session.entity_cache) == 0
+
+    def test_raw_stream_and_iter_pages(self):
+        session = self._session()
+        bodies = session.base_request(
+            "GET", "/api/v1/things", all_pages=True, stream=True, raw=True
+        )
+        assert not isinstance(bodies, list)
+        assert list(bodies) == [self.PAGES["1"][0], self.PAGES["2"][0]]
+        assert list(session.iter_pages("/api/v1/things", raw=True)) == [
+            self.PAGES["1"][0],
+            self.PAGES["2"][0],
+        ]
+        assert self.decoded == []
+
+    @pytest.mark.anyio
+    async def test_async_poly_response_decodes_each_page_once(self):
+        session = self._session()
+        result = await session.async_base_request("GET", "/api/v1/things", poly_response=True)
+        assert result == [{"id": 1}, {"id": 2}, {"id": 3}]
+        assert len(self.decoded) == 2
+
+    @pytest.mark.anyio
+    async def test_async_raw_pages(self):
+        session = self._session()
+        bodies = await session.async_base_request("GET", "/api/v1/things", all_pages=True, raw=True)
+        assert bodies == [self.PAGES["1"][0], self.PAGES["2"][0]]
+        pages = [body async for body in session.aiter_pages("/api/v1/things", raw=True)]
+        assert pages == bodies
+        assert self.decoded == []
+
+
+class TestDecodeOffload:
+    @pytest.fixture
+    def threads(self):
+        seen = []
+
+        def loads(body):
+            seen.append(threading.get_ident())
+            return json.loads(body)
+
+        return seen, loads
+
+    @pytest.mark.anyio
+    async def test_small_bodies_decode_inline(self, threads):
+        seen, loads = threads
+        offload = DecodeOffload(threshold=64)
+        assert await offload.decode(b'{"id": 1}', loads) == {"id": 1}
+        assert seen == [threading.get_ident()]
+
+    @pytest.mark.anyio
+    async def test_large_bodies_decode_in_a_thread(self, threads):
+        seen, loads = threads
+        body = json.dumps([{"id": i} for i in range(50)]).encode()
+        assert await DecodeOffload(threshold=64).decode(body, loads) == json.loads(body)
+        assert seen and seen[0] != threading.get_ident()
+
+    @pytest.mark.anyio
+    async def test_process_executor(self):
+        body = json.dumps({"ids": list(range(100))}).encode()
+        offload = DecodeOffload(threshold=0, executor="process", max_workers=1)
+        assert await offload.decode(body, json.loads) == {"ids": list(range(100))}
+
+    def test_unknown_executor_rejected(self):
+        with pytest.raises(ValueError, match="executor"):
+            DecodeOffload(executor="fiber")
+
+    def test_session_option(self):
+        session = CanvasSession("https://canvas.example.com", "token", decode_offload=True)
+        assert isinstance(session.decode_offload, DecodeOffload)
+        assert CanvasSession("https://canvas.example.com", "token").decode_offload is None
+
+    @pytest.mark.anyio
+    async def test_async_requests_offload_large_pages(self, threads):
+        seen, loads = threads
+        page1 = json.dumps([{"id": i} for i in range(40)]).encode()
+
+        def handler(request):
+            if request.url.params.get("page") == "2":
+                return httpx.Response(200, content=b'[{"id": 40}]')
+            link = '<https://canvas.example.com/api/v1/things?page=2>; rel="next"'
+            return httpx.Response(200, content=page1, headers={"Link": link})
+
+        session = CanvasSession(
+            "https://canvas.example.com",
+            "token",
+            json_loads=loads,
+            decode_offload=DecodeOffload(threshold=256),
+            async_transport=httpx.MockTransport(handler),
+        )
+        items = await session.async_get("/api/v1/things", all_pages=True)
+        assert [item["id"] for item in items] == list(range(41))
+        main = threading.get_ident()
+        assert seen[0] != main
+        assert seen[1] == main
+
+
+# ── CanvasSession — parallel numbered pages ─────────────────────────
+
+
+class TestParallelPages:
+    BASE = "https://canvas.example.com/api/v1/accounts?per_page=1"
+
+    def setup_method(self):
+        self.session = CanvasSession("https://canvas.example.com", "token", page_concurrency=3)
+
+    def _first_page(self, links: dict) -> MagicMock:
+        page = _mock_response(200, [{"id": 1}], links=links)
+        page.raise_for_status = MagicMock()
+        return page
+
+    def _page_for(self, url, last: int = 8) -> MagicMock:
+        n = int(httpx.URL(str(url)).params["page"])
+        links = {"next": {"url": f"{self.BASE}&page={n + 1}"}} if n < last else {}
+        page = _mock_response(200, [{"id": n}], links=links)
+        page.raise_for_status = MagicMock()
+        return page
+
+    def test_numbered_page_urls(self):
+        resp = self._first_page(
+            {"next": {"url": self.BASE + "&page=2"}, "last": {"url": self.BASE + "&page=4"}}
+        )
+        urls = self.session._numbered_page_urls(resp)
+        assert [httpx.URL(u).params["page"] for u in urls] == ["2", "3", "4"]
+
+    def test_bookmark_links_are_not_numbered(self):
+        resp = self._first_page(
+            {
+                "next": {"url": self.BASE + "&page=bookmark:abc"},
+                "last": {"url": self.BASE + "&page=bookmark:xyz"},
+            }
+        )
+        assert self.session._numbered_page_urls(resp) is None
+
+    def test_missing_last_link_is_not_numbered(self):
+        resp = self._first_page({"next": {"url": self.BASE + "&page=2"}})
+        assert self.session._numbered_page_urls(resp) is None
+
+    def test_parallel_results_in_page_order(self):
+        first = self._first_page(
+            {"next": {"url": self.BASE + "&page=2"}, "last": {"url": self.BASE + "&page=8"}}
+        )
+
+        def fake_request(method, url, **kwargs):
+            if "page" not in httpx.URL(str(url)).params:
+                return first
+            n = int(httpx.URL(str(url)).params["page"])
+            time.sleep(0.01 * (10 - n))  # later pages finish first
+            return self._page_for(url)
+
+        with patch.object(self.session.session, "request", side_effect=fake_request) as mock_req:
+            result = self.session.base_request("GET", "/api/v1/accounts", all_pages=True)
+        assert result == [{"id": n} for n in range(1, 9)]
+        assert mock_req.call_count == 8
+
+    def test_bookmark_falls_back_to_sequential(self):
+        first = self._first_page({"next": {"url": self.BASE + "&page=bookmark:abc"}})
+        last = _mock_response(200, [{"id": 2}])
+        last.raise_for_status = MagicMock()
+        with patch.object(self.session.session, "request", side_effect=[first, last]) as mock_req:
+            result = self.session.base_request("GET", "/api/v1/accounts", all_pages=True)
+        assert result == [{"id": 1}, {"id": 2}]
+        assert mock_req.call_count == 2
+
+    @pytest.mark.anyio
+    async def test_async_parallel_results_in_page_order(self):
+        first = self._first_page(
+            {"next": {"url": self.BASE + "&page=2"}, "last": {"url": self.BASE + "&page=6"}}
+        )
+
+        async def fake_request(method, url, **kwargs):
+            if "page" not in httpx.URL(str(url)).params:
+                return first
+            n = int(httpx.URL(str(url)).params["page"])
+            await anyio.sleep(0.01 * (10 - n))
+            return self._page_for(url, last=6)
+
+        with patch.object(self.session.async_session, "request", side_effect=fake_request):
+            result = await self.session.async_base_request(
+                "GET", "/api/v1/accounts", all_pages=True
+            )
+        assert result == [{"id": n} for n in range(1, 7)]
+
+
+# ── RateLimitPacer ───────────────────────────────────────────────────
+
+
+class TestRateLimitPacer:
+    def _response(self, remaining: str, cost: str = "1.0") -> MagicMock:
+        return _mock_response(
+            200, {}, headers={"X-Rate-Limit-Remaining": remaining, "X-Request-Cost": cost}
+        )
+
+    def test_no_delay_before_first_response(self):
+        pacer = RateLimitPacer()
+        assert pacer.acquire() == 0.0
+
+    def test_no_delay_with_healthy_quota(self):
+        pacer = RateLimitPacer(threshold=100)
+        pacer.acquire()
+        pacer.release(self._response("600"))
+        assert pacer.acquire() == 0.0
+
+    def test_delays_when_quota_low(self):
+        pacer = RateLimitPacer(threshold=100, leak_rate=10)
+        pacer.acquire()
+        pacer.release(self._response("50"))
+        delay = pacer.acquire()
+        assert 4.0 < delay <= 5.1
+
+    def test_in_flight_requests_reduce_projected_quota(self):
+        pacer = RateLimitPacer(threshold=100, leak_rate=10)
+        pacer.acquire()
+        pacer.release(self._response("110", cost="1"))
+        delays = [pacer.acquire() for _ in range(20)]
+        assert delays[0] == 0.0
+        assert delays[-1] > delays[10] > 0.0
+
+    def test_delay_capped(self):
+        pacer = RateLimitPacer(threshold=100, leak_rate=1, max_delay=2.0)
+        pacer.acquire()
+        pacer.release(self._response("0"))
+        assert pacer.acquire() == 2.0
+
+    def test_cost_tracked(self):
+        pacer = RateLimitPacer()
+        pacer.acquire()
+        pacer.release(self._response("600", cost="11"))
+        assert pacer.cost == pytest.approx(3.0)
+
+    def test_missing_headers_ignored(self):
+        pacer = RateLimitPacer()
+        pacer.acquire()
+        pacer.release(_mock_response(200, {}))
+        assert pacer.remaining is None
+
+    def test_session_uses_pacer(self):
+        session = CanvasSession("https://canvas.example.com", "token")
+        assert isinstance(session.pacer, RateLimitPacer)
+        resp = self._response("42")
+        resp.raise_for_status = MagicMock()
+        with patch.object(session.session, "request", return_value=resp):
+            session.base_request("GET", "/api/v1/accounts/1")
+        assert session.pacer.remaining == 42.0
+
+    def test_session_sleeps_when_paced(self):
+        session = CanvasSession("https://canvas.example.com", "token")
+        resp = self._response("600")
+        resp.raise_for_status = MagicMock()
+        with (
+            patch.object(session.pacer, "acquire", return_value=1.5),
+            patch.object(session.session, "request", return_value=resp),
+            patch("canopy.canopy.time.sleep") as mock_sleep,
+        ):
+            session.base_request("GET", "/api/v1/accounts/1")
+        mock_sleep.assert_called_once_with(1.5)
+
+    def test_interrupted_pacing_releases_slot(self):
+        session = CanvasSession("https://canvas.example.com", "token")
+        with (
+            patch.object(session.pacer, "acquire", return_value=1.5),
+            patch("canopy.canopy.time.sleep", side_effect=KeyboardInterrupt),
+            pytest.raises(KeyboardInterrupt),
+        ):
+            session.base_request("GET", "/api/v1/accounts/1")
+        assert session.pacer._in_flight == 0
+
+    @pytest.mark.anyio
+    async def test_cancelled_pacing_releases_slot(self):
+        session = CanvasSession("https://canvas.example.com", "token")
+        session.pacer.acquire()
+        session.pacer.release(self._response("0"))
+        for _ in range(5):
+            with anyio.move_on_after(0.05):
+                await session.async_base_request("GET", "/api/v1/accounts/1")
+        assert session.pacer._in_flight == 0
+
+    def test_rate_limit_can_be_disabled(self):
+        session = CanvasSession("https://canvas.example.com", "token", rate_limit=False)
+        assert session.pacer is None
+
+    def test_custom_pacer_used(self):
+        pacer = RateLimitPacer(threshold=10)
+        session = CanvasSession("https://canvas.example.com", "token", rate_limit=pacer)
+        assert session.pacer is pacer
+
+
+# ── AdaptiveConcurrency ──────────────────────────────────────────────
+
+
+class TestAdaptiveConcurrency:
+    def _response(self, status_code=200, remaining="600"):
+        return _mock_response(status_code, {}, headers={"X-Rate-Limit-Remaining": remaining})
+
+    @pytest.mark.anyio
+    async def test_grows_while_healthy(self):
+        # No latency signal: microsecond timings here are pure jitter
+        limiter = AdaptiveConcurrency(initial=2, max_limit=4, latency_tolerance=float("inf"))
+        for _ in range(20):
+            started = await limiter.acquire()
+            limiter.release(self._response(), started)
+        assert limiter.limit == 4
+
+    @pytest.mark.anyio
+    async def test_throttle_halves_limit(self):
+        limiter = AdaptiveConcurrency(initial=8)
+        started = await limiter.acquire()
+        limiter.release(self._response(429), started)
+        assert limiter.limit == 4
+
+    @pytest.mark.anyio
+    async def test_low_remaining_quota_cuts_limit(self):
+        limiter = AdaptiveConcurrency(initial=8, remaining_threshold=150)
+        started = await limiter.acquire()
+        limiter.release(self._response(remaining="40"), started)
+        assert limiter.limit == 4
+
+    def test_latency_spike_cuts_limit(self):
+        limiter = AdaptiveConcurrency(initial=8, latency_tolerance=2.0)
+        limiter.baseline = 0.01
+        limiter.in_flight = 1
+        limiter.release(self._response(), time.monotonic() - 1.0)
+        assert limiter.limit == 4
+
+    def test_one_cut_per_congestion_window(self):
+        limiter = AdaptiveConcurrency(initial=8)
+        started = time.monotonic() - 0.1
+        limiter.in_flight = 3
+        for _ in range(3):
+            limiter.release(self._response(429), started)
+        assert limiter.limit == 4
+
+    def test_floor(self):
+        limiter = AdaptiveConcurrency(initial=1, min_limit=1)
+        limiter.in_flight = 1
+        limiter.release(self._response(429), time.monotonic())
+        assert limiter.limit == 1
+
+    def test_transport_error_leaves_limit(self):
+        limiter = AdaptiveConcurrency(initial=8)
+        limiter.in_flight = 1
+        limiter.release(None, time.monotonic())
+        assert limiter.limit == 8
+        assert limiter.in_flight == 0
+
+    @pytest.mark.anyio
+    async def test_waits_for_free_slot(self):
+        limiter = AdaptiveConcurrency(initial=1, max_limit=1)
+        started = await limiter.acquire()
+        order = []
+
+        async def second():
+            await limiter.acquire()
+            order.append("acquired")
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(second)
+            await anyio.sleep(0.01)
+            assert order == []
+            order.append("released")
+            limiter.release(self._response(), started)
+        assert order == ["released", "acquired"]
+        assert limiter.in_flight == 1
+
+    @pytest.mark.anyio
+    async def test_cancelled_waiter_gives_up_its_place(self):
+        limiter = AdaptiveConcurrency(initial=1, max_limit=1)
+        started = await limiter.acquire()
+        with anyio.move_on_after(0.01):
+            await limiter.acquire()
+        assert not limiter._waiters
+        limiter.release(self._response(), started)
+        assert limiter.in_flight == 0
+
+
+class TestSessionAdaptiveConcurrency:
+    def test_disabled_by_default(self):
+        session = CanvasSession("https://canvas.example.com", "token")
+        assert session.limiter is None
+        assert session.concurrency_limit is None
+
+    def test_enabled_with_true(self):
+        session = CanvasSession("https://canvas.example.com", "token", adaptive_concurrency=True)
+        assert isinstance(session.limiter, AdaptiveConcurrency)
+        assert session.concurrency_limit == 8
+
+    @pytest.mark.anyio
+    async def test_async_requests_bounded_and_limit_reported(self):
+        session = CanvasSession(
+            "https://canvas.example.com",
+            "token",
+            rate_limit=False,
+            adaptive_concurrency=AdaptiveConcurrency(initial=2, max_limit=2),
+        )
+        active = [0]
+        peak = [0]
+
+        async def request(method, url, **kwargs):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await anyio.sleep(0.01)
+            active[0] -= 1
+            resp = _mock_response(200, {"id": 1}, headers={"X-Rate-Limit-Remaining": "40"})
+            resp.raise_for_status = MagicMock()
+            return resp
+
+        with patch.object(session.async_session, "request", side_effect=request):
+            await session.amap(session.async_get, [f"/api/v1/users/{i}" for i in range(6)])
+        assert peak[0] <= 2
+        assert session.concurrency_limit == 1
+
+
+# ── RetryPolicy ──────────────────────────────────────────────────────
+
+
+class TestRetryPolicy:
+    def test_retries_idempotent_methods_on_retry_status(self):
+        policy = RetryPolicy()
+        for method in ("GET", "PUT", "DELETE"):
+            assert policy.should_retry(method, 0, _mock_response(503, {}))
+
+    def test_does_not_retry_post_by_default(self):
+        assert not RetryPolicy().should_retry("POST", 0, _mock_response(503, {}))
+
+    def test_retries_post_when_opted_in(self):
+        assert RetryPolicy(retry_post=True).should_retry("POST", 0, _mock_response(503, {}))
+
+    def test_does_not_retry_client_errors(self):
+        assert not RetryPolicy().should_retry("GET", 0, _mock_response(404, {}))
+
+    def test_retries_rate_limit_403(self):
+        resp = _mock_response(403, text="403 Forbidden (Rate Limit Exceeded)")
+        assert RetryPolicy().should_retry("GET", 0, resp)
+
+    def test_does_not_retry_plain_403(self):
+        resp = _mock_response(403, text="user not authorized")
+        assert not RetryPolicy().should_retry("GET", 0, resp)
+
+    def test_transport_error_retried(self):
+        assert RetryPolicy().should_retry("GET", 0)
+
+    def test_stops_after_max_retries(self):
+        policy = RetryPolicy(max_retries=2)
+        assert policy.should_retry("GET", 1, _mock_response(503, {}))
+        assert not policy.should_retry("GET", 2, _mock_response(503, {}))
+
+    def test_backoff_grows_with_jitter(self):
+        policy = RetryPolicy(backoff_factor=1.0, max_backoff=100)
+        assert 0.5 <= policy.backoff(0) <= 1.0
+        assert 4.0 <= policy.backoff(3) <= 8.0
+
+    def test_backoff_capped(self):
+        policy = RetryPolicy(backoff_factor=1.0, max_backoff=5)
+        assert policy.backoff(10) <= 5
+
+    def test_retry_after_seconds_honored(self):
+        resp = _mock_response(429, {}, headers={"Retry-After": "7"})
+        assert RetryPolicy().backoff(0, resp) == 7.0
+
+    def test_retry_after_http_date_honored(self):
+        import email.utils
+
+        when = email.utils.formatdate(time.time() + 30, usegmt=True)
+        resp = _mock_response(503, {}, headers={"Retry-After": when})
+        assert 25 <= RetryPolicy().backoff(0, resp) <= 30
+
+
+class TestSessionRetry:
+    def setup_method(self):
+        self.session = CanvasSession(
+            "https://canvas.example.com",
+            "token",
+            rate_limit=False,
+            retry=RetryPolicy(backoff_factor=0),
+        )
+
+    def _ok(self, json_data, links=None) -> MagicMock:
+        resp = _mock_response(200, json_data, links=links)
+        resp.raise_for_status = MagicMock()
+        return resp
+
+    def test_retries_then_succeeds(self):
+        with patch.object(
+            self.session.session,
+            "request",
+            side_effect=[_mock_response_raise(503), self._ok({"id": 1})],
+        ) as mock_req:
+            result = self.session.base_request("GET", "/api/v1/accounts/1")
+        assert result == {"id": 1}
+        assert mock_req.call_count == 2
+
+    def test_transport_error_retried(self):
+        with patch.object(
+            self.session.session,
+            "request",
+            side_effect=[httpx.ConnectError("reset"), self._ok({"id": 1})],
+        ):
+            assert self.session.base_request("GET", "/api/v1/accounts/1") == {"id": 1}
+
+    def test_gives_up_and_raises_canvas_api_error(self):
+        with (
+            patch.object(
+                self.session.session, "request", side_effect=[_mock_response_raise(503)] * 4
+            ) as mock_req,
+            pytest.raises(CanvasAPIError),
+        ):
+            self.session.base_request("GET", "/api/v1/accounts/1")
+        assert mock_req.call_count == 4
+
+    def test_post_not_retried(self):
+        with (
+            patch.object(
+                self.session.session, "request", side_effect=[_mock_response_raise(503)]
+            ) as mock_req,
+            pytest.raises(CanvasAPIError),
+        ):
+            self.session.base_request("POST", "/api/v1/accounts", data={"a": 1})
+        assert mock_req.call_count == 1
+
+    def test_depagination_resumes_from_failed_page(self):
+        next_url = "https://canvas.example.com/api/v1/accounts?page=2"
+        page1 = self._ok([{"id": 1}], links={"next": {"url": next_url}})
+        page2 = self._ok([{"id": 2}])
+        with patch.object(
+            self.session.session,
+            "request",
+            side_effect=[page1, _mock_response_raise(502), page2],
+        ) as mock_req:
+            result = self.session.base_request("GET", "/api/v1/accounts", all_pages=True)
+        assert result == [{"id": 1}, {"id": 2}]
+        urls = [c.args[1] for c in mock_req.call_args_list]
+        assert urls == ["/api/v1/accounts", next_url, next_url]
+
+    def test_retry_can_be_disabled(self):
+        session = CanvasSession("https://canvas.example.com", "token", retry=False)
+        assert session.retry is None
+
+    @pytest.mark.anyio
+    async def test_async_retries_then_succeeds(self):
+        with patch.object(
+            self.session.async_session,
+            "request",
+            new_callable=AsyncMock,
+            side_effect=[_mock_response_raise(429), self._ok({"id": 1})],
+        ) as mock_req:
+            result = await self.session.async_base_request("GET", "/api/v1/accounts/1")
+        assert result == {"id": 1}
+        assert mock_req.call_count == 2
+
+
+# ── HTTPCache ────────────────────────────────────────────────────────
+
+
+def _http_response(status_code=200, json_data=None, headers=None, url="/api/v1/courses/1"):
+    """Build a real httpx.Response (needed where the cache rebuilds responses)."""
+    return httpx.Response(
+        status_code,
+        json=json_data,
+        headers=headers,
+        request=httpx.Request("GET", "https://canvas.example.com" + url),
+    )
+
+
+class TestMemoryCacheBackend:
+    def test_lru_eviction(self):
+        backend = MemoryCacheBackend(max_entries=2)
+        backend.set("a", CacheEntry(200, [], b"a"))
+        backend.set("b", CacheEntry(200, [], b"b"))
+        backend.get("a")
+        backend.set("c", CacheEntry(200, [], b"c"))
+        assert backend.get("b") is None
+        assert backend.get("a") is not None
+        assert len(backend) == 2
+
+
+class TestFileCacheBackend:
+    def test_round_trip(self, tmp_path):
+        backend = FileCacheBackend(tmp_path)
+        backend.set("k", CacheEntry(200, [("ETag", '"v1"')], b'{"id": 1}', stored_at=5.0))
+        entry = backend.get("k")
+        assert entry.status_code == 200
+        assert entry.header("etag") == '"v1"'
+        assert entry.content == b'{"id": 1}'
+        assert entry.stored_at == 5.0
+
+    def test_missing_and_delete(self, tmp_path):
+        backend = FileCacheBackend(tmp_path)
+        assert backend.get("missing") is None
+        backend.set("k", CacheEntry(200, [], b""))
+        backend.delete("k")
+        assert backend.get("k") is None
+
+
+class TestHTTPCache:
+    def setup_method(self):
+        self.cache = HTTPCache()
+        self.session = CanvasSession(
+            "https://canvas.example.com", "token", rate_limit=False, http_cache=self.cache
+        )
+
+    def test_revalidates_and_serves_304_from_cache(self):
+        first = _http_response(200, {"id": 1}, headers={"ETag": '"abc"'})
+        not_modified = _http_response(304)
+        with patch.object(
+            self.session.session, "request", side_effect=[first, not_modified]
+        ) as mock_req:
+            assert self.session.get("/api/v1/courses/1", single_item=True) == {"id": 1}
+            assert self.session.get("/api/v1/courses/1", single_item=True) == {"id": 1}
+        assert "headers" not in mock_req.call_args_list[0].kwargs
+        assert mock_req.call_args_list[1].kwargs["headers"] == {"If-None-Match": '"abc"'}
+
+    def test_last_modified_sent(self):
+        lm = "Wed, 21 Oct 2015 07:28:00 GMT"
+        first = _http_response(200, {"id": 1}, headers={"Last-Modified": lm})
+        with patch.object(
+            self.session.session, "request", side_effect=[first, _http_response(304)]
+        ) as mock_req:
+            self.session.get("/api/v1/courses/1")
+            self.session.get("/api/v1/courses/1")
+        assert mock_req.call_args_list[1].kwargs["headers"] == {"If-Modified-Since": lm}
+
+    def test_changed_resource_replaces_entry(self):
+        first = _http_response(200, {"id": 1}, headers={"ETag": '"v1"'})
+        second = _http_response(200, {"id": 1, "name": "new"}, headers={"ETag": '"v2"'})
+        with patch.object(
+            self.session.session, "request", side_effect=[first, second, _http_response(304)]
+        ) as mock_req:
+            self.session.get("/api/v1/courses/1")
+            assert self.session.get("/api/v1/courses/1") == {"id": 1, "name": "new"}
+            assert self.session.get("/api/v1/courses/1") == {"id": 1, "name": "new"}
+        assert mock_req.call_args_list[2].kwargs["headers"] == {"If-None-Match": '"v2"'}
+
+    def test_responses_without_validators_not_cached(self):
+        with patch.object(
+            self.session.session,
+            "request",
+            side_effect=[_http_response(200, {"id": 1}), _http_response(200, {"id": 1})],
+        ) as mock_req:
+            self.session.get("/api/v1/courses/1")
+            self.session.get("/api/v1/courses/1")
+        assert "headers" not in mock_req.call_args_list[1].kwargs
+        assert len(self.cache.backend) == 0
+
+    def test_no_store_not_cached(self):
+        resp = _http_response(200, {}, headers={"ETag": '"a"', "Cache-Control": "no-store"})
+        with patch.object(self.session.session, "request", return_value=resp):
+            self.session.get("/api/v1/courses/1")
+        assert len(self.cache.backend) == 0
+
+    def test_writes_bypass_cache(self):
+        resp = _http_response(200, {"id": 1}, headers={"ETag": '"a"'})
+        with patch.object(self.session.session, "request", return_value=resp):
+            self.session.put("/api/v1/courses/1", data={"name": "x"})
+        assert len(self.cache.backend) == 0
+
+    def test_key_depends_on_params_and_token(self):
+        key = self.cache.key("/api/v1/courses", {"include[]": ["term"]}, "token")
+        assert key != self.cache.key("/api/v1/courses", None, "token")
+        assert key != self.cache.key("/api/v1/courses", {"include[]": ["term"]}, "other")
+
+    @pytest.mark.anyio
+    async def test_async_serves_304_from_cache(self):
+        first = _http_response(200, [{"id": 1}], headers={"ETag": '"abc"'})
+        with patch.object(
+            self.session.async_session,
+            "request",
+            new_callable=AsyncMock,
+            side_effect=[first, _http_response(304)],
+        ):
+            await self.session.async_get("/api/v1/courses", all_pages=True)
+            result = await self.session.async_get("/api/v1/courses", all_pages=True)
+        assert result == [{"id": 1}]
+
+
+class TestHTTPCacheTTL:
+    def test_fresh_entry_served_without_request(self):
+        cache = HTTPCache(ttl_rules={"/api/v1/accounts/*/terms": 3600})
+        session = CanvasSession(
+            "https://canvas.example.com", "token", rate_limit=False, http_cache=cache
+        )
+        resp = _http_response(200, {"enrollment_terms": []}, url="/api/v1/accounts/1/terms")
+        with patch.object(session.session, "request", return_value=resp) as mock_req:
+            session.get("/api/v1/accounts/1/terms")
+            result = session.get("/api/v1/accounts/1/terms")
+        assert result == {"enrollment_terms": []}
+        assert mock_req.call_count == 1
+
+    def test_unmatched_path_uses_default_ttl(self):
+        cache = HTTPCache(ttl_rules={"/api/v1/accounts/*/terms": 3600})
+        assert cache.ttl_for("/api/v1/courses/1") == 0.0
+        assert cache.ttl_for("https://canvas.example.com/api/v1/accounts/1/terms") == 3600
+
+    def test_key_normalizes_param_order(self):
+        cache = HTTPCache()
+        a = cache.key("/api/v1/courses?b=2&a=1", None, "t")
+        b = cache.key("/api/v1/courses", {"a": 1, "b": 2}, "t")
+        assert a == b
+
+
+class TestSQLiteCacheBackend:
+    def test_round_trip_compressed(self, tmp_path):
+        backend = SQLiteCacheBackend(tmp_path / "cache.db")
+        body = b'{"id": 1, "name": "' + b"x" * 5000 + b'"}'
+        backend.set("k", CacheEntry(200, [("ETag", '"v1"')], body, stored_at=10.0))
+        entry = backend.get("k")
+        assert entry.content == body
+        assert entry.header("ETag") == '"v1"'
+        assert entry.stored_at == 10.0
+        (size,) = backend._connect().execute("SELECT size FROM responses").fetchone()
+        assert size < len(body)
+
+    def test_missing_delete_and_clear(self, tmp_path):
+        backend = SQLiteCacheBackend(tmp_path / "cache.db")
+        assert backend.get("missing") is None
+        backend.set("a", CacheEntry(200, [], b"a"))
+        backend.set("b", CacheEntry(200, [], b"b"))
+        backend.delete("a")
+        assert backend.get("a") is None
+        backend.clear()
+        assert len(backend) == 0
+
+    def test_size_capped_eviction_is_lru(self, tmp_path):
+        import os
+
+        backend = SQLiteCacheBackend(tmp_path / "cache.db", max_size=2500, compress_level=0)
+        backend.set("a", CacheEntry(200, [], os.urandom(1000)))
+        backend.set("b", CacheEntry(200, [], os.urandom(1000)))
+        backend.get("a")
+        backend.set("c", CacheEntry(200, [], os.urandom(1000)))
+        assert backend.get("b") is None
+        assert backend.get("a") is not None
+        assert backend.get("c") is not None
+
+    def test_shared_between_instances(self, tmp_path):
+        path = tmp_path / "cache.db"
+        SQLiteCacheBackend(path).set("k", CacheEntry(200, [], b"shared"))
+        assert SQLiteCacheBackend(path).get("k").content == b"shared"
+
+    def test_concurrent_threads(self, tmp_path):
+        backend = SQLiteCacheBackend(tmp_path / "cache.db")
+
+        def worker(n):
+            for i in range(20):
+                backend.set(f"{n}-{i}", CacheEntry(200, [], b"x" * i))
+                backend.get(f"{n}-{i}")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert len(backend) == 80
+
+    def test_warm_start_skips_requests(self, tmp_path):
+        path = tmp_path / "cache.db"
+        resp = _http_response(200, [{"id": 1}], url="/api/v1/accounts/1/roles")
+        for expected_calls in (1, 0):
+            session = CanvasSession(
+                "https://canvas.example.com",
+                "token",
+                rate_limit=False,
+                http_cache=HTTPCache(SQLiteCacheBackend(path), default_ttl=3600),
+            )
+            with patch.object(session.session, "request", return_value=resp) as mock_req:
+                result = session.get("/api/v1/accounts/1/roles", all_pages=True)
+            assert result == [{"id": 1}]
+            assert mock_req.call_count == expected_calls
+
+
+# ── Request coalescing ───────────────────────────────────────────────
+
+
+class TestSingleFlight:
+    def test_concurrent_identical_gets_share_one_request(self):
+        session = CanvasSession("https://canvas.example.com", "token", rate_limit=False)
+        resp = _mock_response(200, {"id": 1})
+        resp.raise_for_status = MagicMock()
+        barrier = threading.Barrier(5)
+
+        def slow_request(method, url, **kwargs):
+            time.sleep(0.1)
+            return resp
+
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(session.get("/api/v1/users/1", single_item=True))
+
+        with patch.object(session.session, "request", side_effect=slow_request) as mock_req:
+            threads = [threading.Thread(target=worker) for _ in range(5)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        assert results == [{"id": 1}] * 5
+        assert mock_req.call_count == 1
+
+    def test_different_masquerade_not_coalesced(self):
+        flight = SingleFlight()
+        calls = []
+        barrier = threading.Barrier(2)
+
+        def fn(n):
+            calls.append(n)
+            time.sleep(0.05)
+            return n
+
+        def worker(n):
+            barrier.wait()
+            flight.do(f"key-{n}", lambda: fn(n))
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(calls) == [0, 1]
+
+    def test_error_shared_with_waiters(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        errors = []
+
+        def failing():
+            started.set()
+            time.sleep(0.05)
+            raise ValueError("boom")
+
+        def waiter():
+            started.wait()
+            try:
+                flight.do("k", lambda: "not called")
+            except ValueError as e:
+                errors.append(e)
+
+        t = threading.Thread(target=waiter)
+        t.start()
+        with pytest.raises(ValueError):
+            flight.do("k", failing)
+        t.join()
+        assert len(errors) == 1
+
+    def test_writes_not_coalesced(self):
+        session = CanvasSession("https://canvas.example.com", "token", rate_limit=False)
+        with patch.object(session, "_send_cached") as mock_send:
+            session._send("POST", "/api/v1/courses", data={})
+        mock_send.assert_called_once()
+
+    def test_can_be_disabled(self):
+        session = CanvasSession("https://canvas.example.com", "token", coalesce_requests=False)
+        assert session.single_flight is None
+
+    @pytest.mark.anyio
+    async def test_async_identical_gets_share_one_request(self, anyio_backend):
+        session = CanvasSession("https://canvas.example.com", "token", rate_limit=False)
+        resp = _mock_response(200, {"id": 1})
+        resp.raise_for_status = MagicMock()
+
+        async def slow_request(method, url, **kwargs):
+            await anyio.sleep(0.05)
+            return resp
+
+        results = []
+
+        async def worker():
+            results.append(await session.async_get("/api/v1/users/1", {"as_user_id": 3}))
+
+        with patch.object(session.async_session, "request", side_effect=slow_request) as mock_req:
+            async with anyio.create_task_group() as tg:
+                for _ in range(5):
+                    tg.start_soon(worker)
+        assert results == [{"id": 1}] * 5
+        # Coalescing relies on asyncio futures; other event loops send every request
+        assert mock_req.call_count == (1 if anyio_backend == "asyncio" else 5)
+
+    @pytest.mark.anyio
+    async def test_async_waiter_takes_over_when_leader_cancelled(self, anyio_backend):
+        if anyio_backend != "asyncio":
+            pytest.skip("SingleFlight.ado requires asyncio")
+        import asyncio
+
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "done"
+
+        leader = asyncio.ensure_future(flight.ado("k", work))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(flight.ado("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await waiter == "done"
+        assert len(calls) == 2
+
+
+# ── Bulk execution ───────────────────────────────────────────────────
+
+
+class TestBulkMap:
+    def setup_method(self):
+        self.session = CanvasSession("https://canvas.example.com", "token")
+
+    def test_results_in_input_order(self):
+        def slow(id):
+            time.sleep(0.01 * (5 - id))
+            return id * 10
+
+        result = self.session.map(slow, [{"id": i} for i in range(5)], concurrency=5)
+        assert result == [0, 10, 20, 30, 40]
+
+    def test_argument_set_forms(self):
+        def f(a, b=0):
+            return a + b
+
+        assert self.session.map(f, [{"a": 1, "b": 2}, (3, 4), 5]) == [3, 7, 5]
+
+    def test_captures_per_item_errors(self):
+        def f(id):
+            if id == 2:
+                raise CanvasAPIError(_mock_response(404, {"errors": []}))
+            return id
+
+        result = self.session.map(f, [1, 2, 3])
+        assert result[0] == 1
+        assert isinstance(result[1], CanvasAPIError)
+        assert result[2] == 3
+
+    def test_return_exceptions_false_raises(self):
+        def f(id):
+            raise ValueError(id)
+
+        with pytest.raises(ValueError):
+            self.session.map(f, [1, 2], return_exceptions=False)
+
+    def test_concurrency_bounded(self):
+        lock = threading.Lock()
+        active = [0]
+        peak = [0]
+
+        def f(id):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+            return id
+
+        assert self.session.map(f, range(20), concurrency=3) == list(range(20))
+        assert peak[0] <= 3
+
+    def test_slow_item_does_not_stall_the_window(self):
+        later_started = threading.Event()
+
+        def f(id):
+            if id == 0:
+                # Item 4 is outside the first window, so it only starts if slots refill
+                return later_started.wait(2)
+            if id == 4:
+                later_started.set()
+            return id
+
+        assert self.session.map(f, range(6), concurrency=2) == [True, 1, 2, 3, 4, 5]
+
+    def test_imap_streams(self):
+        assert list(self.session.imap(lambda x: x + 1, iter(range(4)))) == [1, 2, 3, 4]
+
+    @pytest.mark.anyio
+    async def test_amap_results_in_input_order_with_errors(self):
+        async def f(id):
+            await anyio.sleep(0.01 * (5 - id))
+            if id == 3:
+                raise ValueError("bad")
+            return id
+
+        result = await self.session.amap(f, [{"id": i} for i in range(5)], concurrency=2)
+        assert result[:3] == [0, 1, 2]
+        assert isinstance(result[3], ValueError)
+        assert result[4] == 4
+
+    @pytest.mark.anyio
+    async def test_amap_concurrency_bounded(self):
+        active = [0]
+        peak = [0]
+
+        async def f(id):
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await anyio.sleep(0.01)
+            active[0] -= 1
+            return id
+
+        assert await self.session.amap(f, range(12), concurrency=4) == list(range(12))
+        assert peak[0] <= 4
+
+    @pytest.mark.anyio
+    async def test_amap_slow_item_does_not_stall_the_window(self, anyio_backend):
+        if anyio_backend != "asyncio":
+            pytest.skip("aimap only runs calls concurrently under asyncio")
+        later_started = anyio.Event()
+
+        async def f(id):
+            if id == 0:
+                with anyio.move_on_after(2):
+                    await later_started.wait()
+                return later_started.is_set()
+            if id == 4:
+                later_started.set()
+            return id
+
+        assert await self.session.amap(f, range(6), concurrency=2) == [True, 1, 2, 3, 4, 5]
+
+    @pytest.mark.anyio
+    async def test_aimap_raises_without_return_exceptions(self):
+        async def f(id):
+            raise ValueError(id)
+
+        with pytest.raises(ValueError):
+            async for _ in self.session.aimap(f, [1], return_exceptions=False):
+                pass
+
+
+# ── EntityCache ──────────────────────────────────────────────────────
+
+
+class TestEntityCache:
+    def setup_method(self):
+        self.cache = EntityCache(ttl=60, max_entries=10)
+        self.session = CanvasSession(
+            "https://canvas.example.com", "token", rate_limit=False, entity_cache=self.cache
+        )
+
+    def _ok(self, json_data) -> MagicMock:
+        resp = _mock_response(200, json_data)
+        resp.raise_for_status = MagicMock()
+        return resp
+
+    def test_single_item_served_from_cache(self):
+        with patch.object(
+            self.session.session, "request", return_value=self._ok({"id": 1})
+        ) as mock_req:
+            first = self.session.get("/api/v1/courses/1", single_item=True)
+            second = self.session.get("/api/v1/courses/1", single_item=True)
+        assert first == second == {"id": 1}
+        assert mock_req.call_count == 1
+
+    def test_returned_values_are_copies(self):
+        with patch.object(self.session.session, "request", return_value=self._ok({"id": 1})):
+            first = self.session.get("/api/v1/courses/1", single_item=True)
+            first["id"] = 99
+            assert self.session.get("/api/v1/courses/1", single_item=True) == {"id": 1}
+
+    def test_params_and_masquerade_are_part_of_key(self):
+        with patch.object(
+            self.session.session, "request", return_value=self._ok({"id": 1})
+        ) as mock_req:
+            self.session.get("/api/v1/users/self", single_item=True)
+            self.session.get("/api/v1/users/self", {"as_user_id": 5}, single_item=True)
+            self.session.get("/api/v1/users/self", {"as_user_id": 5}, single_item=True)
+        assert mock_req.call_count == 2
+
+    def test_data_key_is_part_of_key(self):
+        body = {"course": {"id": 1}, "term": {"id": 7}}
+        with patch.object(self.session.session, "request", return_value=self._ok(body)) as mock_req:
+            course = self.session.get("/api/v1/courses/1", data_key="course", single_item=True)
+            term = self.session.get("/api/v1/courses/1", data_key="term", single_item=True)
+        assert course == {"id": 1}
+        assert term == {"id": 7}
+        assert mock_req.call_count == 2
+
+    def test_list_requests_not_cached(self):
+        with patch.object(
+            self.session.session, "request", return_value=self._ok([{"id": 1}])
+        ) as mock_req:
+            self.session.get("/api/v1/courses", all_pages=True)
+            self.session.get("/api/v1/courses", all_pages=True)
+        assert mock_req.call_count == 2
+
+    def test_write_invalidates_same_path(self):
+        with patch.object(
+            self.session.session, "request", return_value=self._ok({"id": 1})
+        ) as mock_req:
+            self.session.get("/api/v1/courses/1", single_item=True)
+            self.session.get("/api/v1/courses/2", single_item=True)
+            self.session.put("/api/v1/courses/1", data={"name": "x"})
+            self.session.get("/api/v1/courses/1", single_item=True)
+            self.session.get("/api/v1/courses/2", single_item=True)
+        assert mock_req.call_count == 4
+
+    def test_expired_entry_refetched(self):
+        self.cache.ttl = 0
+        with patch.object(
+            self.session.session, "request", return_value=self._ok({"id": 1})
+        ) as mock_req:
+            self.session.get("/api/v1/courses/1", single_item=True)
+            self.session.get("/api/v1/courses/1", single_item=True)
+        assert mock_req.call_count == 2
+
+    def test_stale_entry_served_while_revalidating(self):
+        self.cache.ttl = 0
+        self.cache.stale_ttl = 60
+        refreshed = threading.Event()
+
+        def fake_request(method, url, **kwargs):
+            if mock_req.call_count > 1:
+                refreshed.set()
+                return _http_response(200, {"id": 1, "v": 2})
+            return self._ok({"id": 1, "v": 1})
+
+        with patch.object(self.session.session, "request", side_effect=fake_request) as mock_req:
+            self.session.get("/api/v1/courses/1", single_item=True)
+            stale = self.session.get("/api/v1/courses/1", single_item=True)
+            assert stale == {"id": 1, "v": 1}
+            assert refreshed.wait(2)
+        key = self.cache.key("/api/v1/courses/1", None)
+        for _ in range(100):
+            if self.cache.lookup(key)[0]["v"] == 2:
+                break
+            time.sleep(0.01)
+        assert self.cache.lookup(key)[0] == {"id": 1, "v": 2}
+
+    def test_lru_bound(self):
+        cache = EntityCache(max_entries=2)
+        for i in range(3):
+            cache.store(cache.key(f"/api/v1/courses/{i}", None), {"id": i})
+        assert len(cache) == 2
+        assert cache.lookup(cache.key("/api/v1/courses/0", None)) is None
+
+    @pytest.mark.anyio
+    async def test_async_single_item_served_from_cache(self):
+        with patch.object(
+            self.session.async_session,
+            "request",
+            new_callable=AsyncMock,
+            return_value=self._ok({"id": 1}),
+        ) as mock_req:
+            await self.session.async_get("/api/v1/courses/1", single_item=True)
+            result = await self.session.async_get("/api/v1/courses/1", single_item=True)
+        assert result == {"id": 1}
+        assert mock_req.call_count == 1
+
+    @pytest.mark.anyio
+    async def test_async_write_invalidates(self):
+        with patch.object(
+            self.session.async_session,
+            "request",
+            new_callable=AsyncMock,
+            return_value=self._ok({"id": 1}),
+        ) as mock_req:
+            await self.session.async_get("/api/v1/courses/1", single_item=True)
+            await self.session.async_delete("/api/v1/courses/1")
+            await self.session.async_get("/api/v1/courses/1", single_item=True)
+        assert mock_req.call_count == 3
+
+
+# ── RequestPlan / dispatch ───────────────────────────────────────────
+
+
+LIST_PLAN = RequestPlan(
+    "GET",
+    "/api/v1/courses/{course_id}/assignments",
+    (
+        ("course_id", "path", None, False, True),
+        ("include[]", "query", frozenset({"submission", "overrides"}), False, False),
+        ("due_at", "query", None, True, False),
+    ),
+    "all_pages",
+)
+
+UPDATE_PLAN = RequestPlan(
+    "PUT",
+    "/api/v1/courses/{id}",
+    (("id", "path", None, False, True), ("course[name]", "form", None, False, False)),
+    "single",
+)
+
+
+class TestRequestPlan:
+    def test_bind_formats_path_and_skips_unset(self):
+        uri, params, data = LIST_PLAN.bind((5, None, None))
+        assert uri == "/api/v1/courses/5/assignments"
+        assert params == {}
+        assert data == {}
+
+    def test_bind_without_path_params(self):
+        plan = RequestPlan("GET", "/api/v1/accounts", (("page", "query", None, False, False),))
+        assert plan.bind((None,)) == ("/api/v1/accounts", {}, {})
+        assert plan.bind((2,)) == ("/api/v1/accounts", {"page": 2}, {})
+
+    def test_bind_routes_query_and_form(self):
+        assert UPDATE_PLAN.bind((3, "Bio"))[2] == {"course[name]": "Bio"}
+        assert LIST_PLAN.bind((5, ["submission"], None))[1] == {"include[]": ["submission"]}
+
+    def test_bind_validates_enum(self):
+        with pytest.raises(ValueError):
+            LIST_PLAN.bind((5, "bogus", None))
+
+    def test_bind_coerces_datetime(self):
+        from datetime import date
+
+        params = LIST_PLAN.bind((5, None, date(2024, 1, 2)))[1]
+        assert params == {"due_at": "2024-01-02T00:00:00+00:00"}
+
+    def test_bind_rejects_wrong_arity(self):
+        with pytest.raises(TypeError):
+            LIST_PLAN.bind((5,))
+
+    def test_bind_validates_enum_lists(self):
+        with pytest.raises(ValueError, match="'bogus' not in"):
+            LIST_PLAN.bind((5, ["submission", "bogus"], None))
+
+    def test_bind_warn_policy(self):
+        with pytest.warns(UserWarning, match="'bogus' not in"):
+            params = LIST_PLAN.bind((5, "bogus", None), "warn")[1]
+        assert params == {"include[]": "bogus"}
+
+    def test_bind_off_policy_skips_checks_but_coerces_dates(self):
+        from datetime import date
+
+        params = LIST_PLAN.bind((5, "bogus", "soon"), "off")[1]
+        assert params == {"include[]": "bogus", "due_at": "soon"}
+        params = LIST_PLAN.bind((5, None, date(2024, 1, 2)), "off")[1]
+        assert params == {"due_at": "2024-01-02T00:00:00+00:00"}
+
+    def test_binders_are_compiled_per_policy(self):
+        plan = RequestPlan("GET", "/api/v1/x", (("sort", "query", frozenset({"a"}), False, True),))
+        with pytest.raises(ValueError):
+            plan.bind(("b",))
+        assert plan.bind(("b",), "off") == ("/api/v1/x", {"sort": "b"}, {})
+        assert set(plan._binders) == {"strict", "off"}
+
+
+class TestDispatch:
+    def setup_method(self):
+        self.session = CanvasSession("https://canvas.example.com", "token", max_per_page=75)
+
+    def test_paginated_plan_injects_per_page(self):
+        with patch.object(self.session, "base_request", return_value=[]) as mock_br:
+            self.session.dispatch(LIST_PLAN, (5, None, None), as_user_id=9)
+        args, kwargs = mock_br.call_args
+        assert args == ("GET", "/api/v1/courses/5/assignments")
+        assert kwargs["params"] == {"as_user_id": 9, "per_page": 75}
+        assert kwargs["all_pages"] is True
+        assert kwargs["single_item"] is False
+
+    def test_explicit_page_disables_auto_pagination(self):
+        with patch.object(self.session, "base_request", return_value=[]) as mock_br:
+            self.session.dispatch(LIST_PLAN, (5, None, None), per_page=10, page=2)
+        _, kwargs = mock_br.call_args
+        assert kwargs["params"] == {"per_page": 10, "page": 2}
+        assert kwargs["all_pages"] is False
+
+    def test_single_item_plan_sends_form_data(self):
+        with patch.object(self.session, "base_request", return_value={}) as mock_br:
+            self.session.dispatch(UPDATE_PLAN, (3, "Bio"))
+        args, kwargs = mock_br.call_args
+        assert args == ("PUT", "/api/v1/courses/3")
+        assert kwargs["data"] == {"course[name]": "Bio"}
+        assert kwargs["single_item"] is True
+        assert "per_page" not in kwargs["params"]
+
+    def test_session_validation_policy_reaches_plan(self):
+        session = CanvasSession("https://canvas.example.com", "token", validation="off")
+        with patch.object(session, "base_request", return_value=[]) as mock_br:
+            session.dispatch(LIST_PLAN, (5, "bogus", None))
+        assert mock_br.call_args.kwargs["params"]["include[]"] == "bogus"
+        with pytest.raises(ValueError):
+            self.session.dispatch(LIST_PLAN, (5, "bogus", None))
+
+    def test_unknown_validation_policy_rejected(self):
+        with pytest.raises(ValueError, match="validation must be one of"):
+            CanvasSession("https://canvas.example.com", "token", validation="lenient")
+
+    def test_dispatch_end_to_end(self):
+        def handler(request):
+            return httpx.Response(200, json=[{"id": 1}], request=request)
+
+        session = CanvasSession(
+            "https://canvas.example.com", "token", transport=httpx.MockTransport(handler)
+        )
+        assert session.dispatch(LIST_PLAN, (5, None, None)) == [{"id": 1}]
+        assert session.dispatch(LIST_PLAN, (5, None, None), raw=True) == [b'[{"id":1}]']
+
+    @pytest.mark.anyio
+    async def test_async_dispatch(self):
+        with patch.object(
+            self.session, "async_base_request", new_callable=AsyncMock, return_value=[]
+        ) as mock_br:
+            await self.session.async_dispatch(LIST_PLAN, (5, None, None), stream=True)
+        _, kwargs = mock_br.call_args
+        assert kwargs["params"] == {"per_page": 75}
+        assert kwargs["stream"] is True
+
+
 # ── CanvasSession — convenience methods inject per_page ─────────────
 
 
@@ -279,6 +1802,12 @@ class TestConvenienceMethods:
         _, kwargs = mock_br.call_args
         assert kwargs["params"]["per_page"] == 75
 
+    def test_get_injects_per_page_when_generated_code_passes_none(self):
+        with patch.object(self.session, "base_request", return_value=[]) as mock_br:
+            self.session.get("/api/v1/accounts", all_pages=True, per_page=None, page=None)
+        _, kwargs = mock_br.call_args
+        assert kwargs["params"]["per_page"] == 75
+
     def test_get_injects_per_page_for_poly_response(self):
         with patch.object(self.session, "base_request", return_value=[]) as mock_br:
             self.session.get("/api/v1/accounts", poly_response=True)
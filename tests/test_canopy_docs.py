@@ -3,15 +3,26 @@
 import ast
 import textwrap
 from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
 
 from canopy.scripts.canopy_docs import (
+    INDEX_CACHE_NAME,
     _collect_api_files,
     _get_canvas_params,
     _get_summary,
     _index_file,
-    _infer_return_type,
+    _IndexVisitor,
+    _return_type,
+    _route_entries,
+    cli,
+    index_files,
     load_excluded_specs,
 )
+from canopy.scripts.canvas_api_builder import get_jinja_env, render_api
+from tests.test_templates import MINIMAL_SPEC
 
 # ── Fixtures ─────────────────────────────────────────────────────────
 
@@ -22,40 +33,49 @@ def _parse_func(src: str) -> ast.FunctionDef | ast.AsyncFunctionDef:
     return tree.body[0]
 
 
+def _method_return_type(src: str) -> str:
+    """Run the index visitor over *src* as the only method of a class; map its keywords."""
+    tree = ast.parse("class C:\n" + textwrap.indent(textwrap.dedent(src), "    "))
+    func_type = ast.AsyncFunctionDef if src.startswith("async ") else ast.FunctionDef
+    visitor = _IndexVisitor(func_type)
+    visitor.visit(tree)
+    ((_, keywords),) = visitor.methods
+    return _return_type(keywords)
+
+
 def _make_api_file(tmp_path: Path, name: str, src: str) -> Path:
     p = tmp_path / name
     p.write_text(textwrap.dedent(src))
     return p
 
 
-# ── _infer_return_type ───────────────────────────────────────────────
+# ── _return_type ─────────────────────────────────────────────────────
 
 
-class TestInferReturnType:
+class TestReturnType:
     def test_all_pages_returns_list(self):
-        func = _parse_func("def f(self):\n    client.get(url, all_pages=True)")
-        assert _infer_return_type(func) == "list[dict]"
+        src = "def f(self):\n    client.get(url, all_pages=True)"
+        assert _method_return_type(src) == "list[dict]"
 
     def test_single_item_returns_dict(self):
-        func = _parse_func("def f(self):\n    client.get(url, single_item=True)")
-        assert _infer_return_type(func) == "dict"
+        src = "def f(self):\n    client.get(url, single_item=True)"
+        assert _method_return_type(src) == "dict"
 
     def test_poly_response_returns_union(self):
-        func = _parse_func("def f(self):\n    client.get(url, poly_response=True)")
-        assert _infer_return_type(func) == "dict | list[dict]"
+        src = "def f(self):\n    client.get(url, poly_response=True)"
+        assert _method_return_type(src) == "dict | list[dict]"
 
     def test_no_special_kwarg_defaults_to_dict(self):
-        func = _parse_func("def f(self):\n    client.get(url)")
-        assert _infer_return_type(func) == "dict"
+        assert _method_return_type("def f(self):\n    client.get(url)") == "dict"
 
     def test_async_function_all_pages(self):
-        func = _parse_func("async def f(self):\n    await client.async_get(url, all_pages=True)")
-        assert _infer_return_type(func) == "list[dict]"
+        src = "async def f(self):\n    await client.async_get(url, all_pages=True)"
+        assert _method_return_type(src) == "list[dict]"
 
     def test_priority_all_pages_over_single_item(self):
         # all_pages takes first-match priority via the if chain
-        func = _parse_func("def f(self):\n    client.get(url, all_pages=True, single_item=True)")
-        assert _infer_return_type(func) == "list[dict]"
+        src = "def f(self):\n    client.get(url, all_pages=True, single_item=True)"
+        assert _method_return_type(src) == "list[dict]"
 
 
 # ── _get_canvas_params ───────────────────────────────────────────────
@@ -209,6 +229,133 @@ class TestIndexFile:
         assert _index_file(p) is None
 
 
+PLANS_API_SRC = """\
+from canopy import RequestPlan
+
+_LIST_ACCOUNTS_PLAN = RequestPlan("GET", "/api/v1/accounts", (), "all_pages")
+_GET_ACCOUNT_PLAN = RequestPlan("GET", "/api/v1/accounts/{id}", (), "single")
+
+class Accounts:
+    def __init__(self, client):
+        self.client = client
+
+    def list_accounts(self, as_user_id=None, do_not_process=None, no_data=None):
+        \"\"\"List all accounts.\"\"\"
+        return self.client.dispatch(_LIST_ACCOUNTS_PLAN, (), as_user_id, do_not_process, no_data)
+
+    def get_account(self, id, as_user_id=None, do_not_process=None, no_data=None):
+        return self.client.dispatch(_GET_ACCOUNT_PLAN, (id,), as_user_id, do_not_process, no_data)
+"""
+
+
+class TestIndexFilePlans:
+    def test_return_types_from_plan_modes(self, tmp_path):
+        result = _index_file(_make_api_file(tmp_path, "accounts.py", PLANS_API_SRC))
+        assert "list_accounts(self, ...) -> list[dict]" in result
+        assert "get_account(self, id, ...) -> dict" in result
+        assert "# List all accounts" in result
+
+
+# ── index_files ──────────────────────────────────────────────────────
+
+
+class TestIndexFiles:
+    def _files(self, tmp_path):
+        return [
+            _make_api_file(tmp_path, "accounts.py", SYNC_API_SRC),
+            _make_api_file(tmp_path, "accounts_async.py", ASYNC_API_SRC),
+            _make_api_file(tmp_path, "broken.py", "def (:\n"),
+        ]
+
+    def test_blocks_in_input_order(self, tmp_path):
+        files = self._files(tmp_path)
+        blocks, parsed = index_files(files)
+        assert parsed == 3
+        assert blocks == [_index_file(p) for p in files]
+        assert blocks[2] is None
+
+    def test_cache_skips_unchanged_files(self, tmp_path):
+        files = self._files(tmp_path)
+        cache = tmp_path / INDEX_CACHE_NAME
+        first, _ = index_files(files, cache)
+        with patch("canopy.scripts.canopy_docs._index_file") as index_file:
+            second, parsed = index_files(files, cache)
+        index_file.assert_not_called()
+        assert parsed == 0
+        assert second == first
+
+    def test_cache_reparses_changed_files(self, tmp_path):
+        files = self._files(tmp_path)
+        cache = tmp_path / INDEX_CACHE_NAME
+        index_files(files, cache)
+        files[0].write_text(SYNC_API_SRC.replace("class Accounts:", "class Renamed:"))
+        blocks, parsed = index_files(files, cache)
+        assert parsed == 1
+        assert "## Renamed (accounts.py)" in blocks[0]
+
+    def test_stale_cache_version_is_ignored(self, tmp_path):
+        files = self._files(tmp_path)
+        cache = tmp_path / INDEX_CACHE_NAME
+        index_files(files, cache)
+        cache.write_text(cache.read_text().replace('"version": 1', '"version": 0'))
+        assert index_files(files, cache)[1] == 3
+
+    def test_parallel_matches_sequential(self, tmp_path):
+        files = self._files(tmp_path)
+        assert index_files(files, workers=2) == index_files(files)
+
+
+class TestGenerateIndexCommand:
+    def test_second_run_uses_cache(self, tmp_path):
+        apis = tmp_path / "apis"
+        apis.mkdir()
+        _make_api_file(apis, "accounts.py", SYNC_API_SRC)
+        output = tmp_path / "index.txt"
+        args = ["generate-index", "-a", str(apis), "-o", str(output)]
+        first = CliRunner().invoke(cli, args)
+        assert "(1 parsed)" in first.output
+        second = CliRunner().invoke(cli, args)
+        assert "(0 parsed)" in second.output
+        assert "list_accounts(self, ...) -> list[dict]" in output.read_text()
+
+
+class TestRoutes:
+    def _generated(self, apis, plans):
+        env = get_jinja_env()
+        render_api(env, MINIMAL_SPEC, "assignments", apis, plans=plans)
+        render_api(env, MINIMAL_SPEC, "assignments", apis, generate_async=True, plans=plans)
+
+    @pytest.mark.parametrize("plans", [False, True])
+    def test_route_entries_from_generated_module(self, tmp_path, plans):
+        self._generated(tmp_path, plans)
+        for name in ("assignments.py", "assignments_async.py"):
+            (entry,) = _route_entries(tmp_path / name)
+            assert entry["http_method"] == "GET"
+            assert entry["path"] == "/api/courses/{course_id}/assignments"
+            assert entry["method"] == "list_assignments"
+            assert entry["summary"] == "List assignments for a course"
+
+    def test_generate_lookup_and_search_commands(self, tmp_path):
+        apis = tmp_path / "apis"
+        apis.mkdir()
+        self._generated(apis, False)
+        routes = tmp_path / "routes.json"
+        runner = CliRunner()
+        result = runner.invoke(cli, ["generate-routes", "-a", str(apis), "-o", str(routes)])
+        # The async module duplicates the sync routes and is left out
+        assert "Indexed 1 routes" in result.output
+        result = runner.invoke(
+            cli, ["route-lookup", "GET", "/api/courses/42/assignments", "-r", str(routes)]
+        )
+        assert result.exit_code == 0
+        assert "assignments.list_assignments" in result.output
+        assert "course_id = 42" in result.output
+        result = runner.invoke(cli, ["route-lookup", "POST", "/api/nope", "-r", str(routes)])
+        assert result.exit_code == 1
+        result = runner.invoke(cli, ["route-search", "list assign", "-r", str(routes)])
+        assert result.output.startswith("assignments.list_assignments  GET")
+
+
 # ── _collect_api_files ───────────────────────────────────────────────
 
 
@@ -0,0 +1,360 @@
+"""Tests for canopy/scripts/canvas_api_builder.py — CLI commands."""
+
+import json
+
+import anyio
+import httpx
+import pytest
+from click.testing import CliRunner
+
+from canopy.dynamic import load_bundle
+from canopy.scripts import canvas_api_builder as builder
+from canopy.scripts.canvas_api_builder import (
+    FETCH_MANIFEST_NAME,
+    MANIFEST_NAME,
+    cli,
+    fetch_specs_async,
+    templates_digest,
+)
+from tests.test_openapi import OPENAPI_YAML
+from tests.test_templates import MINIMAL_SPEC
+
+
+@pytest.fixture
+def specs_dir(tmp_path):
+    specs = tmp_path / "specs"
+    specs.mkdir()
+    (specs / "assignments.json").write_text(json.dumps(MINIMAL_SPEC))
+    return specs
+
+
+@pytest.fixture
+def apis_dir(tmp_path):
+    apis = tmp_path / "apis"
+    apis.mkdir()
+    return apis
+
+
+def _invoke(*args):
+    result = CliRunner().invoke(cli, [str(a) for a in args])
+    assert result.exit_code == 0, result.output
+    return result
+
+
+class TestBuild:
+    def test_writes_module(self, specs_dir, apis_dir):
+        _invoke("build", "-s", specs_dir / "assignments.json", "-o", apis_dir)
+        assert (apis_dir / "assignments.py").exists()
+        assert not (apis_dir / "assignments.pyi").exists()
+
+    def test_compact_writes_lean_module_and_stub(self, specs_dir, apis_dir):
+        _invoke("build", "-s", specs_dir / "assignments.json", "-o", apis_dir, "--compact")
+        module = (apis_dir / "assignments.py").read_text()
+        stub = (apis_dir / "assignments.pyi").read_text()
+        assert '"""' not in module
+        assert "List assignments for a course." in stub
+
+    def test_compact_async_stub(self, specs_dir, apis_dir):
+        _invoke(
+            "build", "-s", specs_dir / "assignments.json", "-o", apis_dir, "--async", "--compact"
+        )
+        assert "class AssignmentsAsync:" in (apis_dir / "assignments_async.pyi").read_text()
+
+    def test_full_build_removes_stale_stub(self, specs_dir, apis_dir):
+        _invoke("build-all", "-s", specs_dir, "-o", apis_dir, "--compact")
+        assert (apis_dir / "assignments.pyi").exists()
+        _invoke("build-all", "-s", specs_dir, "-o", apis_dir)
+        assert not (apis_dir / "assignments.pyi").exists()
+        assert '"""' in (apis_dir / "assignments.py").read_text()
+
+
+class TestBuildAll:
+    @pytest.fixture
+    def many_specs(self, specs_dir):
+        for name in ("courses", "users", "accounts"):
+            (specs_dir / f"{name}.json").write_text(json.dumps(MINIMAL_SPEC))
+        return specs_dir
+
+    def test_parallel_matches_sequential(self, many_specs, tmp_path):
+        serial, parallel = tmp_path / "serial", tmp_path / "parallel"
+        serial.mkdir()
+        parallel.mkdir()
+        first = _invoke("build-all", "-s", many_specs, "-o", serial, "--plans")
+        second = _invoke("build-all", "-s", many_specs, "-o", parallel, "--plans", "-j", "2")
+        assert first.output == second.output
+        assert first.output.splitlines() == [
+            *(
+                f"Generating code for spec: {name}.json"
+                for name in ("accounts", "assignments", "courses", "users")
+            ),
+            "4 written, 0 identical, 0 up to date",
+        ]
+        for path in serial.iterdir():
+            assert (parallel / path.name).read_text() == path.read_text()
+
+    @pytest.mark.parametrize("jobs", ["1", "2"])
+    def test_errors_are_aggregated(self, many_specs, apis_dir, jobs):
+        (many_specs / "broken.json").write_text("{not json")
+        (many_specs / "empty.json").write_text("{}")
+        result = CliRunner().invoke(
+            cli, ["build-all", "-s", str(many_specs), "-o", str(apis_dir), "-j", jobs]
+        )
+        assert result.exit_code == 1
+        assert "1 of 6 spec(s) failed" in result.output
+        assert "broken.json: JSONDecodeError" in result.output
+        # Every other spec was still rendered
+        assert len(list(apis_dir.glob("*.py"))) == 5
+
+
+class TestManifest:
+    def _build_all(self, specs_dir, apis_dir, *extra):
+        return _invoke("build-all", "-s", specs_dir, "-o", apis_dir, *extra).output
+
+    def test_unchanged_inputs_are_skipped(self, specs_dir, apis_dir):
+        self._build_all(specs_dir, apis_dir)
+        module = apis_dir / "assignments.py"
+        mtime = module.stat().st_mtime_ns
+        output = self._build_all(specs_dir, apis_dir)
+        assert "Skipping unchanged code for spec: assignments.json" in output
+        assert "0 written, 0 identical, 1 up to date" in output
+        assert module.stat().st_mtime_ns == mtime
+        manifest = json.loads((apis_dir / MANIFEST_NAME).read_text())
+        assert manifest["templates"] == templates_digest()
+        assert manifest["outputs"]["assignments.py"]["options"] == [False, False, False, None]
+
+    def test_changed_spec_is_rebuilt(self, specs_dir, apis_dir):
+        self._build_all(specs_dir, apis_dir)
+        spec = dict(MINIMAL_SPEC, apiVersion="2.0")
+        (specs_dir / "assignments.json").write_text(json.dumps(spec))
+        assert "1 written" in self._build_all(specs_dir, apis_dir)
+        assert "API Version 2.0" in (apis_dir / "assignments.py").read_text()
+
+    def test_changed_options_are_rebuilt(self, specs_dir, apis_dir):
+        self._build_all(specs_dir, apis_dir)
+        assert "1 written" in self._build_all(specs_dir, apis_dir, "--plans")
+
+    def test_changed_templates_invalidate_manifest(self, specs_dir, apis_dir, monkeypatch):
+        self._build_all(specs_dir, apis_dir)
+        monkeypatch.setattr(builder, "templates_digest", lambda: "edited")
+        assert "1 identical" in self._build_all(specs_dir, apis_dir)
+
+    def test_force_renders_but_keeps_identical_files(self, specs_dir, apis_dir):
+        self._build_all(specs_dir, apis_dir)
+        module = apis_dir / "assignments.py"
+        mtime = module.stat().st_mtime_ns
+        assert "0 written, 1 identical" in self._build_all(specs_dir, apis_dir, "--force")
+        assert module.stat().st_mtime_ns == mtime
+
+    def test_deleted_output_is_rebuilt(self, specs_dir, apis_dir):
+        self._build_all(specs_dir, apis_dir)
+        (apis_dir / "assignments.py").unlink()
+        assert "1 written" in self._build_all(specs_dir, apis_dir)
+
+    def test_single_build_records_manifest(self, specs_dir, apis_dir):
+        spec = specs_dir / "assignments.json"
+        _invoke("build", "-s", spec, "-o", apis_dir, "--async")
+        result = _invoke("build", "-s", spec, "-o", apis_dir, "--async")
+        assert "Skipping unchanged async code for spec: assignments.json" in result.output
+        assert (
+            "assignments_async.py" in json.loads((apis_dir / MANIFEST_NAME).read_text())["outputs"]
+        )
+
+
+class TestRebuild:
+    def test_ignores_stubs_and_non_python_files(self, specs_dir, apis_dir):
+        _invoke("build", "-s", specs_dir / "assignments.json", "-o", apis_dir, "--compact")
+        (apis_dir / "notes.txt").write_text("not an api")
+        result = _invoke("rebuild", "-s", specs_dir, "-a", apis_dir, "--compact", "--force")
+        assert result.output.count("Generating code for spec: assignments.json") == 1
+
+    def test_missing_spec_is_reported(self, specs_dir, apis_dir):
+        _invoke("build", "-s", specs_dir / "assignments.json", "-o", apis_dir)
+        (apis_dir / "orphan.py").write_text("")
+        result = CliRunner().invoke(cli, ["rebuild", "-s", str(specs_dir), "-a", str(apis_dir)])
+        assert result.exit_code == 1
+        assert "orphan.json: FileNotFoundError" in result.output
+        assert "Skipping unchanged code for spec: assignments.json" in result.output
+
+
+class TestBundle:
+    def test_writes_bundle(self, specs_dir, tmp_path):
+        output = tmp_path / "canvas.bundle"
+        result = _invoke("bundle", "-s", specs_dir, "-o", output)
+        assert "Wrote 1 API(s)" in result.output
+        operations = json.loads(load_bundle(output)["assignments"])
+        assert operations["list_assignments"][:3] == [
+            "GET",
+            "/api/courses/{course_id}/assignments",
+            "all_pages",
+        ]
+
+    def test_respects_exclude_file(self, specs_dir, tmp_path):
+        (specs_dir / "courses.json").write_text(json.dumps(MINIMAL_SPEC))
+        exclude = tmp_path / "exclude.toml"
+        exclude.write_text('excluded = ["assignments.json"]\n')
+        output = tmp_path / "canvas.bundle"
+        _invoke("bundle", "-s", specs_dir, "-o", output, "-e", exclude)
+        assert list(load_bundle(output)) == ["courses"]
+
+
+class TestFetchSpecs:
+    @staticmethod
+    def _server(specs, log, statuses=None, retry_after="0"):
+        """Mock docs server: *specs* maps name -> body; *statuses* queues early statuses."""
+        statuses = statuses or {}
+
+        async def handler(request):
+            name = request.url.path.rsplit("/", 1)[-1]
+            log.append((name, request.headers.get("If-None-Match")))
+            if name == "api-docs.json":
+                return httpx.Response(200, json={"apis": [{"path": f"/{n}"} for n in specs]})
+            queued = statuses.get(name)
+            if queued:
+                headers = {"Retry-After": retry_after} if retry_after else {}
+                return httpx.Response(queued.pop(0), headers=headers)
+            if name not in specs:
+                return httpx.Response(404)
+            etag = f'"{hash(specs[name])}"'
+            if request.headers.get("If-None-Match") == etag:
+                return httpx.Response(304)
+            return httpx.Response(200, text=specs[name], headers={"ETag": etag})
+
+        return httpx.MockTransport(handler)
+
+    async def _fetch(self, specs_dir, transport, **kwargs):
+        kwargs.setdefault("delay", 0)
+        return await fetch_specs_async(
+            specs_dir, kwargs.pop("names", None), set(), **kwargs, transport=transport
+        )
+
+    @pytest.mark.anyio
+    async def test_downloads_index_and_records_validators(self, tmp_path):
+        specs = {"accounts.json": "{}", "courses.json": '{"apis": []}'}
+        log = []
+        results = await self._fetch(tmp_path, self._server(specs, log))
+        assert results == {"accounts.json": "updated", "courses.json": "updated"}
+        assert (tmp_path / "courses.json").read_text() == '{"apis": []}'
+        manifest = json.loads((tmp_path / FETCH_MANIFEST_NAME).read_text())
+        assert set(manifest) == {"accounts.json", "courses.json"}
+        assert "etag" in manifest["accounts.json"]
+
+    @pytest.mark.anyio
+    async def test_second_fetch_is_conditional(self, tmp_path):
+        specs = {"accounts.json": "{}"}
+        log = []
+        await self._fetch(tmp_path, self._server(specs, log))
+        log.clear()
+        results = await self._fetch(tmp_path, self._server(specs, log), names=["accounts.json"])
+        assert results == {"accounts.json": "unchanged"}
+        assert log[0][1] is not None
+        forced = await self._fetch(
+            tmp_path, self._server(specs, log), names=["accounts.json"], force=True
+        )
+        assert forced == {"accounts.json": "unchanged"}
+        assert log[-1][1] is None
+
+    @pytest.mark.anyio
+    async def test_deleted_spec_is_downloaded_again(self, tmp_path):
+        specs = {"a.json": "{}"}
+        log = []
+        await self._fetch(tmp_path, self._server(specs, log))
+        (tmp_path / "a.json").unlink()
+        log.clear()
+        results = await self._fetch(tmp_path, self._server(specs, log), names=["a.json"])
+        assert results == {"a.json": "updated"}
+        assert log == [("a.json", None)]
+        assert (tmp_path / "a.json").read_text() == "{}"
+
+    @pytest.mark.anyio
+    async def test_response_without_validators_drops_manifest_entry(self, tmp_path):
+        (tmp_path / FETCH_MANIFEST_NAME).write_text(json.dumps({"a.json": {"etag": '"old"'}}))
+        (tmp_path / "a.json").write_text("{}")
+
+        async def handler(request):
+            return httpx.Response(200, text='{"apis": []}')
+
+        results = await self._fetch(tmp_path, httpx.MockTransport(handler), names=["a.json"])
+        assert results == {"a.json": "updated"}
+        assert json.loads((tmp_path / FETCH_MANIFEST_NAME).read_text()) == {}
+
+    @pytest.mark.anyio
+    async def test_build_all_and_bundle_skip_manifest(self, tmp_path, apis_dir):
+        specs_dir = tmp_path / "specs"
+        specs_dir.mkdir()
+        specs = {"assignments.json": json.dumps(MINIMAL_SPEC)}
+        await self._fetch(specs_dir, self._server(specs, []))
+        assert (specs_dir / FETCH_MANIFEST_NAME).exists()
+        _invoke("build-all", "-s", specs_dir, "-o", apis_dir)
+        assert sorted(p.name for p in apis_dir.glob("*.py")) == ["assignments.py"]
+        result = _invoke("bundle", "-s", specs_dir, "-o", tmp_path / "canvas.bundle")
+        assert "Wrote 1 API(s)" in result.output
+
+    @pytest.mark.anyio
+    async def test_polls_202_until_ready(self, tmp_path):
+        log = []
+        transport = self._server({"users.json": "{}"}, log, {"users.json": [202, 202]})
+        results = await self._fetch(tmp_path, transport, names=["users.json"])
+        assert results == {"users.json": "updated"}
+        assert len(log) == 3
+
+    @pytest.mark.anyio
+    async def test_gives_up_after_max_wait(self, tmp_path):
+        log = []
+        transport = self._server({}, log, {"users.json": [202] * 50}, retry_after=None)
+        results = await self._fetch(
+            tmp_path, transport, names=["users.json"], max_wait=0.05, poll_interval=0.02
+        )
+        assert results["users.json"].startswith("gave up")
+
+    @pytest.mark.anyio
+    async def test_failures_do_not_stop_other_specs(self, tmp_path):
+        log = []
+        results = await self._fetch(
+            tmp_path, self._server({"a.json": "{}"}, log), names=["missing.json", "a.json"]
+        )
+        assert results == {"missing.json": "failed (status 404)", "a.json": "updated"}
+
+    @pytest.mark.anyio
+    async def test_concurrency_is_bounded(self, tmp_path):
+        in_flight = peak = 0
+
+        async def handler(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await anyio.sleep(0.01)
+            in_flight -= 1
+            return httpx.Response(200, text="{}")
+
+        names = [f"s{i}.json" for i in range(8)]
+        results = await self._fetch(
+            tmp_path, httpx.MockTransport(handler), names=names, concurrency=3
+        )
+        assert len(results) == 8
+        assert peak == 3
+
+    def test_command_summarises_results(self, tmp_path, monkeypatch):
+        async def fake_fetch(specs_dir, names, excluded, **options):
+            assert names == ["a.json"]
+            assert options["concurrency"] == 2
+            return {"a.json": "updated"}
+
+        monkeypatch.setattr(builder, "fetch_specs_async", fake_fetch)
+        result = _invoke("fetch-specs", "-s", tmp_path, "--spec", "a.json", "-c", "2")
+        assert "1 updated, 0 unchanged, 0 failed" in result.output
+
+
+class TestBuildOpenAPI:
+    def test_builds_and_skips_on_rerun(self, tmp_path, apis_dir):
+        source = tmp_path / "canvas.openapi.yaml"
+        source.write_text(OPENAPI_YAML)
+        first = _invoke("build-openapi", "-i", source, "-o", apis_dir, "--plans")
+        assert "Split canvas.openapi.yaml into 2 spec(s)" in first.output
+        assert (tmp_path / "canvas.specs" / "assignments.json").exists()
+        assert sorted(p.name for p in apis_dir.glob("*.py")) == [
+            "assignment_groups.py",
+            "assignments.py",
+        ]
+        second = _invoke("build-openapi", "-i", source, "-o", apis_dir, "--plans")
+        assert "unchanged, using 2 cached spec(s)" in second.output
+        assert "0 written, 0 identical, 2 up to date" in second.output
@@ -0,0 +1,197 @@
+"""Tests for canopy/dynamic.py — DynamicCanvasClient built from a spec bundle."""
+
+import inspect
+import json
+from datetime import datetime
+
+import httpx
+import pytest
+
+from canopy import DynamicCanvasClient
+from canopy.dynamic import dump_bundle, load_bundle
+from canopy.scripts.canvas_api_builder import bundle_operations
+from tests.test_templates import MINIMAL_SPEC
+
+UPDATE_SPEC = {
+    "apis": [
+        {
+            "path": "/v1/courses/{id}",
+            "operations": [
+                {
+                    "nickname": "update_course",
+                    "summary": "Update a course",
+                    "method": "PUT",
+                    "type": "Course",
+                    "parameters": [
+                        {"name": "id", "paramType": "path", "required": True},
+                        {"name": "course[name]", "paramType": "form", "type": "string"},
+                        {"name": "include", "paramType": "query", "type": "string"},
+                    ],
+                }
+            ],
+        }
+    ]
+}
+
+BUNDLE = {
+    "format": 1,
+    "apis": {
+        "assignments": json.dumps(bundle_operations(MINIMAL_SPEC)),
+        "courses": json.dumps(bundle_operations(UPDATE_SPEC)),
+    },
+}
+
+
+def _client(handler, **options):
+    return DynamicCanvasClient(
+        "https://canvas.example.com",
+        "token",
+        BUNDLE,
+        max_per_page=50,
+        transport=httpx.MockTransport(handler),
+        async_transport=httpx.MockTransport(handler),
+        **options,
+    )
+
+
+class TestBundleOperations:
+    def test_operation_table(self):
+        table = bundle_operations(MINIMAL_SPEC)
+        method, path, mode, summary, fields = table["list_assignments"]
+        assert (method, path, mode) == ("GET", "/api/courses/{course_id}/assignments", "all_pages")
+        assert summary == "List assignments for a course"
+        assert fields[0] == ["course_id", "path", None, False, True, "course_id", None]
+        assert fields[1][3] is True
+        assert fields[2][2] == ["position", "name", "due_at"]
+
+    def test_wire_and_argument_names(self):
+        fields = bundle_operations(UPDATE_SPEC)["update_course"][4]
+        assert [(f[0], f[5]) for f in fields] == [
+            ("id", "id"),
+            ("course[name]", "course_name"),
+            ("include[]", "include"),
+        ]
+
+
+class TestLoadBundle:
+    def test_round_trip(self, tmp_path):
+        path = tmp_path / "canvas.bundle"
+        path.write_bytes(dump_bundle({"courses": bundle_operations(UPDATE_SPEC)}))
+        apis = load_bundle(path)
+        assert list(apis) == ["courses"]
+        assert json.loads(apis["courses"]) == bundle_operations(UPDATE_SPEC)
+
+    def test_client_reads_bundle_file(self, tmp_path):
+        path = tmp_path / "canvas.bundle"
+        path.write_bytes(
+            dump_bundle(
+                {
+                    "assignments": bundle_operations(MINIMAL_SPEC),
+                    "courses": bundle_operations(UPDATE_SPEC),
+                }
+            )
+        )
+        client = DynamicCanvasClient("https://canvas.example.com", "token", path)
+        assert "update_course" in dir(client.courses)
+
+    def test_rejects_file_without_header(self, tmp_path):
+        path = tmp_path / "canvas.bundle"
+        path.write_text("{}")
+        with pytest.raises(ValueError, match="Unsupported bundle format"):
+            load_bundle(path)
+
+    def test_rejects_unknown_format(self):
+        with pytest.raises(ValueError, match="Unsupported bundle format"):
+            load_bundle({"format": 99, "apis": {}})
+
+
+class TestDynamicCanvasClient:
+    def test_list_call_builds_request(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json=[{"id": 1}], request=request)
+
+        client = _client(handler)
+        result = client.assignments.list_assignments(
+            7, due_at=datetime(2024, 1, 2, 3, 4, 5), order_by="name"
+        )
+        assert result == [{"id": 1}]
+        url = requests[0].url
+        assert url.path == "/api/courses/7/assignments"
+        assert url.params["order_by"] == "name"
+        assert url.params["due_at"].startswith("2024-01-02T03:04:05")
+        assert url.params["per_page"] == "50"
+
+    def test_form_and_array_params(self):
+        requests = []
+
+        def handler(request):
+            requests.append(request)
+            return httpx.Response(200, json={"id": 3}, request=request)
+
+        client = _client(handler)
+        assert client.courses.update_course(3, course_name="Bio", include="term") == {"id": 3}
+        request = requests[0]
+        assert request.method == "PUT"
+        assert request.url.params["include[]"] == "term"
+        assert b"course%5Bname%5D=Bio" in request.content
+
+    def test_enum_validation(self):
+        client = _client(lambda request: httpx.Response(200, json=[], request=request))
+        with pytest.raises(ValueError):
+            client.assignments.list_assignments(1, order_by="bogus")
+
+    def test_signature_matches_generated_method(self):
+        client = _client(lambda request: httpx.Response(200, json=[], request=request))
+        params = list(inspect.signature(client.assignments.list_assignments).parameters)
+        assert params == [
+            "course_id",
+            "due_at",
+            "order_by",
+            "as_user_id",
+            "do_not_process",
+            "no_data",
+            "per_page",
+            "page",
+            "stream",
+            "raw",
+        ]
+        assert "stream" not in inspect.signature(client.courses.update_course).parameters
+        assert client.assignments.list_assignments.__doc__ == "List assignments for a course"
+
+    def test_apis_and_operations_are_built_lazily_and_cached(self):
+        client = _client(lambda request: httpx.Response(200, json=[], request=request))
+        assert client._operations == {}
+        api = client.assignments
+        assert client.assignments is api
+        assert set(client._operations) == {"assignments"}
+        assert "list_assignments" not in vars(api)
+        endpoint = api.list_assignments
+        assert api.list_assignments is endpoint
+        assert "list_assignments" in dir(api)
+        assert {"courses", "courses_async"} <= set(dir(client))
+
+    def test_unknown_names_raise_attribute_error(self):
+        client = _client(lambda request: httpx.Response(200, json=[], request=request))
+        with pytest.raises(AttributeError, match="no attribute 'nope'"):
+            _ = client.nope
+        with pytest.raises(AttributeError, match="no operation 'nope'"):
+            _ = client.assignments.nope
+
+    def test_session_options_forwarded(self):
+        client = _client(lambda request: None, retry=False)
+        assert client.client.retry is None
+        assert client.client.max_per_page == 50
+
+    @pytest.mark.anyio
+    async def test_async_variant(self):
+        def handler(request):
+            return httpx.Response(200, json={"id": 4}, request=request)
+
+        client = _client(handler)
+        assert inspect.iscoroutinefunction(client.courses_async.update_course)
+        assert await client.courses_async.update_course(4) == {"id": 4}
+        # Sync and async variants share one decoded operation table
+        assert client._operations["courses"] is client.courses._operations
@@ -28,6 +28,14 @@ class TestCoerceToIso8601:
         value = "2024-01-15T10:30:00+07:00"
         assert coerce_to_iso8601(value) == value
 
+    def test_warn_policy_passes_string_through(self):
+        with pytest.warns(UserWarning, match="ISO8601"):
+            assert coerce_to_iso8601("not-a-date", "warn") == "not-a-date"
+
+    def test_off_policy_still_formats_dates(self):
+        assert coerce_to_iso8601("not-a-date", "off") == "not-a-date"
+        assert coerce_to_iso8601(date(2024, 1, 15), "off") == "2024-01-15T00:00:00+00:00"
+
 
 class TestValidateEnum:
     def test_valid_single_value(self):
@@ -45,6 +53,19 @@ class TestValidateEnum:
         with pytest.raises(ValueError):
             _validate_enum(["position", "invalid"], ["position", "name", "due_at"])
 
+    def test_frozenset_choices(self):
+        choices = frozenset({"position", "name", "due_at"})
+        assert _validate_enum("name", choices) == "name"
+        with pytest.raises(ValueError, match=r"\['due_at', 'name', 'position'\]"):
+            _validate_enum("invalid", choices)
+
+    def test_warn_policy(self):
+        with pytest.warns(UserWarning, match="'invalid' not in"):
+            assert _validate_enum("invalid", ["position"], "warn") == "invalid"
+
+    def test_off_policy(self):
+        assert _validate_enum(["invalid"], ["position"], "off") == ["invalid"]
+
 
 class TestValidateIso8601String:
     def test_valid_utc(self):
@@ -0,0 +1,208 @@
+"""Tests for canopy/scripts/openapi.py — OpenAPI 3 to per-resource specs."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+import yaml
+
+from canopy.scripts import openapi
+from canopy.scripts.canvas_api_builder import get_jinja_env
+from canopy.scripts.openapi import INDEX_NAME, load_openapi_specs, openapi_to_specs
+
+OPENAPI_YAML = """\
+openapi: 3.0.3
+info:
+  title: Canvas LMS API
+  version: "2025.1"
+paths:
+  /api/v1/courses/{course_id}/assignments:
+    parameters:
+      - $ref: "#/components/parameters/CourseId"
+    get:
+      operationId: list_assignments
+      summary: List assignments
+      description: |-
+        Returns the paginated list of assignments.
+        Second line.
+      tags: [Assignments]
+      parameters:
+        - name: include[]
+          in: query
+          schema:
+            type: array
+            items:
+              type: string
+              enum: [submission, overrides]
+        - name: order_by
+          in: query
+          schema:
+            $ref: "#/components/schemas/OrderBy"
+        - name: X-Trace
+          in: header
+          schema: {type: string}
+      responses:
+        "200":
+          description: ok
+          content:
+            application/json:
+              schema:
+                type: array
+                items: {$ref: "#/components/schemas/Assignment"}
+    post:
+      operationId: create_assignment
+      summary: Create an assignment
+      tags: [Assignments]
+      requestBody:
+        content:
+          application/x-www-form-urlencoded:
+            schema:
+              type: object
+              required: ["assignment[name]"]
+              properties:
+                assignment[name]: {type: string}
+                assignment[due_at]: {type: string, format: date-time}
+      responses:
+        "200":
+          description: ok
+          content:
+            application/json:
+              schema: {$ref: "#/components/schemas/Assignment"}
+  /api/v1/courses/{course_id}/assignment_groups/{id}:
+    delete:
+      operationId: destroy_assignment_group
+      summary: Destroy an assignment group
+      tags: [Assignment Groups]
+      parameters:
+        - $ref: "#/components/parameters/CourseId"
+        - {name: id, in: path, required: true, schema: {type: string}}
+      responses:
+        "204": {description: gone}
+components:
+  parameters:
+    CourseId: {name: course_id, in: path, required: true, schema: {type: string}}
+  schemas:
+    OrderBy: {type: string, enum: [position, name]}
+    Assignment: {type: object}
+"""
+
+
+@pytest.fixture
+def specs():
+    return openapi_to_specs(yaml.safe_load(OPENAPI_YAML))
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "canvas.openapi.yaml"
+    path.write_text(OPENAPI_YAML)
+    return path
+
+
+class TestOpenAPIToSpecs:
+    def test_split_by_tag(self, specs):
+        assert list(specs) == ["assignment_groups", "assignments"]
+        assert specs["assignments"]["apiVersion"] == "2025.1"
+
+    def test_paths_drop_api_prefix_and_group_methods(self, specs):
+        (api,) = specs["assignments"]["apis"]
+        assert api["path"] == "/v1/courses/{course_id}/assignments"
+        assert [op["nickname"] for op in api["operations"]] == [
+            "list_assignments",
+            "create_assignment",
+        ]
+
+    def test_query_and_path_parameters(self, specs):
+        op = specs["assignments"]["apis"][0]["operations"][0]
+        assert op["notes"] == "Returns the paginated list of assignments.\nSecond line."
+        params = {p["name"]: p for p in op["parameters"]}
+        assert set(params) == {"course_id", "include", "order_by"}
+        assert params["course_id"] == {
+            "name": "course_id",
+            "paramType": "path",
+            "required": True,
+            "type": "string",
+        }
+        assert params["include"]["type"] == "array"
+        assert params["include"]["enum"] == ["submission", "overrides"]
+        assert params["order_by"]["enum"] == ["position", "name"]
+
+    def test_operation_parameter_overrides_path_parameter(self):
+        document = yaml.safe_load(OPENAPI_YAML)
+        get = document["paths"]["/api/v1/courses/{course_id}/assignments"]["get"]
+        get["parameters"].append(
+            {"name": "course_id", "in": "path", "required": True, "schema": {"type": "integer"}}
+        )
+        op = openapi_to_specs(document)["assignments"]["apis"][0]["operations"][0]
+        course_ids = [p for p in op["parameters"] if p["name"] == "course_id"]
+        assert course_ids == [
+            {"name": "course_id", "paramType": "path", "required": True, "type": "integer"}
+        ]
+        source = (
+            get_jinja_env()
+            .get_template("canopy_api.py.jinja2")
+            .render(
+                spec=openapi_to_specs(document)["assignments"],
+                api_name="Assignments",
+                api_file_name="assignments",
+            )
+        )
+        compile(source, "<generated>", "exec")
+
+    def test_form_parameters_from_request_body(self, specs):
+        op = specs["assignments"]["apis"][0]["operations"][1]
+        params = {p["name"]: p for p in op["parameters"]}
+        assert params["assignment[name]"]["paramType"] == "form"
+        assert params["assignment[name]"]["required"] is True
+        assert params["assignment[due_at]"]["type"] == "DateTime"
+
+    def test_response_types(self, specs):
+        list_op, create_op = specs["assignments"]["apis"][0]["operations"]
+        assert list_op["type"] == "array"
+        assert create_op["type"] == "Assignment"
+        assert specs["assignment_groups"]["apis"][0]["operations"][0]["type"] == "void"
+
+    def test_specs_render_with_templates(self, specs):
+        env = get_jinja_env()
+        for name, spec in specs.items():
+            for template in ("canopy_api.py.jinja2", "canopy_api_async.py.jinja2"):
+                output = env.get_template(template).render(
+                    spec=spec, api_name=name.title(), api_file_name=name, plans=True
+                )
+                compile(output, f"<{name}>", "exec")
+
+
+class TestLoadOpenAPISpecs:
+    def test_writes_specs_and_index(self, source, tmp_path):
+        paths, reused = load_openapi_specs(source, tmp_path / "ir")
+        assert not reused
+        assert [p.name for p in paths] == ["assignment_groups.json", "assignments.json"]
+        index = json.loads((tmp_path / "ir" / INDEX_NAME).read_text())
+        assert index["resources"] == ["assignment_groups", "assignments"]
+
+    def test_unchanged_source_skips_parse(self, source, tmp_path):
+        load_openapi_specs(source, tmp_path / "ir")
+        with patch.object(openapi, "_parse") as parse:
+            paths, reused = load_openapi_specs(source, tmp_path / "ir")
+        assert reused
+        parse.assert_not_called()
+        assert len(paths) == 2
+
+    def test_changed_source_rewrites_only_changed_specs(self, source, tmp_path):
+        ir = tmp_path / "ir"
+        load_openapi_specs(source, ir)
+        groups = ir / "assignment_groups.json"
+        mtime = groups.stat().st_mtime_ns
+        source.write_text(OPENAPI_YAML.replace("List assignments", "List all assignments"))
+        _, reused = load_openapi_specs(source, ir)
+        assert not reused
+        assert groups.stat().st_mtime_ns == mtime
+        assert "List all assignments" in (ir / "assignments.json").read_text()
+
+    def test_removed_resource_is_deleted(self, source, tmp_path):
+        ir = tmp_path / "ir"
+        load_openapi_specs(source, ir)
+        source.write_text(OPENAPI_YAML.replace("tags: [Assignment Groups]", "tags: [Assignments]"))
+        paths, _ = load_openapi_specs(source, ir)
+        assert [p.name for p in paths] == ["assignments.json"]
+        assert not (ir / "assignment_groups.json").exists()
@@ -0,0 +1,118 @@
+"""Tests for canopy/routes.py — RouteIndex reverse lookup and search."""
+
+import pytest
+
+from canopy import RouteIndex
+
+ROUTES = [
+    {
+        "http_method": "GET",
+        "path": "/api/v1/courses/{course_id}/assignments",
+        "module": "assignments",
+        "class": "Assignments",
+        "method": "list_assignments",
+        "summary": "List assignments",
+    },
+    {
+        "http_method": "GET",
+        "path": "/api/v1/courses/{course_id}/assignments/{assignment_id}/submissions",
+        "module": "submissions",
+        "class": "Submissions",
+        "method": "list_assignment_submissions_courses",
+        "summary": "List assignment submissions",
+    },
+    {
+        "http_method": "GET",
+        "path": "/api/v1/courses/{id}",
+        "module": "courses",
+        "class": "Courses",
+        "method": "get_single_course_courses",
+        "summary": "Get a single course",
+    },
+    {
+        "http_method": "PUT",
+        "path": "/api/v1/courses/{id}",
+        "module": "courses",
+        "class": "Courses",
+        "method": "update_course",
+        "summary": "Update a course",
+    },
+    {
+        "http_method": "GET",
+        "path": "/api/v1/courses/search",
+        "module": "search",
+        "class": "Search",
+        "method": "search_courses",
+        "summary": "Find public courses",
+    },
+]
+
+
+@pytest.fixture
+def index():
+    return RouteIndex(ROUTES)
+
+
+class TestLookup:
+    def test_concrete_path_with_params(self, index):
+        route, params = index.lookup("get", "/api/v1/courses/123/assignments/9/submissions")
+        assert route["method"] == "list_assignment_submissions_courses"
+        assert params == {"course_id": "123", "assignment_id": "9"}
+
+    def test_method_selects_route(self, index):
+        assert index.lookup("PUT", "/api/v1/courses/5")[0]["method"] == "update_course"
+        assert index.lookup("DELETE", "/api/v1/courses/5") is None
+
+    def test_literal_segment_wins_over_param(self, index):
+        assert index.lookup("GET", "/api/v1/courses/search")[0]["method"] == "search_courses"
+
+    def test_backtracks_from_literal_to_param(self, index):
+        # "search" matches the literal branch, which has no deeper route
+        route, params = index.lookup("GET", "/api/v1/courses/search/assignments")
+        assert route["method"] == "list_assignments"
+        assert params == {"course_id": "search"}
+
+    def test_full_url_query_string_and_encoding(self, index):
+        route, params = index.lookup(
+            "GET", "https://canvas.example.com/api/v1/courses/sis_course_id%3AA1?per_page=10"
+        )
+        assert route["method"] == "get_single_course_courses"
+        assert params == {"id": "sis_course_id:A1"}
+
+    def test_unknown_path(self, index):
+        assert index.lookup("GET", "/api/v1/nope") is None
+        assert index.lookup("GET", "/api/v1/courses/1/assignments/2") is None
+
+
+class TestSearch:
+    def test_all_words_must_match(self, index):
+        results = index.search("list submissions")
+        assert [r["method"] for r in results] == ["list_assignment_submissions_courses"]
+
+    def test_last_word_matches_prefix(self, index):
+        methods = {r["method"] for r in index.search("list assign")}
+        assert methods == {"list_assignments", "list_assignment_submissions_courses"}
+
+    def test_method_name_matches_rank_first(self, index):
+        assert index.search("course")[0]["module"] == "courses"
+
+    def test_limit_and_empty_query(self, index):
+        assert len(index.search("courses", limit=2)) == 2
+        assert index.search("") == []
+        assert index.search("zzz") == []
+
+
+class TestPersistence:
+    def test_round_trip_keeps_compiled_trie(self, index, tmp_path):
+        path = tmp_path / "routes.json"
+        path.write_text(index.to_json())
+        loaded = RouteIndex.load(path)
+        assert len(loaded) == len(ROUTES)
+        assert loaded.trie == index.trie
+        assert loaded.lookup("GET", "/api/v1/courses/1/assignments")[1] == {"course_id": "1"}
+
+    def test_rejects_unknown_format(self, tmp_path):
+        path = tmp_path / "routes.json"
+        path.write_text('{"format": 99}')
+        with pytest.raises(ValueError, match="Unsupported route index format"):
+            RouteIndex.load(path)
@@ -1,7 +1,14 @@
 """Tests for Jinja2 template output correctness."""
 
+import importlib
+import sys
+import urllib.parse
+from unittest.mock import MagicMock
+
+import httpx
 import pytest
 
+from canopy import CanvasSession
 from canopy.scripts.canvas_api_builder import get_jinja_env
 
 MINIMAL_SPEC = {
@@ -60,6 +67,24 @@ def async_output():
     )
 
 
+@pytest.fixture
+def plans_output():
+    env = get_jinja_env()
+    template = env.get_template("canopy_api.py.jinja2")
+    return template.render(
+        spec=MINIMAL_SPEC, api_name="Assignments", api_file_name="assignments", plans=True
+    )
+
+
+@pytest.fixture
+def async_plans_output():
+    env = get_jinja_env()
+    template = env.get_template("canopy_api_async.py.jinja2")
+    return template.render(
+        spec=MINIMAL_SPEC, api_name="Assignments", api_file_name="assignments_async", plans=True
+    )
+
+
 class TestSyncTemplate:
     def test_no_object_base_class(self, sync_output):
         assert "class Assignments(object)" not in sync_output
@@ -73,10 +98,47 @@ class TestSyncTemplate:
         assert "issubclass" not in sync_output
 
     def test_coerce_to_iso8601_used(self, sync_output):
-        assert "coerce_to_iso8601(due_at)" in sync_output
+        assert "coerce_to_iso8601(due_at, client.validation)" in sync_output
 
     def test_validate_enum_used(self, sync_output):
-        assert '_validate_enum(order_by, ["position", "name", "due_at"])' in sync_output
+        assert (
+            '_LIST_ASSIGNMENTS_ORDER_BY_ENUM = frozenset({"position", "name", "due_at"})'
+            in sync_output
+        )
+        assert (
+            "_validate_enum(order_by, _LIST_ASSIGNMENTS_ORDER_BY_ENUM, client.validation)"
+            in sync_output
+        )
+
+    @pytest.mark.parametrize("validation", ["strict", "warn", "off"])
+    def test_generated_module_follows_validation_policy(self, sync_output, validation):
+        namespace = {}
+        exec(compile(sync_output, "<generated>", "exec"), namespace)
+        client = MagicMock(validation=validation)
+        api = namespace["Assignments"](client)
+        if validation == "strict":
+            with pytest.raises(ValueError, match="'title' not in"):
+                api.list_assignments(1, order_by="title")
+        elif validation == "warn":
+            with pytest.warns(UserWarning, match="'title' not in"):
+                api.list_assignments(1, order_by="title")
+        else:
+            api.list_assignments(1, order_by="title", due_at="yesterday")
+            assert client.get.call_args.kwargs["params"] == {
+                "order_by": "title",
+                "due_at": "yesterday",
+            }
+
+    def test_stream_kwarg_on_list_endpoint(self, sync_output):
+        assert "stream=None" in sync_output
+        assert "stream=stream" in sync_output
+
+    def test_raw_kwarg_on_list_endpoint(self, sync_output):
+        namespace = {}
+        exec(compile(sync_output, "<generated>", "exec"), namespace)
+        client = MagicMock(validation="strict")
+        namespace["Assignments"](client).list_assignments(1, raw=True)
+        assert client.get.call_args.kwargs["raw"] is True
 
     def test_generated_code_is_valid_python(self, sync_output):
         compile(sync_output, "<generated>", "exec")
@@ -99,3 +161,244 @@ class TestAsyncTemplate:
 
     def test_generated_code_is_valid_python(self, async_output):
         compile(async_output, "<generated>", "exec")
+
+
+class TestCompactTemplate:
+    @pytest.fixture(params=[False, True], ids=["classic", "plans"])
+    def compact_output(self, request):
+        env = get_jinja_env()
+        return env.get_template("canopy_api.py.jinja2").render(
+            spec=MINIMAL_SPEC,
+            api_name="Assignments",
+            api_file_name="assignments",
+            plans=request.param,
+            compact=True,
+        )
+
+    def test_no_docstrings_or_comments(self, compact_output):
+        assert '"""' not in compact_output
+        assert "#" not in compact_output
+
+    def test_signature_unchanged(self, compact_output, sync_output):
+        signature = "def list_assignments(self, course_id, due_at=None, order_by=None"
+        assert signature in compact_output
+        assert signature in sync_output
+
+    def test_generated_code_is_valid_python(self, compact_output):
+        compile(compact_output, "<generated>", "exec")
+
+    def test_async_compact(self):
+        output = (
+            get_jinja_env()
+            .get_template("canopy_api_async.py.jinja2")
+            .render(spec=MINIMAL_SPEC, api_name="Assignments", api_file_name="a", compact=True)
+        )
+        assert '"""' not in output
+        assert "async def list_assignments" in output
+
+
+class TestStubTemplate:
+    def _render(self, is_async):
+        env = get_jinja_env()
+        return env.get_template("canopy_api.pyi.jinja2").render(
+            spec=MINIMAL_SPEC, api_name="Assignments", is_async=is_async
+        )
+
+    def test_sync_stub_carries_docs(self):
+        output = self._render(False)
+        assert "class Assignments:" in output
+        assert "    def list_assignments(self, course_id, due_at=None" in output
+        assert "List assignments for a course." in output
+        assert "Returns paginated list." in output
+
+    def test_async_stub(self):
+        output = self._render(True)
+        assert "class AssignmentsAsync:" in output
+        assert "    async def list_assignments(" in output
+
+    def test_stub_is_valid_python(self):
+        compile(self._render(False), "<stub>", "exec")
+        compile(self._render(True), "<stub>", "exec")
+
+
+class TestPlansTemplate:
+    def test_plan_constant_emitted(self, plans_output):
+        assert "_LIST_ASSIGNMENTS_PLAN = RequestPlan(" in plans_output
+        assert '"/api/courses/{course_id}/assignments"' in plans_output
+        assert '"all_pages"' in plans_output
+
+    def test_param_table(self, plans_output):
+        assert '("course_id", "path", None, False, True)' in plans_output
+        assert '("due_at", "query", None, True, False)' in plans_output
+        assert 'frozenset({"position", "name", "due_at"})' in plans_output
+
+    def test_method_dispatches_plan(self, plans_output):
+        assert (
+            "return self.client.dispatch(_LIST_ASSIGNMENTS_PLAN, (course_id, due_at, order_by), "
+            in plans_output
+        )
+        assert "_validate_enum" not in plans_output
+
+    def test_async_method_awaits_dispatch(self, async_plans_output):
+        assert "return await self.client.async_dispatch(_LIST_ASSIGNMENTS_PLAN" in (
+            async_plans_output
+        )
+
+    def test_generated_module_calls_dispatch(self, plans_output):
+        namespace = {}
+        exec(compile(plans_output, "<generated>", "exec"), namespace)
+        client = MagicMock()
+        namespace["Assignments"](client).list_assignments(1, order_by="name", stream=True, raw=True)
+        plan, values, *rest = client.dispatch.call_args.args
+        assert plan.mode == "all_pages"
+        assert values == (1, None, "name")
+        assert rest == [None, None, None, None, None, True, True]
+
+    def test_generated_code_is_valid_python(self, plans_output, async_plans_output):
+        compile(plans_output, "<generated>", "exec")
+        compile(async_plans_output, "<generated>", "exec")
+
+
+ARRAY_SPEC = {
+    "apiVersion": "1.0",
+    "apis": [
+        {
+            "path": "/v1/courses/{course_id}/enrollments",
+            "operations": [
+                {
+                    "nickname": "list_enrollments",
+                    "summary": "List enrollments",
+                    "notes": "",
+                    "method": "GET",
+                    "type": "array",
+                    "parameters": [
+                        {"name": "course_id", "paramType": "path", "required": True},
+                        {
+                            "name": "user_ids",
+                            "paramType": "query",
+                            "type": "array",
+                            "items": {"type": "integer"},
+                        },
+                        {"name": "type", "paramType": "query", "items": {"type": "string"}},
+                        {"name": "state[]", "paramType": "query", "type": "array"},
+                        {"name": "sis_user_id", "paramType": "query", "type": "string"},
+                    ],
+                },
+                {
+                    "nickname": "update_course",
+                    "summary": "Update a course",
+                    "notes": "",
+                    "method": "PUT",
+                    "type": "Course",
+                    "parameters": [
+                        {"name": "course_id", "paramType": "path", "required": True},
+                        {"name": "course[event_ids]", "paramType": "form", "type": "array"},
+                        {"name": "course[name]", "paramType": "form", "type": "string"},
+                    ],
+                },
+            ],
+        }
+    ],
+}
+
+
+class TestArrayParams:
+    @pytest.fixture(params=[False, True], ids=["classic", "plans"])
+    def api(self, request):
+        source = (
+            get_jinja_env()
+            .get_template("canopy_api.py.jinja2")
+            .render(spec=ARRAY_SPEC, api_name="Enrollments", api_file_name="e", plans=request.param)
+        )
+        namespace = {}
+        exec(compile(source, "<generated>", "exec"), namespace)
+        self.requests = []
+
+        def handler(request):
+            self.requests.append(request)
+            return httpx.Response(200, json=[] if request.method == "GET" else {"id": 1})
+
+        session = CanvasSession(
+            "https://canvas.example.com", "token", transport=httpx.MockTransport(handler)
+        )
+        return namespace["Enrollments"](session)
+
+    def test_query_lists_repeat_bracketed_keys(self, api):
+        api.list_enrollments(1, user_ids=[4, 5], _type=["StudentEnrollment"], state_=["active"])
+        params = self.requests[0].url.params
+        assert params.get_list("user_ids[]") == ["4", "5"]
+        assert params.get_list("type[]") == ["StudentEnrollment"]
+        assert params.get_list("state[]") == ["active"]
+
+    def test_scalar_params_keep_their_name(self, api):
+        api.list_enrollments(1, sis_user_id="abc")
+        assert self.requests[0].url.params["sis_user_id"] == "abc"
+
+    def test_form_lists_repeat_bracketed_keys(self, api):
+        api.update_course(1, course_event_ids=[7, 8], course_name="Bio")
+        body = urllib.parse.parse_qs(self.requests[0].content.decode())
+        assert body == {"course[event_ids][]": ["7", "8"], "course[name]": ["Bio"]}
+
+
+def test_client_template_passes_session_options():
+    env = get_jinja_env()
+    output = env.get_template("canvas_client.py.jinja2").render(
+        api_module_path="apis.",
+        generated_api_files=[{"base_name": "accounts", "class_name": "Accounts"}],
+    )
+    assert "max_per_page=100, **session_options" in output
+    assert "self.max_per_page, **session_options" in output
+    compile(output, "<generated>", "exec")
+
+
+class TestLazyClientTemplate:
+    @pytest.fixture
+    def client_module(self, tmp_path, monkeypatch):
+        """Render canvas_client.py over a tiny generated package and import it."""
+        package = tmp_path / "lazyapis"
+        package.mkdir()
+        (package / "__init__.py").write_text("")
+        for stem, cls in (("accounts", "Accounts"), ("courses", "Courses")):
+            (package / f"{stem}.py").write_text(
+                f"class {cls}:\n    def __init__(self, client):\n        self.client = client\n"
+            )
+        output = (
+            get_jinja_env()
+            .get_template("canvas_client.py.jinja2")
+            .render(
+                api_module_path="lazyapis.",
+                generated_api_files=[
+                    {"base_name": "accounts", "class_name": "Accounts"},
+                    {"base_name": "courses", "class_name": "Courses"},
+                ],
+            )
+        )
+        (tmp_path / "lazy_canvas_client.py").write_text(output)
+        monkeypatch.syspath_prepend(str(tmp_path))
+        for name in ("lazy_canvas_client", "lazyapis", "lazyapis.accounts", "lazyapis.courses"):
+            monkeypatch.delitem(sys.modules, name, raising=False)
+        yield importlib.import_module("lazy_canvas_client")
+        for name in ("lazy_canvas_client", "lazyapis", "lazyapis.accounts", "lazyapis.courses"):
+            sys.modules.pop(name, None)
+
+    def test_api_modules_not_imported_up_front(self, client_module):
+        client_module.CanvasClient("https://canvas.example.com", "token")
+        assert "lazyapis.accounts" not in sys.modules
+        assert "lazyapis.courses" not in sys.modules
+
+    def test_first_access_imports_and_caches(self, client_module):
+        client = client_module.CanvasClient("https://canvas.example.com", "token")
+        accounts = client.accounts
+        assert type(accounts).__name__ == "Accounts"
+        assert accounts.client is client.client
+        assert client.accounts is accounts
+        assert "lazyapis.courses" not in sys.modules
+
+    def test_unknown_attribute_raises(self, client_module):
+        client = client_module.CanvasClient("https://canvas.example.com", "token")
+        with pytest.raises(AttributeError, match="nope"):
+            _ = client.nope
+
+    def test_dir_lists_apis(self, client_module):
+        client = client_module.CanvasClient("https://canvas.example.com", "token")
+        assert {"accounts", "courses"} <= set(dir(client))